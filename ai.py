@@ -1,85 +1,417 @@
+import os
 import random
-import numpy as np
-from game_logic import valid_moves, make_move, can_flip
+import threading
+from array import array
+from math import log, sqrt
+from game_logic import valid_moves, make_move, can_flip, board_to_bitboards, legal_moves_mask, flips_mask, moves_with_flips, shift_bitboard, board_geometry, GameState, MAX_BOARD_SIZE
+from move_cache import move_cache, cached_moves
+from memory_budget import memory_governor, mapping_footprint, deep_sizeof
+from zobrist import init_zobrist, compute_hash, move_hash
+from search_trace import TT_HIT, LEAF, PROBCUT, CUTOFF, BATCHED
 from time import time
 from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor
 
 # Constants
 BOARD_SIZE = 8
 PLAYER1 = 1
 PLAYER2 = 2
 EMPTY = 0
+CORNER_MASK = 0x8100000000000081
 
-# Initialize Zobrist table for hashing
-def init_zobrist():
-    zobrist_keys = {}
-    pieces = [PLAYER1, PLAYER2]  # Define piece types
-    for row in range(BOARD_SIZE):
-        for col in range(BOARD_SIZE):
-            zobrist_keys[(row, col)] = {piece: random.getrandbits(64) for piece in pieces}
-    return zobrist_keys
-
-# Zobrist hashing for a board
-def compute_hash(board, zobrist_keys):
-    if not isinstance(board, list) or not all(isinstance(row, list) for row in board):
-        raise ValueError(f"Invalid board structure: {board}")
-    h = 0
-    for row in range(BOARD_SIZE):
-        for col in range(BOARD_SIZE):
-            piece = board[row][col]
-            if piece != EMPTY:
-                h ^= zobrist_keys[(row, col)][piece]
-    return h
+# Evaluation weights fitted by tuner.py, loaded at startup when the file exists
+WEIGHTS_FILE = os.environ.get('REVERSI_WEIGHTS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights.json'))
+
+def load_weights(path=WEIGHTS_FILE):
+    """ Reads tuned weights as (granularity, table), or None when no weights file exists. """
+    if not os.path.exists(path):
+        return None
+    import json
+    with open(path) as f:
+        data = json.load(f)
+    if data['granularity'] == 'empties':
+        return 'empties', {int(empties): weights for empties, weights in data['weights'].items()}
+    return 'phase', data['weights']
+
+# Weights and ProbCut parameters exported by shared_tables.py, mapped instead of reading the JSON files
+TABLES_FILE = os.environ.get('REVERSI_TABLES')
+
+# The weights and ProbCut parameters are read on first use, so importing the engine
+# does no work and pool workers given shared tables never parse the JSON files
+NOT_LOADED = object()
+tuned_weights = NOT_LOADED
 
 # Transposition table
 transposition_table = {}
 
+# Optional wall-clock deadline and node budget for the current search, checked at every node
+search_deadline = None
+search_node_limit = None
+search_nodes = 0
+
+# Statistics of the last root search: nodes visited, deepest completed depth and time taken
+last_search_stats = {'nodes': 0, 'depth': 0, 'elapsed': 0.0}
+
+# Optional search_trace.SearchTracer recording every minimax node
+search_tracer = None
+
+# Optional profiling.MoveProfiler capturing a profile of every find_best_move and find_best_move_original call
+move_profiler = None
+if os.environ.get('REVERSI_PROFILE'):
+    from profiling import from_environment
+    move_profiler = from_environment()
+
+class SearchAborted(Exception):
+    """ Raised inside minimax when the current search runs out of its budget. """
+    pass
+
+class SearchTimeout(SearchAborted):
+    """ Raised inside minimax when the current search runs past search_deadline. """
+    pass
+
+class NodeLimitReached(SearchAborted):
+    """ Raised inside minimax when the current search visits more than search_node_limit nodes. """
+    pass
+
+def start_search(time_limit=None, max_nodes=None, selective=None):
+    """ Sets the budget and selective settings of a root search and resets its node count. """
+    global search_deadline, search_node_limit, search_nodes, search_options
+    search_deadline = time() + time_limit if time_limit is not None else None
+    search_node_limit = max_nodes
+    search_nodes = 0
+    search_options = resolve_selective(selective)
+    for counter in lazy_eval_stats:
+        lazy_eval_stats[counter] = 0
+    if search_tracer is not None:
+        search_tracer.begin_search()
+    return time()
+
+def cancel_search():
+    """ Makes the running search stop at its next node, as if its time limit had passed. """
+    global search_deadline
+    search_deadline = 0.0
+
+def end_search(start, depth):
+    """ Clears the search budget and records the statistics of the finished search. """
+    global search_deadline, search_node_limit, search_options
+    search_deadline = None
+    search_node_limit = None
+    search_options = None
+    last_search_stats.update(nodes=search_nodes, depth=depth, elapsed=time() - start)
+    memory_governor.check()
+
+# Transposition table entries are (depth, flag, value, best_move, selective); the flag tells
+# whether value is exact or only a lower/upper bound from an alpha-beta cutoff, and
+# selective marks values found with ProbCut or late-move reductions, which full-width
+# searches must not trust
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+
+# Selective search settings per difficulty. probcut_threshold is the number of
+# standard deviations a shallow search must clear to prune (None disables
+# ProbCut); late-move reductions search every move after the first
+# lmr_full_moves with lmr_reduction less depth and re-search on fail-high.
+SELECTIVE_SETTINGS = {
+    'easy': {'probcut_threshold': None, 'lmr_full_moves': 4, 'lmr_reduction': 1},
+    'medium': {'probcut_threshold': 1.5, 'lmr_full_moves': 3, 'lmr_reduction': 1},
+    'hard': {'probcut_threshold': 1.0, 'lmr_full_moves': 2, 'lmr_reduction': 2},
+}
+PROBCUT_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+
+# Selective settings of the current search (None for full-width alpha-beta)
+search_options = None
+
+# Multi-ProbCut regression parameters: deep depth -> [(shallow depth, a, b, sigma)],
+# predicting the deep score as a * shallow score + b with residual deviation sigma.
+# Calibrated with probcut.py; a probcut.json file next to this module overrides them.
+PROBCUT_FILE = os.environ.get('REVERSI_PROBCUT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'probcut.json'))
+DEFAULT_PROBCUT_PARAMS = {
+    3: [(1, 0.956, 0.73, 2.67)],
+    4: [(2, 0.963, 0.61, 2.91)],
+    5: [(1, 0.902, 1.84, 5.40), (3, 1.011, 0.68, 3.55)],
+    6: [(2, 0.861, 1.48, 5.35), (4, 0.996, 0.81, 3.03)],
+}
+
+def load_probcut_params(path=PROBCUT_FILE):
+    """ Reads calibrated ProbCut parameters, falling back to DEFAULT_PROBCUT_PARAMS. """
+    if not os.path.exists(path):
+        return DEFAULT_PROBCUT_PARAMS
+    import json
+    with open(path) as f:
+        data = json.load(f)
+    params = {}
+    for pair in data['pairs']:
+        params.setdefault(pair['depth'], []).append((pair['shallow'], pair['a'], pair['b'], pair['sigma']))
+    return {depth: sorted(checks) for depth, checks in params.items()}
+
+probcut_params = NOT_LOADED
+
+# Tables installed by install_tables, e.g. views of a shared mapping. The search reads
+# the weights and ProbCut parameters straight from these arrays while they are set.
+installed_tables = None
+weight_rows = None  # (granularity, {bucket: row of installed_tables['weights']})
+
+def load_tables():
+    """ Reads the weights and ProbCut parameters: from REVERSI_TABLES if set, else the JSON files. """
+    global tuned_weights, probcut_params
+    if TABLES_FILE:
+        from shared_tables import map_tables
+        install_tables(map_tables(TABLES_FILE))
+        return
+    if tuned_weights is NOT_LOADED:
+        tuned_weights = load_weights()
+    if probcut_params is NOT_LOADED:
+        probcut_params = load_probcut_params()
+
+WEIGHT_FEATURES = ('mobility', 'potential_mobility', 'parity', 'stability', 'corners', 'edges', 'disc_difference')
+PHASES = ('early', 'mid', 'end')
+
+def engine_tables():
+    """ The tuned weights and ProbCut parameters as NumPy arrays, for shared_tables. """
+    if installed_tables is not None:
+        return dict(installed_tables)
+    if tuned_weights is NOT_LOADED or probcut_params is NOT_LOADED:
+        load_tables()
+        if installed_tables is not None:
+            return dict(installed_tables)
+    import numpy as np
+    tables = {'probcut': np.array([(depth, shallow, a, b, sigma) for depth, checks in sorted(probcut_params.items())
+                                   for shallow, a, b, sigma in checks], dtype=np.float64).reshape(-1, 5)}
+    if tuned_weights is not None:
+        granularity, table = tuned_weights
+        buckets = list(table)
+        tables['weight_granularity'] = np.array(granularity == 'empties', dtype=np.uint8)
+        tables['weight_buckets'] = np.array([bucket if granularity == 'empties' else PHASES.index(bucket) for bucket in buckets], dtype=np.int64)
+        tables['weights'] = np.array([[table[bucket][name] for name in WEIGHT_FEATURES] for bucket in buckets], dtype=np.float64)
+    return tables
+
+def install_tables(tables):
+    """ Evaluates and prunes with engine_tables() arrays, e.g. views of a shared mapping, which are not copied. """
+    global installed_tables, weight_rows, tuned_weights, probcut_params
+    weight_rows = None
+    if 'weights' in tables:
+        granularity = 'empties' if tables['weight_granularity'] else 'phase'
+        buckets = tables['weight_buckets'].tolist()
+        weight_rows = (granularity, {bucket if granularity == 'empties' else PHASES[bucket]: row for row, bucket in enumerate(buckets)})
+    installed_tables = tables
+    tuned_weights, probcut_params = None, None
+    # Scores cached with the previous weights or pruning must not outlive them
+    clear_eval_cache()
+    transposition_table.clear()
+
+def probcut_checks(depth):
+    """ ProbCut checks for a search depth, shifting the deepest calibrated pairs for larger depths. """
+    if installed_tables is not None:
+        # Rows of (depth, shallow depth, a, b, sigma)
+        table = installed_tables['probcut']
+        depths = table[:, 0]
+        calibrated = depths[depths <= depth]
+        if not len(calibrated):
+            return []
+        deepest = int(calibrated.max())
+        return [(int(shallow) + depth - deepest, a, b, sigma) for _, shallow, a, b, sigma in table[depths == deepest].tolist()]
+    if probcut_params is NOT_LOADED:
+        load_tables()
+        return probcut_checks(depth)
+    if depth in probcut_params:
+        return probcut_params[depth]
+    calibrated = [d for d in probcut_params if d < depth]
+    if not calibrated:
+        return []
+    deepest = max(calibrated)
+    return [(shallow + depth - deepest, a, b, sigma) for shallow, a, b, sigma in probcut_params[deepest]]
+
+def resolve_selective(selective):
+    """ Accepts a difficulty name, a settings dict or None. """
+    if isinstance(selective, str):
+        return SELECTIVE_SETTINGS[selective.lower()]
+    return selective
+
 
 opening_book = {
     ((0, 0), (0, 7), (7, 0), (7, 7)): [(2, 4), (3, 5), (4, 2), (5, 3)],
 }
 
-def score_move_for_ordering(board, move, player, zobrist_keys, current_hash):
-    temp_board = [row[:] for row in board]
-    new_board, updated_hash = make_move(temp_board, move[0], move[1], player, zobrist_keys, current_hash)
-    corner_positions = [(0, 0), (0, 7), (7, 0), (7, 7)]
+def score_move_for_ordering(board, move, player, zobrist_keys=None, current_hash=None):
+    size = len(board)
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    square = move[0] * size + move[1]
+    return ordering_score(own, opp, square, flips_mask(own, opp, square, size), size)
+
+def ordering_score(own, opp, square, flips, size=8):
+    """ Move-ordering heuristic computed on bitboards: corners first, edges next, low opponent mobility. """
+    geometry = board_geometry(size)
+    new_own = own | (1 << square) | flips
+    new_opp = opp & ~flips
     score = 0
-    if move in corner_positions:
+    if (1 << square) & geometry.corners:
         score += 100
-    if any(new_board[0][i] == player or new_board[7][i] == player for i in range(8)):
+    if new_own & geometry.edge_rows:
         score += 30
-    opponent_mobility = len(valid_moves(new_board, 3 - player))
-    score -= opponent_mobility
+    score -= legal_moves_mask(new_opp, new_own, size).bit_count()
     return score
 
+def order_moves(board, player):
+    """ Legal moves sorted best-first for search, using one flip oracle call and no board copies. """
+    size = len(board)
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    flips = moves_with_flips(board, player)
+    return sorted(flips, key=lambda move: ordering_score(own, opp, move[0] * size + move[1], flips[move][1], size), reverse=True)
+
 
 def convert_board(board):
     """ Helper function to convert a list board to a tuple board for caching purposes """
     return tuple(tuple(row) for row in board)
 
+evaluated_board_sizes = set()  # Board sizes of the entries in the evaluate_board cache
+
 @lru_cache(maxsize=None)
-def evaluate_board(board_tuple, player):
+def evaluate_board(board_tuple, player, current_hash=None):
     board = [list(row) for row in board_tuple]
-    game_phase = determine_game_phase(board)
-    opponent = 3 - player
-    mobility = len(valid_moves(board, player)) - len(valid_moves(board, opponent))
-    edge_control = edge_stability(board, player) - edge_stability(board, opponent)
-    stability = calculate_stability(board, player) - calculate_stability(board, opponent)
-    corners_captured = count_corners(board, player) - count_corners(board, opponent)
-    disc_difference = np.sum(np.array(board) == player) - np.sum(np.array(board) == opponent)
-    weights = adjust_weights_based_on_board(game_phase)
+    size = len(board)
+    evaluated_board_sizes.add(size)
+    geometry = board_geometry(size)
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    empty_count = size * size - (own | opp).bit_count()
+    own_mobility, opponent_mobility = move_cache.mobility(board, player, current_hash)
+    mobility = own_mobility - opponent_mobility
+    own_stable, own_edges = stability_counts(own, opp, size)
+    opp_stable, opp_edges = stability_counts(opp, own, size)
+    corners_captured = (own & geometry.corners).bit_count() - (opp & geometry.corners).bit_count()
+    disc_difference = own.bit_count() - opp.bit_count()
+    weights = adjust_weights_based_on_board(phase_for_empties(empty_count, size), empty_count)
 
     heuristic_value = (weights['mobility'] * mobility +
                        weights['potential_mobility'] * weights.get('potential_mobility', 0) +
-                       weights['parity'] * calculate_parity(board) +
-                       weights['stability'] * stability +
+                       weights['parity'] * (1 if empty_count % 2 == 0 else -1) +
+                       weights['stability'] * (own_stable - opp_stable) +
                        weights['corners'] * corners_captured +
-                       weights['edges'] * edge_control +
+                       weights['edges'] * (own_edges - opp_edges) +
                        weights['disc_difference'] * disc_difference)
     return heuristic_value
 
-def adjust_weights_based_on_board(game_phase):
+# Lazy evaluation: leaves are scored in stages, cheapest first, and a stage is
+# skipped once bounds on the remaining terms prove the score falls outside the
+# alpha-beta window. Counters are reset by every root search.
+lazy_evaluation = True
+lazy_eval_stats = {'calls': 0, 'cheap_cutoffs': 0, 'mobility_cutoffs': 0, 'full': 0}
+
+def term_range(weight, low, high):
+    """ Smallest and largest value of weight * x for low <= x <= high. """
+    return min(weight * low, weight * high), max(weight * low, weight * high)
+
+def neighbours(bits, size=8):
+    spread = 0
+    for amount, mask in board_geometry(size).directions:
+        spread |= shift_bitboard(bits, amount, mask)
+    return spread
+
+def evaluate_lazy(board, player, alpha, beta, current_hash=None):
+    """
+    Scores a leaf like evaluate_board, but stops early with a bound when it can.
+
+    Stage one computes parity, corners and disc difference from bitboards and
+    bounds the other terms: mobility by the empty squares next to the opponent's
+    discs, and stability and edge stability by the discs without an own
+    neighbour, since calculate_stability never counts a disc next to its own
+    colour. Stage two adds the exact mobility from the move cache, and stage
+    three the stability terms. A stage is skipped once the bounds put the score
+    at or below alpha or at or above beta.
+
+    Returns:
+        tuple: (value, flag) where flag is TT_EXACT, TT_UPPER (value is an upper bound)
+        or TT_LOWER (value is a lower bound).
+    """
+    lazy_eval_stats['calls'] += 1
+    size = len(board)
+    geometry = board_geometry(size)
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    empty = ~(own | opp) & geometry.full
+    empty_count = empty.bit_count()
+    weights = adjust_weights_based_on_board(phase_for_empties(empty_count, size), empty_count)
+
+    corners = geometry.corners
+    value = (weights['potential_mobility'] * weights.get('potential_mobility', 0) +
+             weights['parity'] * (1 if empty_count % 2 == 0 else -1) +
+             weights['corners'] * ((own & corners).bit_count() - (opp & corners).bit_count()) +
+             weights['disc_difference'] * (own.bit_count() - opp.bit_count()))
+    own_near, opp_near = neighbours(own, size), neighbours(opp, size)
+    own_isolated, opp_isolated = own & ~own_near, opp & ~opp_near
+    stability_low, stability_high = term_range(weights['stability'], -opp_isolated.bit_count(), own_isolated.bit_count())
+    # edge_stability visits the corners twice, once along a row and once along a column
+    edges_low, edges_high = term_range(weights['edges'],
+                                       -(opp_isolated & geometry.edges).bit_count() - (opp_isolated & corners).bit_count(),
+                                       (own_isolated & geometry.edges).bit_count() + (own_isolated & corners).bit_count())
+    mobility_low, mobility_high = term_range(weights['mobility'], -(empty & own_near).bit_count(), (empty & opp_near).bit_count())
+
+    if value + mobility_high + stability_high + edges_high <= alpha:
+        lazy_eval_stats['cheap_cutoffs'] += 1
+        return value + mobility_high + stability_high + edges_high, TT_UPPER
+    if value + mobility_low + stability_low + edges_low >= beta:
+        lazy_eval_stats['cheap_cutoffs'] += 1
+        return value + mobility_low + stability_low + edges_low, TT_LOWER
+
+    own_mobility, opponent_mobility = move_cache.mobility(board, player, current_hash)
+    value += weights['mobility'] * (own_mobility - opponent_mobility)
+    if value + stability_high + edges_high <= alpha:
+        lazy_eval_stats['mobility_cutoffs'] += 1
+        return value + stability_high + edges_high, TT_UPPER
+    if value + stability_low + edges_low >= beta:
+        lazy_eval_stats['mobility_cutoffs'] += 1
+        return value + stability_low + edges_low, TT_LOWER
+
+    lazy_eval_stats['full'] += 1
+    own_stable, own_edges = stability_counts(own, opp, size)
+    opp_stable, opp_edges = stability_counts(opp, own, size)
+    value += weights['stability'] * (own_stable - opp_stable) + weights['edges'] * (own_edges - opp_edges)
+    return value, TT_EXACT
+
+# Batched leaf evaluation: on the 8x8 board, nodes one ply above the leaves score
+# all their children with a single vectorised features.evaluate_batch call
+# instead of one evaluation per leaf. Leaves get exact scores where lazy evaluation
+# would return bounds, so with it on the search may settle on a different move
+batched_leaves = False
+
+def evaluate_children(board, player, moves, root_player):
+    """ Scores the position after each of player's moves for root_player in one batch; returns a list of floats. """
+    from features import evaluate_batch
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    children_own, children_opp = [], []
+    for row, col in moves:
+        square = row * BOARD_SIZE + col
+        flips = flips_mask(own, opp, square)
+        children_own.append(own | flips | 1 << square)
+        children_opp.append(opp & ~flips)
+    children_black, children_white = (children_own, children_opp) if player == 1 else (children_opp, children_own)
+    # Every child has one disc more, so they all share the same weights
+    empty_count = BOARD_SIZE * BOARD_SIZE - 1 - (own | opp).bit_count()
+    weights = adjust_weights_based_on_board(phase_for_empties(empty_count), empty_count)
+    return evaluate_batch(children_black, children_white, root_player, weights).tolist()
+
+def adjust_weights_based_on_board(game_phase, empty_count=None):
+    if installed_tables is not None:
+        if weight_rows is not None:
+            granularity, rows = weight_rows
+            row = rows.get(empty_count if granularity == 'empties' else game_phase)
+            if row is not None:
+                return dict(zip(WEIGHT_FEATURES, installed_tables['weights'][row].tolist()))
+        return default_weights(game_phase)
+    if tuned_weights is NOT_LOADED:
+        load_tables()
+        return adjust_weights_based_on_board(game_phase, empty_count)
+    if tuned_weights is not None:
+        granularity, table = tuned_weights
+        if granularity == 'phase' and game_phase in table:
+            return table[game_phase]
+        if granularity == 'empties' and empty_count in table:
+            return table[empty_count]
+    return default_weights(game_phase)
+
+def default_weights(game_phase):
     if game_phase == 'early':
         return {'mobility': 0.5, 'potential_mobility': 0.2, 'parity': 0.1, 'stability': 0.1, 'corners': 3, 'edges': 2, 'disc_difference': 0.1}
     elif game_phase == 'mid':
@@ -88,24 +420,22 @@ def adjust_weights_based_on_board(game_phase):
         return {'mobility': 0.1, 'potential_mobility': 0.1, 'parity': 0.5, 'stability': 0.5, 'corners': 5, 'edges': 3, 'disc_difference': 1}
 
 def determine_game_phase(board):
-    empty_count = np.sum(np.array(board) == 0)
-    if empty_count > 40:
+    empty_count = sum(row.count(0) for row in board)
+    return phase_for_empties(empty_count, len(board))
+
+def phase_for_empties(empty_count, size=8):
+    # 40 and 20 empty squares on the 8x8 board, scaled to the board area
+    if empty_count > size * size * 5 // 8:
         return 'early'
-    elif empty_count > 20:
+    elif empty_count > size * size * 5 // 16:
         return 'mid'
     else:
         return 'end'
 
 def edge_stability(board, player):
-    stable_edges = 0
-    edges = [0, 7]
-    for i in edges:
-        for j in range(8):
-            if board[i][j] == player and not can_be_flipped(board, i, j, player):
-                stable_edges += 1
-            if board[j][i] == player and not can_be_flipped(board, j, i, player):
-                stable_edges += 1
-    return stable_edges
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    return stability_counts(own, opp, len(board))[1]
 
 def calculate_potential_mobility(board, opponent):
     potential_moves = valid_moves(board, opponent)
@@ -116,28 +446,45 @@ def calculate_parity(board):
     return 1 if empty_count % 2 == 0 else -1
 
 def count_corners(board, player):
-    corners = [(0, 0), (0, 7), (7, 0), (7, 7)]
+    last = len(board) - 1
+    corners = [(0, 0), (0, last), (last, 0), (last, last)]
     return sum(1 for r, c in corners if board[r][c] == player)
 
 def calculate_stability(board, player):
-    stable_discs = 0
-    for r in range(8):
-        for c in range(8):
-            if board[r][c] == player and not can_be_flipped(board, r, c, player):
-                stable_discs += 1
-    return stable_discs
-
-def can_be_flipped(board, row, col, player):
-    opponent = 2 if player == 1 else 1
-    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-    for dr, dc in directions:
-        r, c = row + dr, col + dc
-        while 0 <= r < 8 and 0 <= c < 8 and board[r][c] == opponent:
-            r += dr
-            c += dc
-        if 0 <= r < 8 and 0 <= c < 8 and board[r][c] == player:
-            return True
-    return False
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    return stability_counts(own, opp, len(board))[0]
+
+def flippable_discs(own, opp, size=8):
+    """
+    Bitboard of the own discs that calculate_stability counts as not stable.
+
+    A disc is flippable when, in some direction, the first square after a
+    (possibly empty) run of opponent discs holds an own disc. Each direction
+    follows the runs from the own discs backwards, all discs at once.
+    """
+    flippable = 0
+    for amount, mask in board_geometry(size).directions:
+        sees_own = shift_bitboard(own, amount, mask)
+        run = sees_own & opp
+        while run:
+            run = shift_bitboard(run, amount, mask)
+            sees_own |= run
+            run &= opp
+        flippable |= sees_own
+    return own & flippable
+
+def stability_counts(own, opp, size=8):
+    """
+    Stable discs and stable edge discs of own, as counted by calculate_stability and edge_stability.
+
+    Returns:
+        tuple: (stable discs, stable edge discs), where the corners count twice
+        as edge discs, once along their row and once along their column.
+    """
+    geometry = board_geometry(size)
+    stable = own & ~flippable_discs(own, opp, size)
+    return stable.bit_count(), (stable & geometry.edges).bit_count() + (stable & geometry.corners).bit_count()
 
 def calculate_corner_adjacency(board, player):
     """
@@ -145,13 +492,14 @@ def calculate_corner_adjacency(board, player):
     """
     opponent = 3 - player
     adjacency_penalty = 0
+    last = len(board) - 1
     corner_adjacencies = [(0, 1), (1, 0), (1, 1),
-                          (0, 6), (1, 7), (1, 6),
-                          (6, 0), (7, 1), (6, 1),
-                          (7, 6), (6, 7), (6, 6)]
+                          (0, last - 1), (1, last), (1, last - 1),
+                          (last - 1, 0), (last, 1), (last - 1, 1),
+                          (last, last - 1), (last - 1, last), (last - 1, last - 1)]
     for r, c in corner_adjacencies:
         if board[r][c] == player:
-            if (r in [0, 7] and board[7-r][c] == 0) or (c in [0, 7] and board[r][7-c] == 0):
+            if (r in [0, last] and board[last-r][c] == 0) or (c in [0, last] and board[r][last-c] == 0):
                 adjacency_penalty -= 1
     return adjacency_penalty
 
@@ -160,107 +508,659 @@ def count_frontier_discs(board, player):
     Counts the number of frontier discs, which are discs adjacent to at least one empty square.
     """
     frontier = 0
+    size = len(board)
     directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-    for r in range(8):
-        for c in range(8):
+    for r in range(size):
+        for c in range(size):
             if board[r][c] == player:
                 for dr, dc in directions:
                     rr, cc = r + dr, c + dc
-                    if 0 <= rr < 8 and 0 <= cc < 8 and board[rr][cc] == 0:
+                    if 0 <= rr < size and 0 <= cc < size and board[rr][cc] == 0:
                         frontier += 1
                         break
     return frontier
 
 
+def tt_settles(entry, depth, alpha, beta):
+    """ Whether a transposition table entry gives the value of a depth-ply search in the (alpha, beta) window. """
+    entry_depth, flag, value, _, entry_selective = entry
+    return (entry_depth >= depth and (search_options is not None or not entry_selective)
+            and (flag == TT_EXACT or (flag == TT_LOWER and value >= beta) or (flag == TT_UPPER and value <= alpha)))
+
 def minimax(board, depth, alpha, beta, maximizing_player, player, zobrist_keys, current_hash):
+    global search_nodes
+    search_nodes += 1
+    if search_nodes % 256 == 0:
+        memory_governor.check()
+    if search_node_limit is not None and search_nodes > search_node_limit:
+        raise NodeLimitReached()
+    if search_deadline is not None and time() > search_deadline:
+        raise SearchTimeout()
+    tracer = search_tracer
+    if tracer is not None:
+        tracer.enter()
+
     if current_hash is None:
-        current_hash = compute_hash(board, zobrist_keys)
+        current_hash = compute_hash(board, zobrist_keys, player)
 
-    if current_hash in transposition_table:
-        return transposition_table[current_hash]
+    # The hash covers the discs, the side to move and pending passes, but not the
+    # search perspective, so that is part of the key (the side to move is redundant)
+    key = (current_hash, player, maximizing_player)
+    entry = transposition_table.get(key)
+    tt_move = None
+    if entry is not None:
+        tt_move = entry[3]
+        if tt_settles(entry, depth, alpha, beta):
+            if tracer is not None:
+                tracer.exit(current_hash, depth, maximizing_player, alpha, beta, entry[2], TT_HIT)
+            return entry[2]
 
-    if depth == 0 or not valid_moves(board, player):
-        board_tuple = convert_board(board)
-        score = evaluate_board(board_tuple, player)
-        transposition_table[current_hash] = score
+    moves = cached_moves(board, player, current_hash)
+    if depth == 0 or not moves:
+        # Leaves are always scored for the player at the root of the search
+        root_player = player if maximizing_player else 3 - player
+        if lazy_evaluation:
+            score, flag = evaluate_lazy(board, root_player, alpha, beta, current_hash)
+        else:
+            score, flag = evaluate_board(convert_board(board), root_player, current_hash), TT_EXACT
+        if entry is None or flag == TT_EXACT:
+            transposition_table[key] = (depth, flag, score, None, False)
+        if tracer is not None:
+            tracer.exit(current_hash, depth, maximizing_player, alpha, beta, score, LEAF)
         return score
 
+    options = search_options
+    if options is not None and options.get('probcut_threshold') is not None and depth >= PROBCUT_MIN_DEPTH:
+        cut = probcut(board, depth, alpha, beta, maximizing_player, player, zobrist_keys, current_hash, options['probcut_threshold'])
+        if cut is not None:
+            if tracer is not None:
+                tracer.exit(current_hash, depth, maximizing_player, alpha, beta, cut, PROBCUT, len(board))
+            return cut
+
+    if depth >= 2:
+        moves = order_node_moves(board, player, moves, tt_move)
+    reduce_late = options is not None and options.get('lmr_full_moves') is not None and depth >= LMR_MIN_DEPTH
+
+    alpha_orig, beta_orig = alpha, beta
     best_value = float('-inf') if maximizing_player else float('inf')
-    for move in valid_moves(board, player):
-        new_board, new_hash = make_move(board.copy(), move[0], move[1], player, zobrist_keys, current_hash)
-        value = minimax(new_board, depth - 1, alpha, beta, not maximizing_player, 3 - player, zobrist_keys, new_hash)
-        if maximizing_player:
-            best_value = max(best_value, value)
-            alpha = max(alpha, value)
-        else:
-            best_value = min(best_value, value)
-            beta = min(beta, value)
-        if beta <= alpha:
-            break
+    best_move = None
+    best_index = None
+    batched = depth == 1 and batched_leaves and len(board) == BOARD_SIZE
+    if batched:
+        # Every child is a leaf: score the ones the table cannot settle in one batch, then
+        # walk them like the loop below does, so nodes, table entries and cutoffs match
+        size = len(board)
+        black, white = board_to_bitboards(board)
+        own, opp = (black, white) if player == 1 else (white, black)
+        child_keys = []
+        for row, col in moves:
+            square = row * size + col
+            child_hash = move_hash(current_hash, zobrist_keys, size, square, player, flips_mask(own, opp, square, size))
+            child_keys.append((child_hash, 3 - player, not maximizing_player))
+        child_entries = [transposition_table.get(child_key) for child_key in child_keys]
+        unsettled = [move for move, child_entry in zip(moves, child_entries)
+                     if child_entry is None or not tt_settles(child_entry, 0, float('-inf'), float('inf'))]
+        scores = dict(zip(unsettled, evaluate_children(board, player, unsettled, player if maximizing_player else 3 - player))) if unsettled else {}
+        for index, (move, child_key, child_entry) in enumerate(zip(moves, child_keys, child_entries)):
+            search_nodes += 1
+            if search_node_limit is not None and search_nodes > search_node_limit:
+                raise NodeLimitReached()
+            if search_deadline is not None and time() > search_deadline:
+                raise SearchTimeout()
+            if child_entry is not None and tt_settles(child_entry, 0, alpha, beta):
+                value = child_entry[2]
+            else:
+                value = scores[move]
+                transposition_table[child_key] = (0, TT_EXACT, value, None, False)
+            if maximizing_player:
+                if value > best_value:
+                    best_value, best_move, best_index = value, move, index
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move, best_index = value, move, index
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+    else:
+        for index, move in enumerate(moves):
+            new_board, new_hash = make_move([row[:] for row in board], move[0], move[1], player, zobrist_keys, current_hash)
+            reduction = min(options['lmr_reduction'], depth - 1) if reduce_late and index >= options['lmr_full_moves'] else 0
+            value = minimax(new_board, depth - 1 - reduction, alpha, beta, not maximizing_player, 3 - player, zobrist_keys, new_hash)
+            if reduction and (value > alpha if maximizing_player else value < beta):
+                # The reduced search says this late move might be good: verify at full depth
+                value = minimax(new_board, depth - 1, alpha, beta, not maximizing_player, 3 - player, zobrist_keys, new_hash)
+            if maximizing_player:
+                if value > best_value:
+                    best_value, best_move, best_index = value, move, index
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move, best_index = value, move, index
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
 
-    transposition_table[current_hash] = best_value
+    if best_value <= alpha_orig:
+        flag = TT_UPPER
+    elif best_value >= beta_orig:
+        flag = TT_LOWER
+    else:
+        flag = TT_EXACT
+    if entry is None or depth >= entry[0]:
+        transposition_table[key] = (depth, flag, best_value, best_move, options is not None)
+    if tracer is not None:
+        cutoff = best_value >= beta_orig if maximizing_player else best_value <= alpha_orig
+        tracer.exit(current_hash, depth, maximizing_player, alpha_orig, beta_orig, best_value,
+                    (CUTOFF if cutoff else 0) | (BATCHED if batched else 0),
+                    len(board), best_move, best_index, len(moves))
     return best_value
 
-# Initialize Zobrist keys
-zobrist_keys = init_zobrist()
+def order_node_moves(board, player, moves, tt_move):
+    """ Orders interior-node moves: the transposition table move first, then by ordering_score. """
+    size = len(board)
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    def key(move):
+        if move == tt_move:
+            return float('inf')
+        square = move[0] * size + move[1]
+        return ordering_score(own, opp, square, flips_mask(own, opp, square, size), size)
+    return sorted(moves, key=key, reverse=True)
+
+def probcut(board, depth, alpha, beta, maximizing_player, player, zobrist_keys, current_hash, threshold):
+    """
+    Multi-ProbCut: predicts the deep score from shallow searches and returns a
+    bound when it falls outside the window with enough confidence, else None.
+    """
+    for shallow, a, b, sigma in probcut_checks(depth):
+        margin = threshold * sigma
+        high = (beta + margin - b) / a if beta != float('inf') else float('inf')
+        low = (alpha - margin - b) / a if alpha != float('-inf') else float('-inf')
+        if high == float('inf') and low == float('-inf'):
+            return None
+        value = minimax(board, shallow, low, high, maximizing_player, player, zobrist_keys, current_hash)
+        if value >= high:
+            return beta
+        if value <= low:
+            return alpha
+    return None
+
+# The shared Zobrist keys, sized for every supported board, are generated on the
+# first access to ai.zobrist_keys so that importing the engine does no work
+zobrist_lock = threading.Lock()
+
+def __getattr__(name):
+    if name == 'zobrist_keys':
+        with zobrist_lock:
+            if 'zobrist_keys' not in globals():
+                globals()['zobrist_keys'] = init_zobrist(size=MAX_BOARD_SIZE)
+        return globals()['zobrist_keys']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@lru_cache(maxsize=1)
+def zobrist_footprint():
+    return deep_sizeof(globals()['zobrist_keys'])
+
+def shrink_transposition_table(target_bytes):
+    """ Evicts the shallowest entries first until the table is estimated to fit in target_bytes. """
+    if not transposition_table:
+        return
+    per_entry = mapping_footprint(transposition_table) / len(transposition_table)
+    excess = len(transposition_table) - int(target_bytes / per_entry)
+    depth = 0
+    while excess > 0 and transposition_table:
+        shallow = [key for key, entry in transposition_table.items() if entry[0] <= depth]
+        for key in shallow[:excess]:
+            del transposition_table[key]
+        excess -= min(len(shallow), excess)
+        depth += 1
+    # Dicts keep their hash table after deletions; rebuilding in place releases it
+    survivors = dict(transposition_table)
+    transposition_table.clear()
+    transposition_table.update(survivors)
+
+@lru_cache(maxsize=None)
+def eval_cache_entry_bytes(size):
+    """ Size of one evaluate_board cache entry on a board size: the board tuple key, the result and the LRU bookkeeping. """
+    return deep_sizeof((convert_board([[0] * size for _ in range(size)]), PLAYER1, 1 << 63, 0.0)) + 200
+
+def eval_cache_footprint():
+    # Entries are priced at the largest board evaluated since the cache was last cleared
+    entries = evaluate_board.cache_info().currsize
+    return entries * eval_cache_entry_bytes(max(evaluated_board_sizes)) if entries else 0
+
+def clear_eval_cache(target=None):
+    evaluate_board.cache_clear()
+    evaluated_board_sizes.clear()
+
+memory_governor.register('evaluation_cache', eval_cache_footprint, clear_eval_cache, priority=0)
+memory_governor.register('transposition_table', lambda: mapping_footprint(transposition_table),
+                         shrink_transposition_table, priority=2)
+memory_governor.register('zobrist_keys', lambda: zobrist_footprint() if 'zobrist_keys' in globals() else 0)
+
+def find_best_move_original(board, player, depth, zobrist_keys, current_hash, time_limit=None, selective=None, max_nodes=None, passes=0):
+    args = (board, player, depth, zobrist_keys, current_hash, time_limit, selective, max_nodes, passes)
+    if move_profiler is not None:
+        best_move, _ = move_profiler.capture(search_position, args, board, player, 'minimax', depth, selective)
+    else:
+        best_move, _ = search_position(*args)
+    return best_move
+
+def search_position(board, player, depth, zobrist_keys, current_hash, time_limit=None, selective=None, max_nodes=None, passes=0):
+    """
+    Fixed-depth Minimax search returning (best_move, best_score), or (None, None) without moves.
 
-def find_best_move_original(board, player, depth, zobrist_keys, current_hash):
+    With a time limit or a node budget the search stops once it is spent and returns
+    the best of the root moves searched completely so far. passes counts the passes
+    that led to the position, whose keys current_hash includes.
+    """
     best_moves = []
     best_score = float('-inf')
     alpha, beta = float('-inf'), float('inf')  # Initialize alpha and beta for the entire search
 
-    moves = valid_moves(board, player)
+    # Sort moves based on some heuristic for potentially better pruning
+    moves = order_moves(board, player)
     if not moves:
-        return None  # No valid moves available
+        return None, None  # No valid moves available
 
-    # Sort moves based on some heuristic for potentially better pruning
-    moves = sorted(moves, key=lambda move: score_move_for_ordering(board, move, player, zobrist_keys, current_hash), reverse=True)
-
-    for move in moves:
-        new_board, new_hash = make_move([row[:] for row in board], move[0], move[1], player, zobrist_keys, current_hash)
-        score = minimax(new_board, depth - 1, alpha, beta, False, 3 - player, zobrist_keys, new_hash)  # False assumes minimizing for the opponent
-        
-        if score > best_score:
-            best_score = score
-            best_moves = [move]
-            alpha = max(alpha, score)  # Update alpha after finding a new best move
-            if alpha >= beta:
-                break  # Beta cut-off
-        elif score == best_score:
-            best_moves.append(move)
-
-    return best_moves[0] if best_moves else None
-
-def find_best_move(board, player, zobrist_keys, current_hash, max_depth=5):
+    start = start_search(time_limit, max_nodes, selective)
+    completed_depth = 0
+    try:
+        for move in moves:
+            new_board, new_hash = make_move([row[:] for row in board], move[0], move[1], player, zobrist_keys, current_hash, passes)
+            if search_tracer is not None:
+                search_tracer.root(move, depth, len(board), new_hash)
+            score = minimax(new_board, depth - 1, alpha, beta, False, 3 - player, zobrist_keys, new_hash)  # False assumes minimizing for the opponent
+
+            if score > best_score:
+                best_score = score
+                best_moves = [move]
+                alpha = max(alpha, score)  # Update alpha after finding a new best move
+                if alpha >= beta:
+                    break  # Beta cut-off
+            elif score == best_score:
+                best_moves.append(move)
+        completed_depth = depth
+    except SearchAborted:
+        pass
+    finally:
+        end_search(start, completed_depth)
+
+    if not best_moves:
+        return moves[0], None
+    return best_moves[0], best_score
+
+def find_best_move(board, player, zobrist_keys, current_hash, max_depth=5, time_limit=None, selective=None, max_nodes=None, passes=0):
+    args = (board, player, zobrist_keys, current_hash, max_depth, time_limit, selective, max_nodes, passes)
+    if move_profiler is not None:
+        best_move, _ = move_profiler.capture(iterative_search, args, board, player, 'iterative', max_depth, selective)
+    else:
+        best_move, _ = iterative_search(*args)
+    return best_move
+
+def iterative_search(board, player, zobrist_keys, current_hash, max_depth=5, time_limit=None, selective=None, max_nodes=None, passes=0):
+    """ Iterative deepening search returning (best_move, best_score); the score is None if no iteration finished. """
     best_move = None
     best_score = float('-inf')
 
-    for depth in range(1, max_depth + 1):
-        current_alpha, current_beta = float('-inf'), float('inf')
-        local_best_score = float('-inf')
-        local_best_move = None
+    # With a time limit or node budget, the deepest fully completed iteration decides the move
+    start = start_search(time_limit, max_nodes, selective)
+    completed_depth = 0
+    try:
+        for depth in range(1, max_depth + 1):
+            current_alpha, current_beta = float('-inf'), float('inf')
+            local_best_score = float('-inf')
+            local_best_move = None
 
-        moves = valid_moves(board, player)
-        moves = sorted(moves, key=lambda move: score_move_for_ordering(board, move, player, zobrist_keys, current_hash), reverse=True)
+            moves = order_moves(board, player)
 
-        for move in moves:
-            new_board, new_hash = make_move([row[:] for row in board], move[0], move[1], player, zobrist_keys, current_hash)
-            score = minimax(new_board, depth, current_alpha, current_beta, False, 3 - player, zobrist_keys, new_hash)
-            #print(f"Evaluating move {move} at depth {depth} with score {score}")
-
-            if score > local_best_score:
-                local_best_score = score
-                local_best_move = move
-                if current_alpha < score:
-                    current_alpha = score
-                #print(f"New best move at depth {depth}: {local_best_move} with score {local_best_score}")
-
-        if local_best_score > best_score:
-            best_score = local_best_score
-            best_move = local_best_move
-            #print(f"Updating global best move to: {best_move} with score {best_score} at depth {depth}")
-
-        if best_score == float('inf'):
+            for move in moves:
+                new_board, new_hash = make_move([row[:] for row in board], move[0], move[1], player, zobrist_keys, current_hash, passes)
+                if search_tracer is not None:
+                    search_tracer.root(move, depth, len(board), new_hash)
+                score = minimax(new_board, depth, current_alpha, current_beta, False, 3 - player, zobrist_keys, new_hash)
+                #print(f"Evaluating move {move} at depth {depth} with score {score}")
+
+                if score > local_best_score:
+                    local_best_score = score
+                    local_best_move = move
+                    if current_alpha < score:
+                        current_alpha = score
+                    #print(f"New best move at depth {depth}: {local_best_move} with score {local_best_score}")
+
+            completed_depth = depth
+            # A deeper completed iteration replaces the shallower result, even with a lower score
+            if local_best_move is not None:
+                best_score = local_best_score
+                best_move = local_best_move
+
+            if best_score == float('inf'):
+                break
+    except SearchAborted:
+        if best_move is None:
+            moves = order_moves(board, player)
+            best_move = moves[0] if moves else None
+    finally:
+        end_search(start, completed_depth)
+
+    if best_move is None:
+        return None, None
+    return best_move, best_score if completed_depth else None
+
+def principal_variation(board, player, first_move, zobrist_keys, current_hash, max_length=20, passes=0):
+    """
+    Follows the transposition table's best moves from the position after first_move.
+
+    Returns the line starting with first_move; it ends where the table has no
+    move for the position, e.g. at a leaf or a pruned node.
+    """
+    state = GameState.from_board(board, player, current_hash=current_hash, passes=passes).play(first_move, zobrist_keys)
+    line = [first_move]
+    maximizing_player = False
+    while len(line) < max_length:
+        entry = transposition_table.get((state.hash, state.player, maximizing_player))
+        if entry is None or entry[3] is None or entry[3] not in state.legal_moves():
             break
+        move = entry[3]
+        line.append(move)
+        state = state.play(move, zobrist_keys)
+        maximizing_player = not maximizing_player
+    return line
+
+def multi_pv_search(board, player, zobrist_keys, current_hash, depth, k=None, time_limit=None, selective=None, max_nodes=None, passes=0):
+    """
+    Searches every root move and returns exact scores for the best k (all moves if k is None).
+
+    Iterative deepening up to depth plies orders the root moves by their previous
+    scores. A move only gets a full window while fewer than k moves are known;
+    afterwards the k-th best score is its lower bound, so weaker moves fail low
+    cheaply. All sub-searches share the transposition table.
+
+    Returns:
+        list: (move, score, principal variation) tuples sorted by score, best first, from
+        the deepest completed iteration; empty without legal moves, and a single unscored
+        move if the budget ran out before the first iteration finished.
+    """
+    moves = order_moves(board, player)
+    if not moves:
+        return []
+    results = []
+    start = start_search(time_limit, max_nodes, selective)
+    completed_depth = 0
+    try:
+        for iteration in range(1, depth + 1):
+            scored = []
+            for move in moves:
+                bound = float('-inf')
+                if k is not None and len(scored) >= k:
+                    bound = sorted((score for _, score in scored), reverse=True)[k - 1]
+                new_board, new_hash = make_move([row[:] for row in board], move[0], move[1], player, zobrist_keys, current_hash, passes)
+                if search_tracer is not None:
+                    search_tracer.root(move, iteration, len(board), new_hash)
+                score = minimax(new_board, iteration - 1, bound, float('inf'), False, 3 - player, zobrist_keys, new_hash)
+                if score > bound:
+                    scored.append((move, score))
+            scored.sort(key=lambda item: item[1], reverse=True)
+            results = scored[:k] if k is not None else scored
+            completed_depth = iteration
+            # The next iteration searches the best moves first, which sets a tight bound early
+            ranked = [move for move, _ in scored]
+            moves = ranked + [move for move in moves if move not in ranked]
+    except SearchAborted:
+        pass
+    finally:
+        end_search(start, completed_depth)
+    if not results:
+        return [(moves[0], None, [moves[0]])]  # The budget ran out before the first iteration finished
+    return [(move, score, principal_variation(board, player, move, zobrist_keys, current_hash, max(completed_depth, 1), passes))
+            for move, score in results]
+
+
+# Monte Carlo Tree Search
+PASS_MOVE = -1
+
+class MctsEngine:
+    """
+    UCT search over a compact array-backed tree.
+
+    Nodes live in parallel arrays indexed by node number: positions as black
+    and white bitboards, the side to move, the move leading to the node, visit
+    counts and wins for the player who made that move. Children of a node are
+    stored contiguously, so a node only needs its first child and child count.
+    The subtree of the move actually played is kept between searches.
+    """
+
+    def __init__(self, exploration=1.4, playout_policy='random', max_nodes=1_000_000, seed=None):
+        self.exploration = exploration
+        self.playout_policy = playout_policy
+        self.max_nodes = max_nodes
+        self.rng = random.Random(seed)
+        self.root = None
+        self.last_playouts = 0
+        self.last_elapsed = 0.0
+        self.reused_visits = 0
+        self._lock = threading.Lock()  # Held by a search while it uses the tree
+        self._clear()
+
+    def _clear(self):
+        self.black = array('Q')
+        self.white = array('Q')
+        self.to_move = array('b')
+        self.move = array('b')
+        self.first_child = array('i')
+        self.child_count = array('h')  # -1 until the node is expanded
+        self.visits = array('i')
+        self.wins = array('d')
+        self.root = None
+
+    def _add_node(self, black, white, to_move, move):
+        self.black.append(black)
+        self.white.append(white)
+        self.to_move.append(to_move)
+        self.move.append(move)
+        self.first_child.append(0)
+        self.child_count.append(-1)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        return len(self.visits) - 1
+
+    @property
+    def node_count(self):
+        return len(self.visits)
+
+    @property
+    def footprint(self):
+        arrays = (self.black, self.white, self.to_move, self.move, self.first_child, self.child_count, self.visits, self.wins)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+    def release(self):
+        """ Drops the tree to free memory, unless a search is using it. """
+        if self._lock.acquire(blocking=False):
+            try:
+                self._clear()
+            finally:
+                self._lock.release()
+
+    @property
+    def playouts_per_second(self):
+        return self.last_playouts / self.last_elapsed if self.last_elapsed > 0 else 0.0
+
+    def _expand(self, node):
+        black, white, player = self.black[node], self.white[node], self.to_move[node]
+        own, opp = (black, white) if player == 1 else (white, black)
+        moves = legal_moves_mask(own, opp)
+        first = len(self.visits)
+        count = 0
+        if moves:
+            while moves:
+                bit = moves & -moves
+                moves ^= bit
+                square = bit.bit_length() - 1
+                flips = flips_mask(own, opp, square)
+                new_own, new_opp = own | bit | flips, opp & ~flips
+                if player == 1:
+                    self._add_node(new_own, new_opp, 2, square)
+                else:
+                    self._add_node(new_opp, new_own, 1, square)
+                count += 1
+        elif legal_moves_mask(opp, own):
+            self._add_node(black, white, 3 - player, PASS_MOVE)
+            count = 1
+        self.first_child[node] = first
+        self.child_count[node] = count
+
+    def _select_child(self, node):
+        first = self.first_child[node]
+        log_visits = log(self.visits[node] or 1)
+        best_child, best_value = first, float('-inf')
+        for child in range(first, first + self.child_count[node]):
+            visits = self.visits[child]
+            if visits == 0:
+                return child
+            value = self.wins[child] / visits + self.exploration * sqrt(log_visits / visits)
+            if value > best_value:
+                best_child, best_value = child, value
+        return best_child
+
+    def _playout(self, black, white, player):
+        """ Plays random (or corner-first) moves to the end and returns the winner (0 for a draw). """
+        rng = self.rng
+        corners_first = self.playout_policy == 'corners'
+        passes = 0
+        own, opp = (black, white) if player == 1 else (white, black)
+        while passes < 2:
+            moves = legal_moves_mask(own, opp)
+            if not moves:
+                passes += 1
+            else:
+                passes = 0
+                if corners_first and moves & CORNER_MASK:
+                    moves &= CORNER_MASK
+                count = moves.bit_count()
+                pick = rng.randrange(count)
+                for _ in range(pick):
+                    moves &= moves - 1
+                bit = moves & -moves
+                flips = flips_mask(own, opp, bit.bit_length() - 1)
+                own, opp = own | bit | flips, opp & ~flips
+            own, opp = opp, own
+            player = 3 - player
+        black_count, white_count = (own.bit_count(), opp.bit_count()) if player == 1 else (opp.bit_count(), own.bit_count())
+        return 1 if black_count > white_count else 2 if white_count > black_count else 0
+
+    def _iterate(self):
+        # Selection down to a leaf, expansion of one level, one playout, backpropagation
+        node = self.root
+        path = [node]
+        while self.child_count[node] > 0:
+            node = self._select_child(node)
+            path.append(node)
+        if self.child_count[node] == -1 and self.visits[node] > 0:
+            self._expand(node)
+            if self.child_count[node] > 0:
+                node = self.first_child[node]
+                path.append(node)
+        winner = self._playout(self.black[node], self.white[node], self.to_move[node])
+        for visited in path:
+            self.visits[visited] += 1
+            mover = 3 - self.to_move[visited]
+            if winner == mover:
+                self.wins[visited] += 1.0
+            elif winner == 0:
+                self.wins[visited] += 0.5
+
+    def _find_descendant(self, black, white, player, max_depth=2):
+        # Looks for the new position among the children and grandchildren of the old root
+        frontier = [self.root]
+        for _ in range(max_depth):
+            next_frontier = []
+            for node in frontier:
+                if self.child_count[node] <= 0:
+                    continue
+                first = self.first_child[node]
+                for child in range(first, first + self.child_count[node]):
+                    if self.black[child] == black and self.white[child] == white and self.to_move[child] == player:
+                        return child
+                    next_frontier.append(child)
+            frontier = next_frontier
+        return None
+
+    def _reroot(self, node):
+        """ Copies the subtree below node into fresh arrays, keeping children contiguous. """
+        old = (self.black, self.white, self.to_move, self.move, self.first_child, self.child_count, self.visits, self.wins)
+        black, white, to_move, move, first_child, child_count, visits, wins = old
+        self._clear()
+        self.root = self._add_node(black[node], white[node], to_move[node], move[node])
+        self.visits[0], self.wins[0] = visits[node], wins[node]
+        queue = [(node, 0)]
+        while queue:
+            old_node, new_node = queue.pop()
+            count = child_count[old_node]
+            if count <= 0:
+                self.child_count[new_node] = count
+                continue
+            first = first_child[old_node]
+            self.first_child[new_node] = len(self.visits)
+            self.child_count[new_node] = count
+            for child in range(first, first + count):
+                new_child = self._add_node(black[child], white[child], to_move[child], move[child])
+                self.visits[new_child], self.wins[new_child] = visits[child], wins[child]
+                queue.append((child, new_child))
+
+    def set_position(self, state):
+        black, white, player = state.black, state.white, state.player
+        if self.root is not None:
+            if self.black[self.root] == black and self.white[self.root] == white and self.to_move[self.root] == player:
+                return
+            node = self._find_descendant(black, white, player)
+            if node is not None:
+                self._reroot(node)
+                return
+        self._clear()
+        self.root = self._add_node(black, white, player, PASS_MOVE)
+
+    def search(self, board, player, playouts=None, time_limit=None):
+        """ Runs playouts from the position until the playout or time budget is spent and returns the best move. """
+        return self.search_state(GameState.from_board(board, player), playouts, time_limit)
+
+    def search_state(self, state, playouts=None, time_limit=None):
+        """ search() for a GameState. """
+        if state.size != BOARD_SIZE:
+            raise ValueError("MCTS stores 64-bit bitboards and only supports the 8x8 board")
+        if playouts is None and time_limit is None:
+            playouts = 10000
+        # The governor may release the tree from another thread, but never while a search holds the lock
+        with self._lock:
+            self.set_position(state)
+            self.reused_visits = self.visits[self.root]
+            if self.child_count[self.root] == -1:
+                self._expand(self.root)
+            if self.child_count[self.root] == 0 or self.move[self.first_child[self.root]] == PASS_MOVE:
+                return None
+
+            start = time()
+            deadline = start + time_limit if time_limit is not None else None
+            done = 0
+            while playouts is None or done < playouts:
+                if deadline is not None and done % 16 == 0 and time() > deadline:
+                    break
+                if self.node_count >= self.max_nodes:
+                    break
+                self._iterate()
+                done += 1
+            self.last_playouts = done
+            self.last_elapsed = time() - start
+
+            # The most visited move is the most reliable choice
+            first = self.first_child[self.root]
+            best = max(range(first, first + self.child_count[self.root]), key=lambda child: self.visits[child])
+            square = self.move[best]
+        memory_governor.check()
+        return (square // 8, square % 8)
+
+mcts_engine = MctsEngine()
+memory_governor.register('mcts_tree', lambda: mcts_engine.footprint, lambda target: mcts_engine.release(), priority=3)
 
-    return best_move if best_move else None
+def find_mcts_move(board, player, playouts=None, time_limit=2.0):
+    return mcts_engine.search(board, player, playouts, time_limit)
@@ -0,0 +1,196 @@
+"""
+Batch position analysis from the command line.
+
+Reads one position per line, either as a move sequence from the initial
+position ("f5d6c3") or as a 64-character board string in row-major order
+(X/B/* for Black, O/W for White, -/. for empty) followed by the side to move
+("X" or "O"; Black if omitted). Anything after a ';' is ignored. Positions are
+analysed by a process pool and one JSON object per position is written as soon
+as its analysis finishes, so output order follows completion, not input; the
+"id" field is the input line number.
+
+Workers keep the engine's transposition table and evaluation cache between
+positions, which pays off for positions from the same game or test suite.
+
+Run with:
+    python analyze.py positions.txt --engine iterative --depth 6 --workers 4 > analysis.jsonl
+    python gamedb.py export - --db games_db | python analyze.py --engine minimax --depth 4
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from game_logic import initialize_board, valid_moves
+from gamedb import parse_transcript, replay, square_name
+from memory_budget import memory_governor, parse_size
+from shared_tables import share_engine_tables, install_engine_tables
+
+ENGINES = ('minimax', 'iterative')
+
+BOARD_SYMBOLS = {'x': 1, 'b': 1, '*': 1, 'o': 2, 'w': 2, '-': 0, '.': 0}
+SIDE_SYMBOLS = {'x': 1, 'b': 1, 'black': 1, 'o': 2, 'w': 2, 'white': 2}
+
+# Memory budget of one worker's caches unless REVERSI_MEMORY_LIMIT sets one
+DEFAULT_WORKER_MEMORY = '1G'
+
+
+def parse_position(text):
+    """
+    Parses a board string or a move sequence into (board, side to move).
+
+    Raises:
+        ValueError: If the line is neither a valid board nor a legal move sequence.
+    """
+    fields = text.split(';')[0].split()
+    if not fields:
+        raise ValueError("Empty position")
+    if len(fields[0]) == 64 and all(ch in BOARD_SYMBOLS for ch in fields[0].lower()):
+        cells = [BOARD_SYMBOLS[ch] for ch in fields[0].lower()]
+        board = [cells[row * 8:row * 8 + 8] for row in range(8)]
+        player = 1
+        if len(fields) > 1:
+            if fields[1].lower() not in SIDE_SYMBOLS:
+                raise ValueError(f"Unknown side to move {fields[1]!r}")
+            player = SIDE_SYMBOLS[fields[1].lower()]
+        return board, player
+    if fields[0] in ('-', 'start'):
+        return initialize_board(), 1
+    _, board, player = replay(parse_transcript(''.join(fields)))
+    return board, player
+
+
+def analyse_position(board, player, engine='iterative', depth=5, time_limit=None, selective=None, max_nodes=None, multipv=None):
+    """
+    Searches one position in the current process.
+
+    Returns:
+        dict: best move, score for the side to move, completed depth, nodes, time and
+        principal variation; move is None when the side to move has to pass. With multipv,
+        'lines' also lists the move, score and variation of the best multipv root moves
+        (0 for all of them).
+    """
+    import ai
+    side = 'black' if player == 1 else 'white'
+    if not valid_moves(board, player):
+        return {'side': side, 'move': None, 'score': None, 'depth': 0, 'nodes': 0, 'time': 0.0, 'pv': []}
+    current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+    if multipv is not None:
+        lines = ai.multi_pv_search(board, player, ai.zobrist_keys, current_hash, depth, multipv or None,
+                                   time_limit=time_limit, selective=selective, max_nodes=max_nodes)
+        stats = dict(ai.last_search_stats)
+        lines = [{'move': square_name(move), 'score': None if score is None else round(float(score), 4), 'pv': [square_name(step) for step in pv]}
+                 for move, score, pv in lines]
+        return {'side': side, 'move': lines[0]['move'], 'score': lines[0]['score'], 'depth': stats['depth'],
+                'nodes': stats['nodes'], 'time': round(stats['elapsed'], 4), 'pv': lines[0]['pv'], 'lines': lines}
+    if engine == 'iterative':
+        move, score = ai.iterative_search(board, player, ai.zobrist_keys, current_hash, max_depth=depth,
+                                          time_limit=time_limit, selective=selective, max_nodes=max_nodes)
+    else:
+        move, score = ai.search_position(board, player, depth, ai.zobrist_keys, current_hash,
+                                         time_limit=time_limit, selective=selective, max_nodes=max_nodes)
+    stats = dict(ai.last_search_stats)
+    pv = ai.principal_variation(board, player, move, ai.zobrist_keys, current_hash, max_length=max(stats['depth'], 1))
+    return {'side': side, 'move': square_name(move), 'score': None if score is None else round(float(score), 4),
+            'depth': stats['depth'], 'nodes': stats['nodes'], 'time': round(stats['elapsed'], 4),
+            'pv': [square_name(step) for step in pv]}
+
+
+def _init_worker(memory_limit, tables):
+    if memory_limit is not None:
+        memory_governor.limit = memory_limit
+    install_engine_tables(tables)
+
+
+def _analyse_job(job):
+    line_id, text, board, player, options = job
+    result = {'id': line_id, 'input': text}
+    result.update(analyse_position(board, player, **options))
+    return result
+
+
+def read_jobs(lines, options):
+    """ Yields (job, None) for every parsable line and (None, error record) for the rest. """
+    for line_id, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text.startswith('#'):
+            continue
+        try:
+            board, player = parse_position(text)
+        except ValueError as error:
+            yield None, {'id': line_id, 'input': text, 'error': str(error)}
+            continue
+        yield (line_id, text, board, player, options), None
+
+
+def analyse_stream(lines, options, workers=None, out=sys.stdout, memory_limit=None):
+    """
+    Analyses the positions of an iterable of lines and writes JSONL results as they finish.
+
+    At most twice the number of workers positions are in flight, so the input is
+    read lazily and arbitrarily long inputs use bounded memory. memory_limit (bytes)
+    caps the caches of every worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    written = 0
+    tables = share_engine_tables()  # Weights and ProbCut parameters, mapped by every worker instead of copied
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(memory_limit, tables.name)) as executor:
+            pending, jobs = set(), {}
+            for job, error in read_jobs(lines, options):
+                if error is not None:
+                    out.write(json.dumps(error) + '\n')
+                    written += 1
+                    continue
+                future = executor.submit(_analyse_job, job)
+                pending.add(future)
+                jobs[future] = job
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    written += _write_results(done, jobs, out)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                written += _write_results(done, jobs, out)
+    finally:
+        tables.unlink()
+    return written
+
+
+def _write_results(futures, jobs, out):
+    """ Writes finished analyses; a position whose analysis raised gets an error record, like unparsable input. """
+    for future in futures:
+        line_id, text = jobs.pop(future)[:2]
+        try:
+            result = future.result()
+        except Exception as error:
+            result = {'id': line_id, 'input': text, 'error': f"{type(error).__name__}: {error}"}
+        out.write(json.dumps(result) + '\n')
+    out.flush()
+    return len(futures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse Reversi positions in parallel and stream JSONL results.")
+    parser.add_argument('file', nargs='?', default='-', help="Input file, one position per line ('-' for stdin)")
+    parser.add_argument('--engine', choices=ENGINES, default='iterative')
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--time', type=float, default=None, help="Time limit per position in seconds")
+    parser.add_argument('--nodes', type=int, default=None, help="Node budget per position")
+    parser.add_argument('--selective', choices=['easy', 'medium', 'hard'], default=None)
+    parser.add_argument('--multipv', type=int, default=None, help="Report the best N root moves (0 for all)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--memory', default=None, help="Cache memory budget per worker, e.g. 512M (default: "
+                        f"REVERSI_MEMORY_LIMIT or {DEFAULT_WORKER_MEMORY})")
+    args = parser.parse_args()
+
+    options = {'engine': args.engine, 'depth': args.depth, 'time_limit': args.time,
+               'selective': args.selective, 'max_nodes': args.nodes, 'multipv': args.multipv}
+    source = sys.stdin if args.file == '-' else open(args.file)
+    with source:
+        memory = args.memory or os.environ.get('REVERSI_MEMORY_LIMIT') or DEFAULT_WORKER_MEMORY
+        analyse_stream(source, options, args.workers, memory_limit=parse_size(memory))
+
+
+if __name__ == '__main__':
+    main()
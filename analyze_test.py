@@ -0,0 +1,42 @@
+import io
+import json
+import unittest
+from analyze import parse_position, analyse_position, analyse_stream
+from game_logic import initialize_board
+
+class TestAnalyze(unittest.TestCase):
+    def test_board_string_and_moves_agree(self):
+        board, player = parse_position('f5')
+        text = ''.join('-XO'[cell] for row in board for cell in row)
+        self.assertEqual(parse_position(f"{text} O ; after f5"), (board, player))
+        self.assertEqual(parse_position('start'), (initialize_board(), 1))
+        self.assertRaises(ValueError, parse_position, 'f5f5')
+
+    def test_pv_starts_with_best_move(self):
+        board, player = parse_position('f5d6c3')
+        for engine in ('minimax', 'iterative'):
+            result = analyse_position(board, player, engine=engine, depth=3)
+            self.assertEqual(result['pv'][0], result['move'])
+            self.assertGreater(result['nodes'], 0)
+            self.assertEqual(result['depth'], 3)
+
+    def test_stream_reports_every_line(self):
+        out = io.StringIO()
+        analyse_stream(['f5', 'oops', 'f5d6'], {'engine': 'minimax', 'depth': 2}, workers=1, out=out)
+        results = {record['id']: record for record in map(json.loads, out.getvalue().splitlines())}
+        self.assertEqual(sorted(results), [1, 2, 3])
+        self.assertIn('error', results[2])
+        self.assertIn(results[1]['move'], ('d6', 'f6', 'f4'))
+
+    def test_failed_analysis_is_reported_and_the_stream_goes_on(self):
+        out = io.StringIO()
+        # The unknown selective setting fails every search; the game-over position needs none
+        analyse_stream(['f5', 'X' * 64 + ' O', 'f5d6'], {'engine': 'minimax', 'depth': 2, 'selective': 'bogus'}, workers=1, out=out)
+        results = {record['id']: record for record in map(json.loads, out.getvalue().splitlines())}
+        self.assertEqual(sorted(results), [1, 2, 3])
+        self.assertIn('KeyError', results[1]['error'])
+        self.assertEqual(results[3]['input'], 'f5d6')
+        self.assertIsNone(results[2]['move'])
+
+if __name__ == '__main__':
+    unittest.main()
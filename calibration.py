@@ -0,0 +1,151 @@
+"""
+Maps difficulty levels to search settings measured on the current host.
+
+A short benchmark searches a fixed set of positions with the real engine,
+measuring nodes per second and the effective branching factor. From these,
+each difficulty gets the search depths, node budget and time limit that keep
+its moves close to a target response time. Results are cached per host, so
+later starts skip the benchmark.
+
+Run with:
+    python calibration.py            # show the cached (or freshly measured) settings
+    python calibration.py --force    # re-measure
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+# Target response time of one AI move per difficulty, in seconds
+TARGET_TIMES = {'easy': 1.0, 'medium': 2.5, 'hard': 5.0}
+
+# Hard-coded settings used when calibration is disabled
+FALLBACK_SETTINGS = {
+    'easy': {'depth_original': 5, 'depth_iterative': 8, 'max_nodes': 15000, 'time_limit': 2.0},
+    'medium': {'depth_original': 6, 'depth_iterative': 11, 'max_nodes': 40000, 'time_limit': 5.0},
+    'hard': {'depth_original': 6, 'depth_iterative': 15, 'max_nodes': 80000, 'time_limit': 10.0},
+}
+
+BENCHMARK_POSITIONS = 6
+BENCHMARK_DEPTHS = (2, 3, 4)
+DEPTH_RANGE_ORIGINAL = (2, 8)
+DEPTH_RANGE_ITERATIVE = (3, 15)
+TIME_LIMIT_MARGIN = 1.5  # Time limits leave room above the target for unusually wide positions
+CACHE_MAX_AGE = 7 * 24 * 3600
+CACHE_VERSION = 1
+
+CACHE_FILE = os.environ.get('REVERSI_CALIBRATION_FILE',
+                            os.path.join(os.path.expanduser('~'), '.cache', 'reversi', 'calibration.json'))
+
+
+def host_fingerprint():
+    """ Identifies the host and interpreter the measurements are valid for. """
+    return {'node': platform.node(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'python': sys.version.split()[0], 'version': CACHE_VERSION}
+
+
+def measure(positions=BENCHMARK_POSITIONS, depths=BENCHMARK_DEPTHS):
+    """
+    Searches a fixed position set at increasing depths with the existing engine.
+
+    Returns:
+        dict: nodes per second and the node count at every depth, summed over the positions.
+    """
+    import ai
+    from probcut import random_positions
+    boards = random_positions(positions, seed=2024)
+    nodes = {depth: 0 for depth in depths}
+    total_nodes, total_time = 0, 0.0
+    for board, player in boards:
+        current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+        for depth in depths:
+            ai.transposition_table.clear()
+            ai.search_position(board, player, depth, ai.zobrist_keys, current_hash)
+            nodes[depth] += ai.last_search_stats['nodes']
+            total_nodes += ai.last_search_stats['nodes']
+            total_time += ai.last_search_stats['elapsed']
+    ai.transposition_table.clear()
+    return {'nodes_per_second': total_nodes / max(total_time, 1e-9),
+            'nodes': {str(depth): count / len(boards) for depth, count in nodes.items()}}
+
+
+def derive_settings(measurement, target_times=TARGET_TIMES):
+    """ Turns a measurement into per-difficulty depth, node and time settings. """
+    nps = measurement['nodes_per_second']
+    nodes = {int(depth): count for depth, count in measurement['nodes'].items()}
+    depths = sorted(nodes)
+    # nodes(depth) ~ scale * ebf ** depth, fitted through the shallowest and deepest measurement
+    ebf = max((nodes[depths[-1]] / max(nodes[depths[0]], 1)) ** (1 / (depths[-1] - depths[0])), 1.5)
+    scale = nodes[depths[-1]] / ebf ** depths[-1]
+    settings = {}
+    for level, target in target_times.items():
+        budget = nps * target
+        depth = int(math.log(max(budget / scale, 1)) / math.log(ebf))
+        # Iterative deepening pays for every shallower iteration too, and its
+        # iteration at max_depth searches max_depth + 1 plies
+        iterative_depth = int(math.log(max(budget * (ebf - 1) / (ebf * scale), 1)) / math.log(ebf)) - 1
+        settings[level] = {
+            'depth_original': min(max(depth, DEPTH_RANGE_ORIGINAL[0]), DEPTH_RANGE_ORIGINAL[1]),
+            'depth_iterative': min(max(iterative_depth, DEPTH_RANGE_ITERATIVE[0]), DEPTH_RANGE_ITERATIVE[1]),
+            'max_nodes': int(budget),
+            'time_limit': round(target * TIME_LIMIT_MARGIN, 2),
+        }
+    return settings
+
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('host') != host_fingerprint() or time.time() - cached.get('created', 0) > CACHE_MAX_AGE:
+        return None
+    return cached
+
+
+def save_cache(measurement, settings, path=CACHE_FILE):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'host': host_fingerprint(), 'created': time.time(),
+                       'measurement': measurement, 'settings': settings}, f, indent=2)
+    except OSError:
+        pass  # A read-only home directory only costs a re-measurement next time
+
+
+def get_difficulty_settings(force=False, path=CACHE_FILE, benchmark=None):
+    """
+    Per-difficulty search settings for this host, measured once and then read from the cache.
+
+    Set REVERSI_CALIBRATION=off to use FALLBACK_SETTINGS without measuring.
+    benchmark replaces measure(), e.g. with fixed numbers in tests.
+    """
+    if os.environ.get('REVERSI_CALIBRATION', '').lower() == 'off':
+        return FALLBACK_SETTINGS
+    if not force:
+        cached = load_cache(path)
+        if cached is not None:
+            return cached['settings']
+    measurement = (benchmark or measure)()
+    settings = derive_settings(measurement)
+    save_cache(measurement, settings, path)
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate difficulty levels to this host's engine speed.")
+    parser.add_argument('--force', action='store_true', help="Re-measure even if a cached calibration exists")
+    args = parser.parse_args()
+    start = time.time()
+    settings = get_difficulty_settings(force=args.force)
+    print(f"Calibration ready in {time.time() - start:.2f}s")
+    for level, values in settings.items():
+        print(f"{level:>6}: {values}")
+
+
+if __name__ == '__main__':
+    main()
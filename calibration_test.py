@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from calibration import derive_settings, get_difficulty_settings, load_cache
+
+class TestCalibration(unittest.TestCase):
+    def test_faster_hosts_search_deeper(self):
+        nodes = {'2': 30, '3': 170, '4': 750}
+        slow = derive_settings({'nodes_per_second': 2000, 'nodes': nodes})
+        fast = derive_settings({'nodes_per_second': 200000, 'nodes': nodes})
+        for level in ('easy', 'medium', 'hard'):
+            self.assertGreater(fast[level]['max_nodes'], slow[level]['max_nodes'])
+            self.assertGreater(fast[level]['depth_original'], slow[level]['depth_original'])
+        self.assertLessEqual(slow['easy']['depth_original'], slow['hard']['depth_original'])
+
+    def test_settings_are_cached(self):
+        # A fixed measurement, so the result does not depend on the speed of the test host
+        measurement = {'nodes_per_second': 20000, 'nodes': {'2': 30, '3': 170, '4': 750}}
+        measurements = []
+        def benchmark():
+            measurements.append(measurement)
+            return measurement
+        with tempfile.TemporaryDirectory() as cache_dir, mock.patch.dict(os.environ, {'REVERSI_CALIBRATION': 'on'}):
+            path = os.path.join(cache_dir, 'calibration.json')
+            settings = get_difficulty_settings(path=path, benchmark=benchmark)
+            self.assertEqual(settings, derive_settings(measurement))
+            self.assertIsNotNone(load_cache(path))
+            self.assertEqual(get_difficulty_settings(path=path, benchmark=benchmark), settings)
+            self.assertEqual(len(measurements), 1)
+            get_difficulty_settings(force=True, path=path, benchmark=benchmark)
+            self.assertEqual(len(measurements), 2)
+
+if __name__ == '__main__':
+    unittest.main()
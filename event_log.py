@@ -0,0 +1,156 @@
+"""
+Structured event log kept in an in-memory ring buffer.
+
+Code on the move path records events (a name plus keyword fields) with
+event_log.info(...) and similar calls, which only append a tuple to a bounded
+deque: nothing is formatted or written on the caller's thread, so a slow
+console never stalls the GUI or a search. Events below the log level are
+dropped at the call. The level comes from REVERSI_LOG_LEVEL (debug, info,
+warning or error; info by default).
+
+stream_to() starts a background thread that formats new events and writes
+them to a stream every FLUSH_INTERVAL seconds; events that the ring buffer
+overwrote before a flush are reported as skipped. dump() writes the buffered
+events as JSON lines at any time, e.g. after a bad game. Field values that are
+game states or boards are rendered as 64-character board strings (X for
+Black, O for White, - for empty), as read by analyze.py.
+"""
+import itertools
+import json
+import os
+import sys
+import threading
+from collections import deque
+from time import time, strftime, localtime
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning', ERROR: 'error'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+DEFAULT_CAPACITY = 10000
+FLUSH_INTERVAL = 0.2
+
+
+def board_text(board):
+    return ''.join('-XO'[cell] for row in board for cell in row)
+
+
+def format_value(value):
+    if hasattr(value, 'to_board'):
+        return board_text(value.to_board())
+    if isinstance(value, list) and value and isinstance(value[0], list):
+        return board_text(value)
+    if isinstance(value, float):
+        return round(value, 4)
+    return value
+
+
+class EventLog:
+    def __init__(self, capacity=DEFAULT_CAPACITY, level=INFO):
+        self.level = level
+        self._records = deque(maxlen=capacity)  # (sequence, time, level, event, fields)
+        self._sequence = itertools.count()
+        self._stream = None
+        self._stop = threading.Event()
+        self._flusher = None
+        self._written = -1  # Sequence number of the last event written to the stream
+
+    def log(self, level, event, /, **fields):
+        if level >= self.level:
+            # deque.append and next() on a counter are atomic, so any thread may log without a lock
+            self._records.append((next(self._sequence), time(), level, event, fields))
+
+    def debug(self, event, /, **fields):
+        self.log(DEBUG, event, **fields)
+
+    def info(self, event, /, **fields):
+        self.log(INFO, event, **fields)
+
+    def warning(self, event, /, **fields):
+        self.log(WARNING, event, **fields)
+
+    def error(self, event, /, **fields):
+        self.log(ERROR, event, **fields)
+
+    def records(self, level=DEBUG, event=None):
+        """ Buffered events at or above level (and named event, if given) as dicts, oldest first. """
+        return [self._as_dict(record) for record in self._records.copy()
+                if record[2] >= level and (event is None or record[3] == event)]
+
+    def clear(self):
+        self._records.clear()
+
+    def _as_dict(self, record):
+        sequence, timestamp, level, event, fields = record
+        result = {'seq': sequence, 'time': round(timestamp, 6), 'level': LEVEL_NAMES.get(level, level), 'event': event}
+        result.update((key, format_value(value)) for key, value in fields.items())
+        return result
+
+    def dump(self, out=None, level=DEBUG):
+        """
+        Writes the buffered events as JSON lines.
+
+        Args:
+            out (str or file, optional): Path or text stream; standard error by default.
+            level (int, optional): Lowest level to include.
+
+        Returns:
+            int: Number of events written.
+        """
+        records = self.records(level)
+        lines = ''.join(json.dumps(record, default=str) + '\n' for record in records)
+        if out is None or hasattr(out, 'write'):
+            out = out or sys.stderr
+            out.write(lines)
+            out.flush()
+        else:
+            with open(out, 'w') as f:
+                f.write(lines)
+        return len(records)
+
+    def format(self, record):
+        sequence, timestamp, level, event, fields = record
+        text = ' '.join(f"{key}={format_value(value)}" for key, value in fields.items())
+        return f"{strftime('%H:%M:%S', localtime(timestamp))}.{int(timestamp % 1 * 1000):03d} " \
+               f"{LEVEL_NAMES.get(level, level).upper():<7} {event} {text}".rstrip()
+
+    def flush(self):
+        """ Writes the events logged since the last flush to the stream, if streaming. """
+        stream = self._stream
+        if stream is None:
+            return
+        fresh = [record for record in self._records.copy() if record[0] > self._written]
+        if not fresh:
+            return
+        lines = []
+        if fresh[0][0] > self._written + 1:
+            lines.append(f"... {fresh[0][0] - self._written - 1} events skipped, the buffer overflowed")
+        lines.extend(self.format(record) for record in fresh)
+        self._written = fresh[-1][0]
+        stream.write('\n'.join(lines) + '\n')
+        stream.flush()
+
+    def stream_to(self, stream=None, interval=FLUSH_INTERVAL):
+        """ Writes events not streamed yet to stream (standard error by default) from a background thread. """
+        self.stop_streaming()
+        self._stream = stream or sys.stderr
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush()
+            self.flush()
+
+        self._flusher = threading.Thread(target=run, name='event-log-flusher', daemon=True)
+        self._flusher.start()
+
+    def stop_streaming(self):
+        """ Stops the background writer after a last flush. """
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+        self._stream = None
+
+
+event_log = EventLog(level=LEVELS.get(os.environ.get('REVERSI_LOG_LEVEL', 'info').lower(), INFO))
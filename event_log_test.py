@@ -0,0 +1,50 @@
+import io
+import json
+import threading
+import time
+import unittest
+from event_log import EventLog, DEBUG, INFO, WARNING
+from game_logic import GameState
+
+class TestEventLog(unittest.TestCase):
+    def test_levels_and_ring_buffer(self):
+        log = EventLog(capacity=3, level=INFO)
+        log.debug('ignored')
+        for index in range(5):
+            log.info('move', index=index)
+        log.warning('slow', seconds=1.234567)
+        records = log.records()
+        self.assertEqual([record.get('index') for record in records], [3, 4, None])
+        self.assertEqual(records[-1]['seconds'], 1.2346)
+        self.assertEqual([record['event'] for record in log.records(WARNING)], ['slow'])
+        self.assertEqual(len(log.records(event='move')), 2)
+
+    def test_dump_renders_boards(self):
+        log = EventLog(level=DEBUG)
+        log.debug('move', move=(2, 3), board=GameState.initial())
+        out = io.StringIO()
+        self.assertEqual(log.dump(out), 1)
+        record = json.loads(out.getvalue())
+        self.assertEqual(record['board'], '-' * 27 + 'OX' + '-' * 6 + 'XO' + '-' * 27)
+        self.assertEqual(record['move'], [2, 3])
+
+    def test_background_stream_reports_overflow(self):
+        log = EventLog(capacity=4, level=DEBUG)
+        out = io.StringIO()
+        log.stream_to(out, interval=60)  # Only the final flush runs
+        threads = [threading.Thread(target=lambda: [log.info('tick') for _ in range(5)]) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.stop_streaming()
+        lines = out.getvalue().splitlines()
+        self.assertIn('6 events skipped', lines[0])
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(all(' INFO    tick' in line for line in lines[1:]))
+        log.info('later')
+        time.sleep(0.01)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)  # Not streaming any more
+
+if __name__ == '__main__':
+    unittest.main()
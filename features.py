@@ -0,0 +1,128 @@
+"""
+Vectorised evaluate_board features over arrays of packed bitboards.
+
+Every function takes NumPy uint64 arrays of bitboards (bit index row * 8 + col,
+as produced by game_logic.board_to_bitboards) and works on all positions at
+once, so millions of positions are processed with a handful of array
+operations instead of one Python evaluate_board call each.
+"""
+import numpy as np
+
+FEATURE_NAMES = ('mobility', 'parity', 'stability', 'corners', 'edges', 'disc_difference')
+
+FULL = np.uint64(0xFFFFFFFFFFFFFFFF)
+NOT_A_FILE = np.uint64(0xFEFEFEFEFEFEFEFE)  # Every square except column 0
+NOT_H_FILE = np.uint64(0x7F7F7F7F7F7F7F7F)  # Every square except column 7
+CORNERS = np.uint64(0x8100000000000081)
+EDGE_ROWS = np.uint64(0xFF000000000000FF)
+EDGE_COLS = np.uint64(0x8181818181818181)
+
+# The eight directions as shift amounts and wrap-around masks, split into the four
+# that shift towards higher squares and the four that shift towards lower ones,
+# so that one array operation moves a stack of bitboard arrays in all directions
+LEFT_AMOUNTS = np.array([[1], [8], [9], [7]], dtype=np.uint64)
+LEFT_MASKS = np.array([[NOT_A_FILE], [FULL], [NOT_A_FILE], [NOT_H_FILE]], dtype=np.uint64)
+RIGHT_AMOUNTS = np.array([[1], [8], [7], [9]], dtype=np.uint64)
+RIGHT_MASKS = np.array([[NOT_H_FILE], [FULL], [NOT_A_FILE], [NOT_H_FILE]], dtype=np.uint64)
+
+_BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(x):
+    """ Number of set bits of every element of a uint64 array. """
+    x = np.asarray(x, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x).astype(np.int64)
+    return _BYTE_COUNTS[x.reshape(x.shape + (1,)).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+def shift_all(stack):
+    """
+    Shifts a stack of eight bitboard arrays (shape (8, n)) one step each, in the four
+    higher directions for stack[:4] and the four lower directions for stack[4:].
+    """
+    result = np.empty_like(stack)
+    np.left_shift(stack[:4], LEFT_AMOUNTS, out=result[:4])
+    np.right_shift(stack[4:], RIGHT_AMOUNTS, out=result[4:])
+    result[:4] &= LEFT_MASKS
+    result[4:] &= RIGHT_MASKS
+    return result
+
+
+def legal_moves(own, opp):
+    """ Bitboards of the squares where `own` may play against `opp` (1-D arrays). """
+    own, opp = np.atleast_1d(np.asarray(own, dtype=np.uint64)), np.atleast_1d(np.asarray(opp, dtype=np.uint64))
+    empty = ~(own | opp) & FULL
+    run = shift_all(np.broadcast_to(own, (8,) + own.shape)) & opp
+    for _ in range(5):
+        run |= shift_all(run) & opp
+    return np.bitwise_or.reduce(shift_all(run) & empty, axis=0)
+
+
+def flippable(own, opp):
+    """
+    Bitboards of the `own` discs that calculate_stability counts as not stable.
+
+    Mirrors ai.flippable_discs: a disc is flippable when, in some direction, the
+    first square after a (possibly empty) run of opponent discs holds an own disc.
+    All eight directions are followed at once.
+    """
+    own, opp = np.atleast_1d(np.asarray(own, dtype=np.uint64)), np.atleast_1d(np.asarray(opp, dtype=np.uint64))
+    reach = shift_all(np.broadcast_to(own, (8,) + own.shape))
+    sees_own = reach
+    for _ in range(6):
+        sees_own = reach | shift_all(opp & sees_own)
+    return own & np.bitwise_or.reduce(sees_own, axis=0)
+
+
+def extract_features(black, white, side):
+    """
+    Computes the evaluate_board features for many positions.
+
+    Args:
+        black (np.ndarray): uint64 bitboards of black discs.
+        white (np.ndarray): uint64 bitboards of white discs.
+        side (np.ndarray): Player (1 or 2) each position is evaluated for.
+
+    Returns:
+        tuple: (features, empty_counts), a float64 array of shape (n, len(FEATURE_NAMES))
+        and an int64 array with the number of empty squares of each position.
+    """
+    black = np.asarray(black, dtype=np.uint64)
+    white = np.asarray(white, dtype=np.uint64)
+    is_black = np.asarray(side) == 1
+    own = np.where(is_black, black, white)
+    opp = np.where(is_black, white, black)
+
+    # Both sides go through the move generator, the stability test and the
+    # disc counts together: the first half of each row is own, the second opp
+    count = len(own)
+    both, against = np.concatenate([own, opp]), np.concatenate([opp, own])
+    stable = both & ~flippable(both, against)
+    counts = popcount(np.stack([legal_moves(both, against), stable, stable & EDGE_ROWS, stable & EDGE_COLS,
+                                both & CORNERS, both]))
+    mobility, stability, edge_rows, edge_cols, corners, disc_difference = counts[:, :count] - counts[:, count:]
+    empty_counts = 64 - counts[5, :count] - counts[5, count:]
+    parity = np.where(empty_counts % 2 == 0, 1, -1)
+    edges = edge_rows + edge_cols
+
+    features = np.stack([mobility, parity, stability, corners, edges, disc_difference], axis=1).astype(np.float64)
+    return features, empty_counts
+
+
+def evaluate_batch(black, white, side, weights):
+    """
+    Scores many positions like ai.evaluate_board, with one set of weights for all of them.
+
+    Args:
+        black (array-like): Bitboards of black discs.
+        white (array-like): Bitboards of white discs.
+        side (int or np.ndarray): Player the positions are scored for.
+        weights (dict): Evaluation weights as returned by ai.adjust_weights_based_on_board.
+
+    Returns:
+        np.ndarray: float64 score of every position.
+    """
+    features, _ = extract_features(black, white, side)
+    vector = np.array([weights[name] for name in FEATURE_NAMES], dtype=np.float64)
+    return features @ vector + weights['potential_mobility'] * weights.get('potential_mobility', 0)
@@ -0,0 +1,41 @@
+import random
+import unittest
+import numpy as np
+import ai
+from features import FEATURE_NAMES, extract_features
+from game_logic import initialize_board, valid_moves, make_move, board_to_bitboards
+
+def random_positions(count, seed=7):
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        board, player = initialize_board(), 1
+        for _ in range(rng.randint(0, 58)):
+            moves = valid_moves(board, player) or valid_moves(board, 3 - player)
+            if not moves:
+                break
+            if not valid_moves(board, player):
+                player = 3 - player
+            row, col = rng.choice(moves)
+            make_move(board, row, col, player)
+            player = 3 - player
+        positions.append((board, rng.choice([1, 2])))
+    return positions
+
+class TestBatchFeatures(unittest.TestCase):
+    def test_matches_evaluate_board(self):
+        # Compare against the default weights even when a weights.json is installed
+        self.addCleanup(setattr, ai, 'tuned_weights', ai.tuned_weights)
+        ai.tuned_weights = None
+        positions = random_positions(40)
+        packed = np.array([board_to_bitboards(board) for board, _ in positions], dtype=np.uint64)
+        features, empties = extract_features(packed[:, 0], packed[:, 1], np.array([side for _, side in positions]))
+        for i, (board, side) in enumerate(positions):
+            weights = ai.default_weights(ai.determine_game_phase(board))
+            expected = ai.evaluate_board(ai.convert_board(board), side)
+            score = sum(weights[name] * features[i, j] for j, name in enumerate(FEATURE_NAMES)) + weights['potential_mobility'] ** 2
+            self.assertEqual(empties[i], sum(row.count(0) for row in board))
+            self.assertAlmostEqual(score, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,31 @@
-def initialize_board():
+from collections import namedtuple
+from functools import lru_cache
+
+from zobrist import compute_hash, bitboard_hash, move_hash, pass_hash  # noqa: F401 (compute_hash is re-exported)
+
+# Supported board sizes; the board is always square with an even side
+MIN_BOARD_SIZE = 6
+MAX_BOARD_SIZE = 16
+
+def initialize_board(size=8):
     """
     Initializes the Reversi board with the standard starting position.
 
+    Args:
+        size (int, optional): Side length of the board, an even number from MIN_BOARD_SIZE to MAX_BOARD_SIZE.
+
     Returns:
-        board (list of lists): An 8x8 grid initialized for the start of a Reversi game.
+        board (list of lists): A size x size grid initialized for the start of a Reversi game.
+
+    Raises:
+        ValueError: If the size is odd or out of range.
     """
-    board = [[0]*8 for _ in range(8)]
-    board[3][3], board[4][4] = 2, 2  # White starts in the center
-    board[3][4], board[4][3] = 1, 1  # Black starts in the center
+    if size % 2 or not MIN_BOARD_SIZE <= size <= MAX_BOARD_SIZE:
+        raise ValueError(f"Unsupported board size: {size}")
+    board = [[0]*size for _ in range(size)]
+    mid = size // 2
+    board[mid - 1][mid - 1], board[mid][mid] = 2, 2  # White starts in the center
+    board[mid - 1][mid], board[mid][mid - 1] = 1, 1  # Black starts in the center
     return board
 
 def print_board(board):
@@ -17,13 +35,13 @@ def print_board(board):
     Args:
         board (list of lists): The Reversi game board to print.
     """
-    print("  " + " ".join(str(i) for i in range(8)))
+    print("  " + " ".join(str(i) for i in range(len(board))))
     for i, row in enumerate(board):
         print(i, ' '.join({0: '.', 1: 'B', 2: 'W'}[x] for x in row))
 
 def valid_moves(board, player):
     """
-    Determines all valid moves for the given player.
+    Determines all valid moves for the given player with the bitboard move generator.
 
     Args:
         board (list of lists): The current state of the game board.
@@ -32,12 +50,15 @@ def valid_moves(board, player):
     Returns:
         list of tuples: A list of valid (row, col) moves for the player.
     """
+    size = len(board)
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    moves = legal_moves_mask(own, opp, size)
     valid = []
-    for r in range(8):
-        for c in range(8):
-            if board[r][c] == 0:  # Look only at empty spaces
-                if can_flip(board, r, c, player):
-                    valid.append((r, c))
+    while moves:  # Set bits in ascending order, i.e. row-major
+        bit = moves & -moves
+        moves ^= bit
+        valid.append(divmod(bit.bit_length() - 1, size))
     return valid
 
 def can_flip(board, row, col, player):
@@ -54,16 +75,17 @@ def can_flip(board, row, col, player):
         bool: True if at least one disc can be flipped, False otherwise.
     """
     opponent = 2 if player == 1 else 1
+    size = len(board)
     directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
     can_flip_any = False
     for dr, dc in directions:
         r, c = row + dr, col + dc
         found_opponent = False
-        while 0 <= r < 8 and 0 <= c < 8 and board[r][c] == opponent:
+        while 0 <= r < size and 0 <= c < size and board[r][c] == opponent:
             r += dr
             c += dc
             found_opponent = True
-        if found_opponent and 0 <= r < 8 and 0 <= c < 8 and board[r][c] == player:
+        if found_opponent and 0 <= r < size and 0 <= c < size and board[r][c] == player:
             if check_path(board, row+dr, col+dc, dr, dc, player):
                 can_flip_any = True
     return can_flip_any
@@ -85,12 +107,13 @@ def check_path(board, start_r, start_c, dr, dc, player):
         bool: True if path is valid for a flip, False otherwise.
     """
     r, c = start_r, start_c
-    while 0 <= r < 8 and 0 <= c < 8 and board[r][c] != player:
+    size = len(board)
+    while 0 <= r < size and 0 <= c < size and board[r][c] != player:
         r += dr
         c += dc
-    return r >= 0 and r < 8 and c >= 0 and c < 8 and board[r][c] == player
+    return r >= 0 and r < size and c >= 0 and c < size and board[r][c] == player
 
-def make_move(board, row, col, player, zobrist_keys=None, current_hash=None):
+def make_move(board, row, col, player, zobrist_keys=None, current_hash=None, passes=0):
     """
     Executes a move by placing a disc at the specified location, flipping the opponent's discs accordingly,
     and updates the Zobrist hash if zobrist_keys and current_hash are provided.
@@ -100,28 +123,32 @@ def make_move(board, row, col, player, zobrist_keys=None, current_hash=None):
         row (int): The row to place the disc.
         col (int): The column to place the disc.
         player (int): The player making the move.
-        zobrist_keys (dict, optional): Zobrist hashing keys.
-        current_hash (int, optional): Current Zobrist hash of the board.
+        zobrist_keys (ZobristKeys, optional): Zobrist hashing keys.
+        current_hash (int, optional): Current Zobrist hash of the position, with player to move.
+        passes (int, optional): Consecutive passes leading to the position; a move resets them.
 
     Returns:
-        tuple: The updated game board and the new hash if applicable.
+        tuple: The updated game board and the new hash (with the opponent to move) if applicable.
     """
+    size = len(board)
+    square = row * size + col
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    flips = flips_mask(own, opp, square, size)
     board[row][col] = player
-    if zobrist_keys is not None and current_hash is not None:
-        current_hash ^= zobrist_keys[(row, col)][player]
+    hashing = zobrist_keys is not None and current_hash is not None
+    if hashing:
+        keys = zobrist_keys.board(size)
+        flip = keys.flip
+        current_hash ^= keys.pieces[player][square] ^ zobrist_keys.side ^ zobrist_keys.pass_key(passes)
 
-    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-    for dr, dc in directions:
-        if can_flip_path(board, row, col, dr, dc, player):
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8 and board[r][c] != player:
-                board[r][c] = player
-                if zobrist_keys is not None and current_hash is not None:
-                    opponent = 3 - player
-                    current_hash ^= zobrist_keys[(r, c)][opponent]
-                    current_hash ^= zobrist_keys[(r, c)][player]
-                r += dr
-                c += dc
+    while flips:
+        bit = flips & -flips
+        flipped = bit.bit_length() - 1
+        board[flipped // size][flipped % size] = player
+        if hashing:
+            current_hash ^= flip[flipped]
+        flips ^= bit
     return board, current_hash if zobrist_keys is not None else board
 
 
@@ -141,13 +168,14 @@ def can_flip_path(board, row, col, dr, dc, player):
         bool: True if there is a valid path for flipping discs, False otherwise.
     """
     r, c = row + dr, col + dc
+    size = len(board)
     found_opponent = False
-    while 0 <= r < 8 and 0 <= c < 8 and board[r][c] != 0 and board[r][c] != player:
+    while 0 <= r < size and 0 <= c < size and board[r][c] != 0 and board[r][c] != player:
         if board[r][c] != player:
             found_opponent = True
         r += dr
         c += dc
-    return found_opponent and r >= 0 and r < 8 and c >= 0 and c < 8 and board[r][c] == player
+    return found_opponent and r >= 0 and r < size and c >= 0 and c < size and board[r][c] == player
 
 def flip_discs(board, row, col, dr, dc, player):
     """
@@ -162,7 +190,317 @@ def flip_discs(board, row, col, dr, dc, player):
         player (int): The player number.
     """
     r, c = row + dr, col + dc
-    while 0 <= r < 8 and 0 <= c < 8 and board[r][c] != player:
+    size = len(board)
+    while 0 <= r < size and 0 <= c < size and board[r][c] != player:
         board[r][c] = player
         r += dr
         c += dc
+
+def board_to_bitboards(board):
+    """
+    Packs the board into two integers, one bit per square (bit index row * size + col).
+
+    Boards up to 8x8 fit in 64 bits; larger boards use Python's arbitrary-width integers.
+
+    Args:
+        board (list of lists): The game board.
+
+    Returns:
+        tuple: (black, white) bitboards.
+    """
+    size = len(board)
+    black = white = 0
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell == 1:
+                black |= 1 << (r * size + c)
+            elif cell == 2:
+                white |= 1 << (r * size + c)
+    return black, white
+
+def bitboards_to_board(black, white, size=8):
+    """
+    Unpacks two bitboards into a list-of-lists board.
+
+    Args:
+        black (int): Bitboard of black discs.
+        white (int): Bitboard of white discs.
+        size (int, optional): Side length of the board.
+
+    Returns:
+        list of lists: The corresponding game board.
+    """
+    board = [[0]*size for _ in range(size)]
+    for square in range(size * size):
+        if black >> square & 1:
+            board[square // size][square % size] = 1
+        elif white >> square & 1:
+            board[square // size][square % size] = 2
+    return board
+
+# Bitboard move generation. Each direction is a shift amount (positive shifts
+# left, towards higher squares) and a mask dropping discs that wrapped around
+# to the opposite column.
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+NOT_A_FILE = 0xFEFEFEFEFEFEFEFE  # Every square except column 0
+NOT_H_FILE = 0x7F7F7F7F7F7F7F7F  # Every square except column 7
+BITBOARD_DIRECTIONS = ((1, NOT_A_FILE), (-1, NOT_H_FILE), (8, FULL_MASK), (-8, FULL_MASK),
+                       (9, NOT_A_FILE), (7, NOT_H_FILE), (-7, NOT_A_FILE), (-9, NOT_H_FILE))
+
+# Masks of one board size: all squares, the shift directions, the four corners,
+# every border square, and the first and last rows
+BoardGeometry = namedtuple('BoardGeometry', ['size', 'full', 'directions', 'corners', 'edges', 'edge_rows'])
+
+@lru_cache(maxsize=None)
+def board_geometry(size=8):
+    """
+    Precomputes the bitboard masks of a board size.
+
+    Args:
+        size (int): Side length of the board.
+
+    Returns:
+        BoardGeometry: The masks; for size 8, directions is BITBOARD_DIRECTIONS.
+    """
+    full = (1 << size * size) - 1
+    first_col = sum(1 << (r * size) for r in range(size))
+    last_col = first_col << (size - 1)
+    not_first, not_last = full & ~first_col, full & ~last_col
+    directions = ((1, not_first), (-1, not_last), (size, full), (-size, full),
+                  (size + 1, not_first), (size - 1, not_last), (-(size - 1), not_first), (-(size + 1), not_last))
+    first_row = (1 << size) - 1
+    edge_rows = first_row | first_row << (size * (size - 1))
+    corners = 1 | 1 << (size - 1) | 1 << (size * (size - 1)) | 1 << (size * size - 1)
+    return BoardGeometry(size, full, directions, corners, edge_rows | first_col | last_col, edge_rows)
+
+def shift_bitboard(bits, amount, mask):
+    """
+    Moves every disc of a bitboard one step in the direction given by amount and mask.
+
+    Args:
+        bits (int): The bitboard to shift.
+        amount (int): Shift amount from BITBOARD_DIRECTIONS.
+        mask (int): Wrap-around mask from BITBOARD_DIRECTIONS.
+
+    Returns:
+        int: The shifted bitboard.
+    """
+    return ((bits << amount) if amount > 0 else (bits >> -amount)) & mask
+
+def legal_moves_mask(own, opp, size=8):
+    """
+    Computes all legal moves at once from packed bitboards.
+
+    Args:
+        own (int): Bitboard of the player to move.
+        opp (int): Bitboard of the opponent.
+        size (int, optional): Side length of the board.
+
+    Returns:
+        int: Bitboard with one bit set per legal move.
+    """
+    geometry = board_geometry(size)
+    empty = ~(own | opp) & geometry.full
+    moves = 0
+    for amount, mask in geometry.directions:
+        # A run of opponent discs flanked by a move is at most size - 2 long
+        run = shift_bitboard(own, amount, mask) & opp
+        for _ in range(size - 3):
+            run |= shift_bitboard(run, amount, mask) & opp
+        moves |= shift_bitboard(run, amount, mask) & empty
+    return moves
+
+def flips_mask(own, opp, square, size=8):
+    """
+    Computes the discs flipped by playing on a square.
+
+    Args:
+        own (int): Bitboard of the player to move.
+        opp (int): Bitboard of the opponent.
+        square (int): Square index (row * size + col) of the move.
+        size (int, optional): Side length of the board.
+
+    Returns:
+        int: Bitboard of the opponent discs the move flips (0 if the move is illegal).
+    """
+    flips = 0
+    start = 1 << square
+    for amount, mask in board_geometry(size).directions:
+        run = 0
+        bit = shift_bitboard(start, amount, mask)
+        while bit & opp:
+            run |= bit
+            bit = shift_bitboard(bit, amount, mask)
+        if bit & own:
+            flips |= run
+    return flips
+
+def moves_with_flips(board, player):
+    """
+    Returns every legal move together with the discs it would flip, in one pass over the board.
+
+    The board is packed into bitboards once; legal moves and flips are then computed
+    with bitboard operations, without copying the board or playing any move.
+
+    Args:
+        board (list of lists): The current game board.
+        player (int): The player number (1 for black, 2 for white).
+
+    Returns:
+        dict: Maps each legal (row, col) move, in row-major order, to a (flip_count, flip_mask)
+        tuple where flip_mask is a bitboard of the flipped discs.
+    """
+    size = len(board)
+    black, white = board_to_bitboards(board)
+    own, opp = (black, white) if player == 1 else (white, black)
+    moves = legal_moves_mask(own, opp, size)
+    result = {}
+    while moves:
+        bit = moves & -moves
+        moves ^= bit
+        square = bit.bit_length() - 1
+        flips = flips_mask(own, opp, square, size)
+        result[(square // size, square % size)] = (flips.bit_count(), flips)
+    return result
+
+class GameState:
+    """
+    Immutable game position: packed bitboards, side to move, consecutive passes and Zobrist hash.
+
+    A state is a handful of integers, so it is cheap to keep in undo histories and
+    to hand to worker threads or processes without copying a board. play() and
+    pass_turn() return new states and update the hash incrementally; it covers
+    the side to move and the pass count as well as the discs. The hash is only
+    meaningful together with the Zobrist keys it was computed with; it is None
+    for states created without keys.
+    """
+    __slots__ = ('black', 'white', 'player', 'passes', 'hash', 'size')
+
+    def __init__(self, black, white, player=1, passes=0, hash=None, size=8):
+        for name, value in zip(self.__slots__, (black, white, player, passes, hash, size)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameState is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("GameState is immutable")
+
+    def __reduce__(self):
+        return GameState, (self.black, self.white, self.player, self.passes, self.hash, self.size)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return ((self.black, self.white, self.player, self.passes, self.size)
+                == (other.black, other.white, other.player, other.passes, other.size))
+
+    def __hash__(self):
+        return hash((self.black, self.white, self.player, self.passes, self.size))
+
+    def __repr__(self):
+        return (f"GameState(black={self.black:#x}, white={self.white:#x}, player={self.player}, "
+                f"passes={self.passes}, size={self.size})")
+
+    @classmethod
+    def initial(cls, size=8, zobrist_keys=None):
+        """
+        Creates the standard starting position with Black to move.
+
+        Args:
+            size (int, optional): Side length of the board.
+            zobrist_keys (ZobristKeys, optional): Zobrist hashing keys; without them the state has no hash.
+
+        Returns:
+            GameState: The starting position.
+        """
+        return cls.from_board(initialize_board(size), 1, zobrist_keys)
+
+    @classmethod
+    def from_board(cls, board, player=1, zobrist_keys=None, current_hash=None, passes=0):
+        """
+        Packs a list-of-lists board into a state.
+
+        Args:
+            board (list of lists): The game board.
+            player (int, optional): The player to move.
+            zobrist_keys (ZobristKeys, optional): Zobrist hashing keys used to compute the hash.
+            current_hash (int, optional): The board's hash if already known; skips computing it.
+            passes (int, optional): Consecutive passes leading to the position.
+
+        Returns:
+            GameState: The position.
+        """
+        size = len(board)
+        black, white = board_to_bitboards(board)
+        if current_hash is None and zobrist_keys is not None:
+            current_hash = bitboard_hash(black, white, zobrist_keys, size, player, passes)
+        return cls(black, white, player, passes, current_hash, size)
+
+    def to_board(self):
+        """ Unpacks the state into a fresh list-of-lists board. """
+        return bitboards_to_board(self.black, self.white, self.size)
+
+    def own_opp(self):
+        """ (own, opponent) bitboards from the side to move's point of view. """
+        return (self.black, self.white) if self.player == 1 else (self.white, self.black)
+
+    def legal_moves_mask(self):
+        own, opp = self.own_opp()
+        return legal_moves_mask(own, opp, self.size)
+
+    def legal_moves(self):
+        """ Legal (row, col) moves of the side to move in row-major order. """
+        moves = self.legal_moves_mask()
+        result = []
+        while moves:
+            bit = moves & -moves
+            moves ^= bit
+            result.append(divmod(bit.bit_length() - 1, self.size))
+        return result
+
+    def play(self, move, zobrist_keys=None):
+        """
+        Plays a move for the side to move.
+
+        Args:
+            move (tuple): The (row, col) square to play.
+            zobrist_keys (ZobristKeys, optional): The keys of this state's hash; without them the new state has no hash.
+
+        Returns:
+            GameState: The position after the move, with the opponent to move.
+
+        Raises:
+            ValueError: If the move is illegal.
+        """
+        row, col = move
+        square = row * self.size + col
+        own, opp = self.own_opp()
+        bit = 1 << square
+        flips = flips_mask(own, opp, square, self.size) if not (own | opp) & bit else 0
+        if not flips:
+            raise ValueError(f"Illegal move {move} for player {self.player}")
+        new_hash = None
+        if zobrist_keys is not None and self.hash is not None:
+            new_hash = move_hash(self.hash, zobrist_keys, self.size, square, self.player, flips, self.passes)
+        own, opp = own | bit | flips, opp & ~flips
+        black, white = (own, opp) if self.player == 1 else (opp, own)
+        return GameState(black, white, 3 - self.player, 0, new_hash, self.size)
+
+    def pass_turn(self, zobrist_keys=None):
+        """ The same position with the opponent to move; without the keys of its hash the new state has no hash. """
+        new_hash = None
+        if zobrist_keys is not None and self.hash is not None:
+            new_hash = pass_hash(self.hash, zobrist_keys, self.passes)
+        return GameState(self.black, self.white, 3 - self.player, self.passes + 1, new_hash, self.size)
+
+    def is_terminal(self):
+        """ True once both players have passed in a row or neither side has a legal move. """
+        if self.passes >= 2:
+            return True
+        own, opp = self.own_opp()
+        return not legal_moves_mask(own, opp, self.size) and not legal_moves_mask(opp, own, self.size)
+
+    def disc_counts(self):
+        """ (black, white) disc counts. """
+        return self.black.bit_count(), self.white.bit_count()
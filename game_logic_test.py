@@ -0,0 +1,110 @@
+import pickle
+import random
+import unittest
+from ai import init_zobrist, compute_hash, calculate_stability, edge_stability
+from game_logic import (initialize_board, valid_moves, can_flip, make_move, board_to_bitboards,
+                        legal_moves_mask, flips_mask, moves_with_flips, GameState)
+
+class TestBitboardMoves(unittest.TestCase):
+    def test_matches_board_move_generation(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            board, player = initialize_board(), 1
+            while valid_moves(board, 1) or valid_moves(board, 2):
+                moves = valid_moves(board, player)
+                self.assertEqual(moves, [(r, c) for r in range(8) for c in range(8) if board[r][c] == 0 and can_flip(board, r, c, player)])
+                black, white = board_to_bitboards(board)
+                own, opp = (black, white) if player == 1 else (white, black)
+                mask = legal_moves_mask(own, opp)
+                self.assertEqual(sorted(divmod(sq, 8) for sq in range(64) if mask >> sq & 1), sorted(moves))
+                oracle = moves_with_flips(board, player)
+                self.assertEqual(list(oracle), moves)
+                for (r, c), (count, mask) in oracle.items():
+                    self.assertEqual(mask, flips_mask(own, opp, r * 8 + c))
+                    self.assertEqual(count, bin(mask).count('1'))
+                if moves:
+                    row, col = rng.choice(moves)
+                    flips = flips_mask(own, opp, row * 8 + col)
+                    make_move(board, row, col, player)
+                    new_black, new_white = board_to_bitboards(board)
+                    new_own = new_black if player == 1 else new_white
+                    self.assertEqual(new_own, own | flips | 1 << (row * 8 + col))
+                player = 3 - player
+
+    def test_other_board_sizes_match_ray_scan(self):
+        rng = random.Random(7)
+        for size in (6, 10, 16):
+            board, player = initialize_board(size), 1
+            while valid_moves(board, 1) or valid_moves(board, 2):
+                moves = valid_moves(board, player)
+                self.assertEqual(moves, [(r, c) for r in range(size) for c in range(size)
+                                         if board[r][c] == 0 and can_flip(board, r, c, player)])
+                if moves:
+                    row, col = rng.choice(moves)
+                    black, white = board_to_bitboards(board)
+                    own, opp = (black, white) if player == 1 else (white, black)
+                    flips = flips_mask(own, opp, row * size + col, size)
+                    self.assertEqual(moves_with_flips(board, player)[(row, col)][1], flips)
+                    make_move(board, row, col, player)
+                    new_black, new_white = board_to_bitboards(board)
+                    self.assertEqual(new_black if player == 1 else new_white, own | flips | 1 << (row * size + col))
+                player = 3 - player
+        self.assertRaises(ValueError, initialize_board, 7)
+
+    def test_stability_on_other_board_sizes(self):
+        board = [[0] * 10 for _ in range(10)]
+        board[0][0] = board[0][9] = 1
+        board[5][5] = 2
+        self.assertEqual((calculate_stability(board, 1), edge_stability(board, 1)), (2, 4))
+        self.assertEqual((calculate_stability(board, 2), edge_stability(board, 2)), (1, 0))
+        board[0][1] = 2
+        board[0][2] = 1
+        # Both black discs of the top-left corner see each other past the white one
+        self.assertEqual((calculate_stability(board, 1), edge_stability(board, 1)), (1, 2))
+
+class TestGameState(unittest.TestCase):
+    def test_play_matches_board_and_hash(self):
+        rng = random.Random(11)
+        for size in (8, 10):
+            keys = init_zobrist(seed=3, size=size)
+            board, player = initialize_board(size), 1
+            current_hash = compute_hash(board, keys)
+            state = GameState.initial(size, keys)
+            while not state.is_terminal():
+                self.assertEqual(state.to_board(), board)
+                self.assertEqual((state.player, state.hash), (player, current_hash))
+                moves = valid_moves(board, player)
+                self.assertEqual(state.legal_moves(), moves)
+                if not moves:
+                    passes = state.passes
+                    state, player = state.pass_turn(keys), 3 - player
+                    current_hash = compute_hash(board, keys, player, passes + 1)
+                    self.assertEqual(state.hash, current_hash)
+                    continue
+                move = rng.choice(moves)
+                board, current_hash = make_move(board, move[0], move[1], player, keys, current_hash)
+                state, player = state.play(move, keys), 3 - player
+            self.assertFalse(valid_moves(board, 1) or valid_moves(board, 2))
+            self.assertEqual(state.disc_counts(), (sum(row.count(1) for row in board), sum(row.count(2) for row in board)))
+
+    def test_pending_pass_distinguishes_states(self):
+        state = GameState.initial()
+        passed = GameState(state.black, state.white, state.player, 1)
+        self.assertNotEqual(state, passed)
+        self.assertEqual(len({state, passed}), 2)
+        self.assertEqual(passed, GameState(state.black, state.white, state.player, 1))
+
+    def test_immutable_and_picklable(self):
+        state = GameState.initial(zobrist_keys=init_zobrist(seed=1))
+        with self.assertRaises(AttributeError):
+            state.player = 2
+        with self.assertRaises(ValueError):
+            state.play((0, 0))
+        copy = pickle.loads(pickle.dumps(state))
+        self.assertEqual(copy, state)
+        self.assertEqual((copy.hash, copy.passes), (state.hash, state.passes))
+        self.assertEqual(state.pass_turn().pass_turn().passes, 2)
+        self.assertTrue(state.pass_turn().pass_turn().is_terminal())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,334 @@
+"""
+Indexed game database with one byte per move.
+
+A database is a directory of three files:
+
+    moves.bin      the moves of every game back to back, one byte per move
+                   (square index row * 8 + col; passes are implied by the rules)
+    games.idx      one record per game: offset into moves.bin, move count and
+                   final result (black discs minus white discs)
+    positions.idx  (position hash, game, ply) records sorted by hash, plus
+                   newer runs positions.N.idx sorted the same way
+
+Position hashes are Zobrist keys generated from a fixed seed, plus a key for
+White to move, so they are stable across processes and runs. The index files
+are memory-mapped and searched with a binary search, so looking up every game
+that reached a position only touches the matching records. New games are kept
+in memory until flush(), which sorts only their positions and writes them as a
+new run. A run is merged into the one before it, streaming both chunk by
+chunk, once it is at least half that run's size. Runs therefore shrink
+geometrically: there are O(log n) of them, every record is rewritten O(log n)
+times, and a bulk import costs O(n log n) rather than a full rewrite per flush.
+
+Transcripts use the standard notation of column letter and row number per
+move, e.g. "f5d6c3d3c4f4".
+
+Run with:
+    python gamedb.py import games.txt --db games_db
+    python gamedb.py stats --db games_db --moves f5d6
+    python gamedb.py export out.txt --db games_db
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+
+from ai import init_zobrist, compute_hash
+from game_logic import initialize_board, valid_moves, make_move
+
+ZOBRIST_SEED = 0x5EED
+SIDE_KEY = random.Random(ZOBRIST_SEED + 1).getrandbits(64)  # XORed in when White is to move
+
+# Record layouts as NumPy dtype specs; NumPy itself is only imported once a database is opened,
+# so the transcript helpers stay cheap to import
+GAME_DTYPE = [('offset', '<u8'), ('length', 'u1'), ('result', 'i1')]
+POSITION_DTYPE = [('hash', '<u8'), ('game', '<u4'), ('ply', 'u1')]
+MERGE_CHUNK = 1 << 16  # Records read from the older run per merge step
+
+db_zobrist_keys = init_zobrist(seed=ZOBRIST_SEED, side_key=SIDE_KEY)
+
+
+def square_name(move):
+    return f"{chr(ord('a') + move[1])}{move[0] + 1}"
+
+
+def parse_transcript(text):
+    """ Parses "f5d6c3..." into a list of (row, col) moves. """
+    text = ''.join(text.split()).lower()
+    if len(text) % 2:
+        raise ValueError(f"Malformed transcript: {text}")
+    moves = []
+    for i in range(0, len(text), 2):
+        col, row = ord(text[i]) - ord('a'), text[i + 1]
+        if not 0 <= col < 8 or not row.isdigit() or not 1 <= int(row) <= 8:
+            raise ValueError(f"Malformed move {text[i:i + 2]!r} in transcript")
+        moves.append((int(row) - 1, col))
+    return moves
+
+
+def format_transcript(moves):
+    return ''.join(square_name(move) for move in moves)
+
+
+def position_hash(board, player, current_hash=None):
+    """ Database hash of a position: Zobrist hash of the discs and the side to move (passes are not counted). """
+    if current_hash is None:
+        current_hash = compute_hash(board, db_zobrist_keys, player)
+    return current_hash
+
+
+def replay(moves):
+    """
+    Plays a game through, handling passes.
+
+    Returns:
+        tuple: (positions, final board, player to move at the end), where positions lists
+        (ply, position hash) for every position including the final one (ply == len(moves)).
+
+    Raises:
+        ValueError: If a move is illegal.
+    """
+    board = initialize_board()
+    current_hash = compute_hash(board, db_zobrist_keys)
+    player = 1
+    positions = []
+    for ply, move in enumerate(moves):
+        if not valid_moves(board, player):
+            player = 3 - player  # Forced pass
+            current_hash ^= SIDE_KEY
+        if move not in valid_moves(board, player):
+            raise ValueError(f"Illegal move {square_name(move)} at ply {ply}")
+        positions.append((ply, position_hash(board, player, current_hash)))
+        board, current_hash = make_move(board, move[0], move[1], player, db_zobrist_keys, current_hash)
+        player = 3 - player
+    if not valid_moves(board, player) and valid_moves(board, 3 - player):
+        player = 3 - player
+        current_hash ^= SIDE_KEY
+    positions.append((len(moves), position_hash(board, player, current_hash)))
+    return positions, board, player
+
+
+def disc_difference(board):
+    return sum(row.count(1) for row in board) - sum(row.count(2) for row in board)
+
+
+def _map(path, dtype):
+    import numpy as np
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+def merge_runs(older, newer, path, chunk_records=MERGE_CHUNK):
+    """
+    Writes the merge of two hash-sorted position runs to path, a chunk at a time.
+
+    Records with equal hashes keep their order, older run first, so the games of a
+    position stay in the order they were added.
+    """
+    import numpy as np
+    older_hashes, newer_hashes = older['hash'], newer['hash']
+    i = j = 0
+    with open(path, 'wb') as out:
+        while i < len(older):
+            end = min(i + chunk_records, len(older))
+            # Extend the chunk over equal hashes and take every newer record up to its last hash
+            last = older_hashes[end - 1]
+            end = int(np.searchsorted(older_hashes, last, side='right'))
+            upto = int(np.searchsorted(newer_hashes, last, side='right'))
+            block = np.concatenate([older[i:end], newer[j:upto]])
+            block[np.argsort(block['hash'], kind='stable')].tofile(out)
+            i, j = end, upto
+        for start in range(j, len(newer), chunk_records):
+            np.asarray(newer[start:start + chunk_records]).tofile(out)
+
+
+class GameDatabase:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._moves_path = os.path.join(path, 'moves.bin')
+        self._games_path = os.path.join(path, 'games.idx')
+        self._pending_games = []      # (move bytes, result)
+        self._pending_positions = []  # (hash, game, ply)
+        self._open_maps()
+
+    def _open_maps(self):
+        import numpy as np
+        self._games = _map(self._games_path, GAME_DTYPE)
+        self._runs = [_map(self._run_path(number), POSITION_DTYPE) for number in self._run_numbers()]  # Oldest first
+        if os.path.exists(self._moves_path) and os.path.getsize(self._moves_path):
+            self._moves = np.memmap(self._moves_path, dtype=np.uint8, mode='r')
+        else:
+            self._moves = np.zeros(0, dtype=np.uint8)
+
+    def _run_path(self, number):
+        return os.path.join(self.path, 'positions.idx' if number == 0 else f'positions.{number}.idx')
+
+    def _run_numbers(self):
+        names = [os.path.basename(name).split('.')[1] for name in glob.glob(os.path.join(self.path, 'positions.*.idx'))]
+        return [0] + sorted(int(name) for name in names if name.isdigit())
+
+    def __len__(self):
+        return len(self._games) + len(self._pending_games)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def add_game(self, moves):
+        """ Adds a game given as (row, col) moves and returns its game id. """
+        game_id = len(self)
+        positions, board, _ = replay(moves)
+        self._pending_positions.extend((position, game_id, ply) for ply, position in positions)
+        self._pending_games.append((bytes(row * 8 + col for row, col in moves), disc_difference(board)))
+        return game_id
+
+    def flush(self):
+        """ Appends pending games to the files and merges their positions into the sorted index. """
+        if not self._pending_games:
+            return
+        import numpy as np
+        offset = os.path.getsize(self._moves_path) if os.path.exists(self._moves_path) else 0
+        records = np.zeros(len(self._pending_games), dtype=GAME_DTYPE)
+        with open(self._moves_path, 'ab') as moves_file:
+            for i, (data, result) in enumerate(self._pending_games):
+                moves_file.write(data)
+                records[i] = (offset, len(data), result)
+                offset += len(data)
+        with open(self._games_path, 'ab') as games_file:
+            games_file.write(records.tobytes())
+
+        new_positions = np.array(self._pending_positions, dtype=POSITION_DTYPE)
+        numbers = self._run_numbers()
+        # The first run of an empty database is positions.idx itself
+        paths = [self._run_path(number) for number in numbers] if len(self._runs[0]) else []
+        paths.append(self._run_path(numbers[-1] + 1 if paths else 0))
+        new_positions[np.argsort(new_positions['hash'], kind='stable')].tofile(paths[-1] + '.tmp')
+        self._games = self._runs = self._moves = None  # Release the maps before replacing files
+        os.replace(paths[-1] + '.tmp', paths[-1])
+        self._pending_games.clear()
+        self._pending_positions.clear()
+        sizes = [os.path.getsize(run_path) for run_path in paths]
+        while len(paths) > 1 and 2 * sizes[-1] >= sizes[-2]:
+            newer_path = paths.pop()
+            merge_runs(_map(paths[-1], POSITION_DTYPE), _map(newer_path, POSITION_DTYPE), paths[-1] + '.tmp')
+            os.replace(paths[-1] + '.tmp', paths[-1])
+            os.remove(newer_path)
+            newer_size = sizes.pop()
+            sizes[-1] += newer_size
+        self._open_maps()
+
+    def game_moves(self, game_id):
+        """ The (row, col) moves of a game. """
+        if game_id >= len(self._games):
+            data = self._pending_games[game_id - len(self._games)][0]
+        else:
+            record = self._games[game_id]
+            data = bytes(self._moves[int(record['offset']):int(record['offset']) + int(record['length'])])
+        return [divmod(square, 8) for square in data]
+
+    def game_result(self, game_id):
+        if game_id >= len(self._games):
+            return self._pending_games[game_id - len(self._games)][1]
+        return int(self._games[game_id]['result'])
+
+    def occurrences(self, board, player):
+        """ (game, ply) pairs of every time the position occurred. """
+        import numpy as np
+        key = np.uint64(position_hash(board, player))
+        found = []
+        for run in self._runs:
+            hashes = run['hash']
+            start = np.searchsorted(hashes, key, side='left')
+            end = np.searchsorted(hashes, key, side='right')
+            found.extend((int(game), int(ply)) for game, ply in zip(run['game'][start:end], run['ply'][start:end]))
+        found.extend((game, ply) for position, game, ply in self._pending_positions if position == key)
+        return found
+
+    def games_reaching(self, board, player):
+        """ Sorted ids of all games that reached the position with the given side to move. """
+        return sorted({game for game, _ in self.occurrences(board, player)})
+
+    def move_stats(self, board, player):
+        """
+        Statistics of the moves played from a position.
+
+        Returns:
+            dict: Maps (row, col) to {'games', 'wins', 'draws', 'losses', 'win_rate'}, counted for
+            the side to move; win_rate scores draws as half a win.
+        """
+        stats = {}
+        sign = 1 if player == 1 else -1
+        for game, ply in self.occurrences(board, player):
+            moves = self.game_moves(game)
+            if ply >= len(moves):
+                continue
+            entry = stats.setdefault(moves[ply], {'games': 0, 'wins': 0, 'draws': 0, 'losses': 0})
+            outcome = sign * self.game_result(game)
+            entry['games'] += 1
+            entry['wins' if outcome > 0 else 'losses' if outcome < 0 else 'draws'] += 1
+        for entry in stats.values():
+            entry['win_rate'] = (entry['wins'] + 0.5 * entry['draws']) / entry['games']
+        return stats
+
+    def import_transcripts(self, lines, flush_every=10000):
+        """
+        Adds one game per transcript line, streaming the input.
+
+        Returns:
+            tuple: (games imported, lines skipped as malformed or illegal).
+        """
+        imported = skipped = 0
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                self.add_game(parse_transcript(line.split()[0]))
+                imported += 1
+            except ValueError:
+                skipped += 1
+            if len(self._pending_games) >= flush_every:
+                self.flush()
+        self.flush()
+        return imported, skipped
+
+    def export_transcripts(self, out):
+        """ Writes every game as a transcript line, one game at a time. """
+        for game_id in range(len(self)):
+            out.write(format_transcript(self.game_moves(game_id)) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reversi game database.")
+    parser.add_argument('command', choices=['import', 'export', 'stats'])
+    parser.add_argument('file', nargs='?', help="Transcript file for import/export ('-' for stdin/stdout)")
+    parser.add_argument('--db', default='games_db')
+    parser.add_argument('--moves', default='', help="Opening transcript of the position to query")
+    args = parser.parse_args()
+
+    db = GameDatabase(args.db)
+    if args.command == 'import':
+        source = sys.stdin if args.file in (None, '-') else open(args.file)
+        with source:
+            imported, skipped = db.import_transcripts(source)
+        print(f"Imported {imported} games ({skipped} skipped), {len(db)} in database")
+    elif args.command == 'export':
+        target = sys.stdout if args.file in (None, '-') else open(args.file, 'w')
+        with target:
+            db.export_transcripts(target)
+    else:
+        _, board, player = replay(parse_transcript(args.moves))
+        games = db.games_reaching(board, player)
+        print(f"{len(games)} games reach this position")
+        stats = db.move_stats(board, player)
+        for move, entry in sorted(stats.items(), key=lambda item: -item[1]['games']):
+            print(f"{square_name(move)}: {entry['games']} games, win rate {entry['win_rate']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import glob
+import io
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from gamedb import GameDatabase, POSITION_DTYPE, merge_runs, parse_transcript, format_transcript, replay, valid_moves, make_move
+
+GAMES = ['f5d6c3d3c4f4', 'f5f6e6f4', 'f5d6c5', 'f5f6e6f4e3']
+
+class TestGameDatabase(unittest.TestCase):
+    def test_transcript_round_trip(self):
+        self.assertEqual(format_transcript(parse_transcript('F5 d6 c3')), 'f5d6c3')
+        self.assertRaises(ValueError, parse_transcript, 'f5z9')
+
+    def test_queries_survive_reopen(self):
+        with tempfile.TemporaryDirectory() as path:
+            db = GameDatabase(path)
+            self.assertEqual(db.import_transcripts(GAMES + ['f5f5'], flush_every=2), (4, 1))
+            reopened = GameDatabase(path)
+            _, board, player = replay(parse_transcript('f5'))
+            self.assertEqual(reopened.games_reaching(board, player), [0, 1, 2, 3])
+            stats = reopened.move_stats(board, player)
+            self.assertEqual(stats[(5, 3)]['games'], 2)
+            self.assertEqual(stats[(5, 5)]['games'], 2)
+            out = io.StringIO()
+            reopened.export_transcripts(out)
+            self.assertEqual(out.getvalue().split(), GAMES)
+
+    def test_pending_games_are_queryable(self):
+        with tempfile.TemporaryDirectory() as path:
+            db = GameDatabase(path)
+            game_id = db.add_game(parse_transcript(GAMES[1]))
+            _, board, player = replay(parse_transcript('f5f6'))
+            self.assertEqual(db.games_reaching(board, player), [game_id])
+
+    def test_merge_runs_streams_a_stable_merge(self):
+        rng = np.random.default_rng(5)
+        older, newer = np.zeros(500, dtype=POSITION_DTYPE), np.zeros(120, dtype=POSITION_DTYPE)
+        for run, first_game in ((older, 0), (newer, 1000)):
+            run['hash'] = np.sort(rng.integers(0, 40, len(run)).astype(np.uint64))
+            run['game'] = np.arange(first_game, first_game + len(run))
+        with tempfile.TemporaryDirectory() as path:
+            out = os.path.join(path, 'merged.idx')
+            merge_runs(older, newer, out, chunk_records=7)
+            merged = np.fromfile(out, dtype=POSITION_DTYPE)
+        expected = np.concatenate([older, newer])
+        np.testing.assert_array_equal(merged, expected[np.argsort(expected['hash'], kind='stable')])
+
+    def test_many_flushes_keep_few_runs(self):
+        rng = random.Random(11)
+        games = []
+        for _ in range(64):
+            board, player, moves = replay([])[1], 1, []
+            for _ in range(rng.randint(1, 20)):
+                legal = valid_moves(board, player)
+                if not legal:
+                    break
+                move = rng.choice(legal)
+                make_move(board, move[0], move[1], player)
+                moves.append(move)
+                player = 3 - player
+            games.append(format_transcript(moves))
+        with tempfile.TemporaryDirectory() as incremental, tempfile.TemporaryDirectory() as single:
+            GameDatabase(incremental).import_transcripts(games, flush_every=1)
+            GameDatabase(single).import_transcripts(games)
+            self.assertLessEqual(len(glob.glob(os.path.join(incremental, 'positions*.idx'))), 7)
+            a, b = GameDatabase(incremental), GameDatabase(single)
+            _, board, player = replay(parse_transcript('f5'))
+            self.assertEqual(a.occurrences(board, player), b.occurrences(board, player))
+            self.assertEqual(a.move_stats(board, player), b.move_stats(board, player))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,25 +1,36 @@
 import sys
-import copy
+import ai
 import game_logic
-from PyQt5.QtGui import QIcon, QPixmap, QFont, QFontDatabase
-from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QGridLayout, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QComboBox, QMessageBox, QCheckBox, QSizePolicy
+import profiling
+from time import perf_counter
+from PyQt5.QtGui import QIcon, QPixmap, QFont, QFontDatabase, QKeySequence
+from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QGridLayout, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QComboBox, QMessageBox, QCheckBox, QSizePolicy, QShortcut
 from PyQt5.QtCore import Qt, QSize, QTimer, QThread, pyqtSignal
 
-from game_logic import make_move, initialize_board, valid_moves
-from ai import find_best_move, find_best_move_original, init_zobrist, compute_hash
+from game_logic import make_move, initialize_board, valid_moves, GameState, MIN_BOARD_SIZE, MAX_BOARD_SIZE
+from move_cache import cached_moves, move_cache
+from ai import find_best_move, find_best_move_original, find_mcts_move, mcts_engine, multi_pv_search, cancel_search, init_zobrist, compute_hash, transposition_table, last_search_stats
 from simulator_greedy import find_greedy_move
+from calibration import get_difficulty_settings, FALLBACK_SETTINGS
+from memory_budget import memory_governor, deep_sizeof
+from zobrist import pass_hash
+from event_log import event_log
+
+LOG_DUMP_FILE = 'reversi_log.jsonl'  # Written by Ctrl+Shift+L
+PROFILE_DIR = 'profiles'  # Per-move profiles written while "Profile AI Moves" is checked
 
 class AiWorker(QThread):
     moveComputed = pyqtSignal(tuple)  # Emit a tuple for the move
 
-    def __init__(self, board, player, ai_function, zobrist_keys=None, current_hash=None, depth=None):
+    def __init__(self, state, ai_function, zobrist_keys=None, depth=None, time_limit=None, selective=None, max_nodes=None):
         super().__init__()
-        self.board = board.copy()  # Make a copy to work with locally
-        self.player = player
+        self.state = state  # Immutable, so the GUI can keep playing on its own board meanwhile
         self.ai_function = ai_function
         self.zobrist_keys = zobrist_keys
-        self.current_hash = current_hash
         self.depth = depth
+        self.time_limit = time_limit
+        self.selective = selective
+        self.max_nodes = max_nodes
 
     def run(self):
         move = self.ai_function(*self.get_args())
@@ -30,46 +41,115 @@ class AiWorker(QThread):
 
 
     def get_args(self):
+        board, player, current_hash, passes = self.state.to_board(), self.state.player, self.state.hash, self.state.passes
         if self.ai_function.__name__ == "find_greedy_move":
-            return (self.board, self.player)
+            return (board, player)
+        elif self.ai_function.__name__ == "find_mcts_move":
+            return (board, player, None, self.time_limit)
         elif self.ai_function.__name__ == "find_best_move":
-            return (self.board, self.player, self.zobrist_keys, self.current_hash, self.depth)
+            return (board, player, self.zobrist_keys, current_hash, self.depth, self.time_limit, self.selective, self.max_nodes, passes)
         else:  # assume find_best_move_original
-            return (self.board, self.player, self.depth, self.zobrist_keys, self.current_hash)
+            return (board, player, self.depth, self.zobrist_keys, current_hash, self.time_limit, self.selective, self.max_nodes, passes)
+
+class AnalysisWorker(QThread):
+    scoresComputed = pyqtSignal(object)  # Emit (position key, {move: score})
+
+    def __init__(self, state, zobrist_keys, depth, time_limit):
+        super().__init__()
+        self.state = state
+        self.zobrist_keys = zobrist_keys
+        self.depth = depth
+        self.time_limit = time_limit
+        self.cancelled = False
+
+    def cancel(self):
+        # Called from the GUI thread; the search returns at its next node and nothing is emitted
+        self.cancelled = True
+        cancel_search()
+
+    def run(self):
+        state = self.state
+        if self.cancelled:
+            return
+        results = multi_pv_search(state.to_board(), state.player, self.zobrist_keys, state.hash, self.depth, time_limit=self.time_limit,
+                                  passes=state.passes)
+        if not self.cancelled:
+            self.scoresComputed.emit(((state.hash, state.player), {move: score for move, score, _ in results if score is not None}))
+
+class CalibrationWorker(QThread):
+    settingsComputed = pyqtSignal(object)  # Emit the per-difficulty settings
+
+    def __init__(self):
+        super().__init__()
+        self.settings = None
+
+    def run(self):
+        self.settings = get_difficulty_settings()
+        self.settingsComputed.emit(self.settings)
 
 class ReversiGUI(QMainWindow):
+    historyTrimRequested = pyqtSignal(int)  # Emit the target size in bytes of the undo history
+
     def __init__(self):
         super().__init__()
-        self.zobrist_keys = init_zobrist()  # Initialize Zobrist keys at the beginning
-        self.game_board = initialize_board()
+        self.zobrist_keys = init_zobrist(size=MAX_BOARD_SIZE)  # Initialize Zobrist keys at the beginning, for every board size
+        self.board_size = 8
+        self.game_board = initialize_board(self.board_size)
         self.undo_stack = []
         self.redo_stack = []
         self.current_player = 1  # Define the starting player
         self.current_hash = compute_hash(self.game_board, self.zobrist_keys)  # Compute initial hash
+        self.passes = 0  # Consecutive passes leading to the position, which its hash includes
         self.show_legal_moves = True  
         self.ai_depth_original = 5  # Default depth for original Minimax
+        self.ai_time_limit = 2.0  # Default time budget per AI move
+        self.ai_max_nodes = None  # Default node budget per AI move
+        self.ai_selective = 'easy'  # Selective search settings of the default difficulty
+        self.difficulty_settings = FALLBACK_SETTINGS  # Replaced by the settings measured on this host once calibration finishes
         self.ai_depth_iterative = 5  # Default depth for iterative deepening        self.ai_move_function = find_best_move_original  # Assign the Minimax move function by default
         self.game_started = False  # Add this line to initialize game_started
         self.human_player = 1  # Default human as Black (1)
         self.ai_player = 2  # Default AI player as black, assuming 1 is black, 2 is white
         self.last_move = None  # Initialize the last_move attribute
+        self.move_scores = {}  # Search scores of the human's moves, shown instead of the greedy hints
+        self.move_scores_key = None  # (hash, player) of the position move_scores belong to
+        self.analysis_worker = None
+        self.ai_move_waiting = False  # An AI move waits for a cancelled analysis to finish
+        self.ai_move_after_calibration = False  # An AI move waits for the host calibration to finish
+        self.analysis_depth = 4  # Search depth of the move score display
+        self.analysis_time_limit = 1.0
+        self.profile_dir = ai.move_profiler.directory if ai.move_profiler is not None else PROFILE_DIR
         self.initUI()
         self.setupAiWorker()
+        QShortcut(QKeySequence('Ctrl+Shift+L'), self, activated=self.dump_log)
+        # The governor also runs on the AI threads; the signal queues the trim to the GUI thread that owns the history
+        self.historyTrimRequested.connect(self.trim_history)
+        memory_governor.register('undo_history', lambda: deep_sizeof(self.undo_stack) + deep_sizeof(self.redo_stack),
+                                 self.historyTrimRequested.emit, priority=4)
 
         self.change_ai(self.ai_selector.currentIndex())
+        self.change_difficulty(self.difficulty_selector.currentIndex())
+
+        # A first start may have to benchmark the engine; the window does not wait for it
+        self.calibration_worker = CalibrationWorker()
+        self.calibration_worker.settingsComputed.connect(self.calibration_received)
+        self.calibration_worker.finished.connect(self.calibration_finished)
+        self.calibration_worker.start()
 
 
     def setupAiWorker(self):
-        self.ai_worker = AiWorker(self.game_board, self.current_player, find_best_move, self.zobrist_keys, self.current_hash, depth=5)
+        self.ai_worker = AiWorker(self.game_state(), find_best_move, self.zobrist_keys, depth=5)
         self.ai_worker.moveComputed.connect(self.update_game_state)  # Connect signal to slot
 
     def update_game_state(self, move):
         if move:  # This will be False if move is an empty tuple
-            if move in valid_moves(self.game_board, self.current_player):
+            if move in cached_moves(self.game_board, self.current_player, self.current_hash):
                 self.make_move(move[0], move[1])
         else:
             # Handle the situation when no move is possible (e.g., display a message or pass the turn)
             self.show_temporary_message("No valid moves available.", 2000)
+            self.current_hash = pass_hash(self.current_hash, self.zobrist_keys, self.passes)
+            self.passes += 1
             self.switch_player()
 
     def initUI(self):
@@ -87,10 +167,10 @@ class ReversiGUI(QMainWindow):
         self.custom_font = QFont("PlayfulTime", 10)
         font_id = QFontDatabase.addApplicationFont('Fonts/RockBoulder.ttf')
         if font_id == -1:
-            print("Failed to load font")
+            event_log.warning('font_failed', path='Fonts/RockBoulder.ttf')
         else:
             families = QFontDatabase.applicationFontFamilies(font_id)
-            print("Loaded font families:", families)
+            event_log.debug('fonts_loaded', families=families)
             self.custom_font = QFont(families[0], 10)
 
         # Layout structure
@@ -116,43 +196,48 @@ class ReversiGUI(QMainWindow):
         self.grid_layout = QGridLayout()
         self.grid_layout.setSpacing(0)
         self.grid_layout.setContentsMargins(0, 0, 0, 0)
+        self.addBoardWidgets()
+
+    def addBoardWidgets(self):
+        size = self.board_size
 
         # Column and row labels for the board
-        for j in range(8):
+        for j in range(size):
             top_label = QLabel(chr(65 + j))  # ASCII A to H
             top_label.setAlignment(Qt.AlignCenter | Qt.AlignBottom)  # Align center and bottom
             top_label.setFont(self.custom_font)
             self.grid_layout.addWidget(top_label, 0, j + 1)
 
         # Add row headers (numbers)
-        for i in range(8):
+        for i in range(size):
             left_label = QLabel(str(i + 1))
             left_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)  # Align right and vertically center
             left_label.setFont(self.custom_font)
             self.grid_layout.addWidget(left_label, i + 1, 0)
 
         # Add row headers (numbers) on the right
-        for i in range(8):
+        for i in range(size):
             right_label = QLabel(str(i + 1))
             right_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
             right_label.setFont(self.custom_font)
-            self.grid_layout.addWidget(right_label, i + 1, 9)
+            self.grid_layout.addWidget(right_label, i + 1, size + 1)
 
         # Add column headers (letters) at the bottom
-        for j in range(8):
+        for j in range(size):
             bottom_label = QLabel(chr(65 + j))  # ASCII A to H
             bottom_label.setAlignment(Qt.AlignCenter | Qt.AlignTop)
             bottom_label.setFont(self.custom_font)
-            self.grid_layout.addWidget(bottom_label, 9, j + 1)
+            self.grid_layout.addWidget(bottom_label, size + 1, j + 1)
 
 
-        # Buttons for the board
+        # Buttons for the board, scaled so every board size fills the same area
         self.buttons = []
-        for i in range(8):  # 8 rows
+        cell = 90 * 8 // size
+        for i in range(size):
             row_buttons = []
-            for j in range(8):  # 8 columns
+            for j in range(size):
                 button = QPushButton()
-                button.setFixedSize(QSize(90, 90))
+                button.setFixedSize(QSize(cell, cell))
                 button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
                 button.setFont(self.custom_font)
                 button.setEnabled(False)  # Disable the button initially
@@ -162,7 +247,7 @@ class ReversiGUI(QMainWindow):
             self.buttons.append(row_buttons)
         
         bottom_spacer = QLabel("")
-        self.grid_layout.addWidget(bottom_spacer, 10, 0, 1, 10)  # Span the whole bottom row
+        self.grid_layout.addWidget(bottom_spacer, size + 2, 0, 1, size + 2)  # Span the whole bottom row
 
         self.grid_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
 
@@ -204,11 +289,21 @@ class ReversiGUI(QMainWindow):
         self.piece_selector.currentIndexChanged.connect(self.change_starting_piece)
         self.side_panel.addWidget(self.piece_selector)
 
+        self.side_panel.addWidget(create_label("Select Board Size:"))
+
+        # Board size selector
+        self.board_size_selector = QComboBox()
+        self.board_size_selector.addItems([f"{n}x{n}" for n in range(MIN_BOARD_SIZE, MAX_BOARD_SIZE + 1, 2)])
+        self.board_size_selector.setCurrentIndex((self.board_size - MIN_BOARD_SIZE) // 2)
+        self.board_size_selector.setFont(self.custom_font)
+        self.board_size_selector.currentIndexChanged.connect(self.change_board_size)
+        self.side_panel.addWidget(self.board_size_selector)
+
         self.side_panel.addWidget(create_label("Select AI Strategy:"))
 
         # AI strategy selector
         self.ai_selector = QComboBox()
-        self.ai_selector.addItems(['Greedy', 'Minimax', 'Minimax with Iterative Deepening'])
+        self.ai_selector.addItems(['Greedy', 'Minimax', 'Minimax with Iterative Deepening', 'Monte Carlo Tree Search'])
         self.ai_selector.setFont(self.custom_font)
         self.ai_selector.currentIndexChanged.connect(self.change_ai)
         self.side_panel.addWidget(self.ai_selector)
@@ -242,6 +337,20 @@ class ReversiGUI(QMainWindow):
         self.greedy_hints_checkbox.stateChanged.connect(self.update_board)  # Refresh board when toggled
         self.side_panel.addWidget(self.greedy_hints_checkbox)
 
+        # Search scores of every legal move, replacing the flip counts of the greedy hints
+        self.move_scores_checkbox = QCheckBox("Show Move Scores")
+        self.move_scores_checkbox.setChecked(False)
+        self.move_scores_checkbox.setFont(self.custom_font)
+        self.move_scores_checkbox.stateChanged.connect(self.update_board)
+        self.side_panel.addWidget(self.move_scores_checkbox)
+
+        # Profiles of every AI search, for flame graphs; already on when started with REVERSI_PROFILE or --profile
+        self.profile_checkbox = QCheckBox("Profile AI Moves")
+        self.profile_checkbox.setChecked(ai.move_profiler is not None)
+        self.profile_checkbox.setFont(self.custom_font)
+        self.profile_checkbox.stateChanged.connect(self.toggle_profiling)
+        self.side_panel.addWidget(self.profile_checkbox)
+
         # Add a checkbox for showing the last move
         self.show_last_move_checkbox = QCheckBox("Show Last Move")
         self.show_last_move_checkbox.setChecked(False)  # Default to not showing the last move
@@ -288,8 +397,9 @@ class ReversiGUI(QMainWindow):
 
     def restart_game(self):
         # Reset game state
-        self.game_board = initialize_board()
+        self.game_board = initialize_board(self.board_size)
         self.current_hash = compute_hash(self.game_board, self.zobrist_keys)
+        self.passes = 0
         self.current_player = 1  # Assuming 1 is Black
         self.ai_player = 2  # Assuming 2 is White
         self.show_legal_moves = True
@@ -303,6 +413,7 @@ class ReversiGUI(QMainWindow):
         # Re-enable UI elements
         self.ai_selector.setEnabled(True)
         self.piece_selector.setEnabled(True)
+        self.board_size_selector.setEnabled(True)
         self.start_game_button.setEnabled(True)
         #self.difficulty_selector.setEnabled(True)
         self.game_started = False  # Reset the game start status
@@ -335,20 +446,40 @@ class ReversiGUI(QMainWindow):
         self.score_widget = QWidget()
         self.score_widget.setLayout(self.score_layout)
 
+    def game_state(self):
+        # Snapshot of the position as an immutable GameState, for the history and the worker threads
+        return GameState.from_board(self.game_board, self.current_player, current_hash=self.current_hash, passes=self.passes)
+
+    def restore_state(self, state):
+        self.game_board, self.current_hash, self.current_player, self.passes = state.to_board(), state.hash, state.player, state.passes
+
+    def history_entry(self):
+        # The history keeps the move that led to each position, so undo and redo can show it again
+        return self.game_state(), self.last_move
+
+    def restore_entry(self, entry):
+        state, self.last_move = entry
+        self.restore_state(state)
+
     def undo_move(self):
         if self.undo_stack:
-            self.redo_stack.append((copy.deepcopy(self.game_board), self.current_hash, self.current_player))
-            self.game_board, self.current_hash, self.current_player = self.undo_stack.pop()
-            self.last_move = self.undo_stack[-1][0] if self.undo_stack else None
+            self.redo_stack.append(self.history_entry())
+            self.restore_entry(self.undo_stack.pop())
             self.update_board()
 
     def redo_move(self):
         if self.redo_stack:
-            self.undo_stack.append((copy.deepcopy(self.game_board), self.current_hash, self.current_player))
-            self.game_board, self.current_hash, self.current_player = self.redo_stack.pop()
-            self.last_move = self.redo_stack[-1][0] if self.redo_stack else None
+            self.undo_stack.append(self.history_entry())
+            self.restore_entry(self.redo_stack.pop())
             self.update_board()
 
+    def trim_history(self, target_bytes):
+        # Under memory pressure the oldest undo steps go first, then the redo steps
+        while self.redo_stack and deep_sizeof(self.undo_stack) + deep_sizeof(self.redo_stack) > target_bytes:
+            self.redo_stack.pop(0)
+        while self.undo_stack and deep_sizeof(self.undo_stack) > target_bytes:
+            self.undo_stack.pop(0)
+
     def change_ai(self, index):
         ai_choice = self.ai_selector.currentText()
         if ai_choice == "Greedy":
@@ -363,10 +494,40 @@ class ReversiGUI(QMainWindow):
             self.difficulty_label.setEnabled(True)  # Disable the label
             self.difficulty_selector.setEnabled(True)  # Disable the dropdown
             self.ai_move_function = find_best_move  # Use the function directly without self.
+        elif ai_choice == "Monte Carlo Tree Search":
+            self.difficulty_label.setEnabled(True)
+            self.difficulty_selector.setEnabled(True)
+            self.ai_move_function = find_mcts_move
         # Refresh AI move logic if the game has started and it's AI's turn
         if self.game_started and self.current_player == self.ai_player:
             QTimer.singleShot(500, self.perform_ai_move)
 
+    def change_board_size(self, index):
+        self.board_size = MIN_BOARD_SIZE + 2 * index
+        self.game_board = initialize_board(self.board_size)
+        self.current_hash = compute_hash(self.game_board, self.zobrist_keys)
+        self.passes = 0
+        self.current_player = 1
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.last_move = None
+        # Positions of different sizes may share a hash, so the caches start over
+        transposition_table.clear()
+        move_cache.clear()
+
+        # MCTS packs boards into 64-bit integers and is only offered on 8x8
+        self.ai_selector.model().item(self.ai_selector.findText("Monte Carlo Tree Search")).setEnabled(self.board_size == 8)
+        if self.board_size != 8 and self.ai_selector.currentText() == "Monte Carlo Tree Search":
+            self.ai_selector.setCurrentIndex(self.ai_selector.findText("Minimax with Iterative Deepening"))
+
+        # Rebuild the board grid for the new size
+        while self.grid_layout.count():
+            widget = self.grid_layout.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        self.addBoardWidgets()
+        self.update_board()
+
     def change_starting_piece(self, index):
         starting_piece = self.piece_selector.currentText()
         if starting_piece == "White":
@@ -389,8 +550,9 @@ class ReversiGUI(QMainWindow):
 
     def update_game_start(self):
         # Prepare or reset the game board, depending on your implementation
-        self.game_board = initialize_board()
+        self.game_board = initialize_board(self.board_size)
         self.current_hash = compute_hash(self.game_board, self.zobrist_keys)
+        self.passes = 0
 
         # Determine who starts based on the player's choice of color
         starting_piece = self.piece_selector.currentText()
@@ -423,14 +585,16 @@ class ReversiGUI(QMainWindow):
 
         self.ai_selector.setDisabled(True)
         self.piece_selector.setDisabled(True)
+        self.board_size_selector.setDisabled(True)
         self.start_game_button.setDisabled(True)
         self.difficulty_selector.setDisabled(True)
 
         self.ai_strategy = self.ai_selector.currentText()
 
         # Set the game board, initialize scores, and reset any necessary variables
-        self.game_board = initialize_board()
+        self.game_board = initialize_board(self.board_size)
         self.current_hash = compute_hash(self.game_board, self.zobrist_keys)
+        self.passes = 0
 
         # If the current player is the AI player, trigger the AI to make a move
         if self.current_player == self.ai_player:
@@ -440,29 +604,50 @@ class ReversiGUI(QMainWindow):
         self.show_legal_moves = state == Qt.Checked
         self.update_board()
 
+    def calibration_received(self, settings):
+        self.difficulty_settings = settings
+        self.change_difficulty(self.difficulty_selector.currentIndex())
+
+    def calibration_pending(self):
+        # The benchmark searches with the engine's shared tables, so searches start once it has finished
+        if self.calibration_worker.isRunning():
+            return True
+        if self.calibration_worker.settings is not None and self.difficulty_settings is not self.calibration_worker.settings:
+            self.calibration_received(self.calibration_worker.settings)
+        return False
+
+    def calibration_finished(self):
+        # Start the AI move or the move scores that were held back while calibrating
+        if self.ai_move_after_calibration:
+            self.ai_move_after_calibration = False
+            self.perform_ai_move()
+        else:
+            self.update_board()
+
     def change_difficulty(self, index):
-        depth_limits_original = {0: 5, 1: 6, 2: 6}
-        depth_limits_iterative = {0: 8, 1: 11 , 2: 15}
-        time_limits = {0: 2.0, 1: 5.0, 2: 10.0}  # Example time limits in seconds for each difficulty
+        # Depths, node budget and time limit come from the host calibration
+        level = ['easy', 'medium', 'hard'][index]
+        settings = self.difficulty_settings[level]
 
         # Set depths according to the AI strategy
-        self.ai_depth_original = depth_limits_original[index]
-        self.ai_depth_iterative = depth_limits_iterative[index]
-        self.ai_time_limit = time_limits[index]  # Time limit based on difficulty
+        self.ai_depth_original = settings['depth_original']
+        self.ai_depth_iterative = settings['depth_iterative']
+        self.ai_max_nodes = settings['max_nodes']
+        self.ai_time_limit = settings['time_limit']  # Time limit based on difficulty
+        self.ai_selective = level  # ProbCut and late-move reductions per difficulty
 
-        # Display the current setting
-        print(f"Difficulty set to {self.difficulty_selector.currentText()}, Original Depth: {self.ai_depth_original}, Iterative Depth: {self.ai_depth_iterative}, Time Limit: {self.ai_time_limit}s")
+        event_log.info('difficulty', difficulty=level, depth_original=self.ai_depth_original, depth_iterative=self.ai_depth_iterative,
+                       max_nodes=self.ai_max_nodes, time_limit=self.ai_time_limit)
 
     def make_move(self, row, col):
-        print(f"Making move at ({row}, {col}) with player {self.current_player}")
-        #print(f"Zobrist Keys: {self.zobrist_keys}")
-        print(f"Current Hash: {self.current_hash}")    
-        valid_moves_list = valid_moves(self.game_board, self.current_player)
+        event_log.info('move', player=self.current_player, row=row, col=col, hash=self.current_hash)
+        valid_moves_list = cached_moves(self.game_board, self.current_player, self.current_hash)
         if (row, col) in valid_moves_list:
             # Pass zobrist_keys and current_hash to the game_logic's make_move function
-            self.undo_stack.append((copy.deepcopy(self.game_board), self.current_hash, self.current_player))
+            self.undo_stack.append(self.history_entry())
             self.redo_stack.clear()  # Clear the redo stack whenever a new move is made
-            self.game_board, self.current_hash = game_logic.make_move(self.game_board, row, col, self.current_player, self.zobrist_keys, self.current_hash)
+            self.game_board, self.current_hash = game_logic.make_move(self.game_board, row, col, self.current_player, self.zobrist_keys, self.current_hash, self.passes)
+            self.passes = 0
             self.last_move = (row, col)
 
             self.update_board()
@@ -479,42 +664,73 @@ class ReversiGUI(QMainWindow):
     def perform_ai_move(self):
         if not self.game_started or self.current_player != self.ai_player:
             return
+        if self.calibration_pending():
+            self.ai_move_after_calibration = True
+            return
+        if self.analysis_worker is not None and self.analysis_worker.isRunning():
+            # Searches share the engine's budget state, so never run two at once: stop the
+            # analysis and start the move from its finished signal instead of blocking here
+            if not self.ai_move_waiting:
+                self.ai_move_waiting = True
+                self.analysis_worker.finished.connect(self.resume_ai_move)
+                self.analysis_worker.cancel()
+            return
 
         if self.ai_strategy == "Greedy":
             ai_function = find_greedy_move
             worker_args = {
-                'board': self.game_board.copy(),
-                'player': self.current_player,
+                'state': self.game_state(),
                 'ai_function': ai_function
             }
+        elif self.ai_strategy == "Monte Carlo Tree Search":
+            ai_function = find_mcts_move
+            worker_args = {
+                'state': self.game_state(),
+                'ai_function': ai_function,
+                'time_limit': self.ai_time_limit
+            }
         elif self.ai_strategy == "Minimax with Iterative Deepening":
             ai_function = find_best_move
             worker_args = {
-                'board': self.game_board.copy(),
-                'player': self.current_player,
+                'state': self.game_state(),
                 'ai_function': ai_function,
                 'zobrist_keys': self.zobrist_keys,
-                'current_hash': self.current_hash,
-                'depth': self.ai_depth_iterative
+                'depth': self.ai_depth_iterative,
+                'time_limit': self.ai_time_limit,
+                'selective': self.ai_selective,
+                'max_nodes': self.ai_max_nodes
             }
         else:  # Default to original Minimax
             ai_function = find_best_move_original
             worker_args = {
-                'board': self.game_board.copy(),
-                'player': self.current_player,
+                'state': self.game_state(),
                 'ai_function': ai_function,
                 'zobrist_keys': self.zobrist_keys,
-                'current_hash': self.current_hash,
-                'depth': self.ai_depth_original
+                'depth': self.ai_depth_original,
+                'time_limit': self.ai_time_limit,
+                'selective': self.ai_selective,
+                'max_nodes': self.ai_max_nodes
             }
 
         self.ai_worker = AiWorker(**worker_args)
         self.ai_worker.moveComputed.connect(self.ai_move_received)
+        self.ai_request_time = perf_counter()
         self.ai_worker.start()
 
+    def resume_ai_move(self):
+        self.ai_move_waiting = False
+        self.perform_ai_move()
+
     def ai_move_received(self, move):
-        print("Received move from AI:", move)
-        if move and isinstance(move, tuple) and (move[0], move[1]) in valid_moves(self.game_board, self.current_player):
+        fields = {'strategy': self.ai_strategy, 'move': move, 'seconds': perf_counter() - self.ai_request_time}
+        if self.ai_strategy == "Monte Carlo Tree Search":
+            fields['playouts'] = mcts_engine.last_playouts
+        elif self.ai_strategy != "Greedy":
+            fields.update(nodes=last_search_stats['nodes'], depth=last_search_stats['depth'], elapsed=last_search_stats['elapsed'])
+        event_log.info('ai_move', **fields)
+        if self.ai_strategy == "Monte Carlo Tree Search":
+            self.show_temporary_message(f"MCTS: {mcts_engine.last_playouts} playouts, {mcts_engine.playouts_per_second:.0f}/s", 3000)
+        if move and isinstance(move, tuple) and (move[0], move[1]) in cached_moves(self.game_board, self.current_player, self.current_hash):
             self.make_move(move[0], move[1])
 
     def switch_player(self):
@@ -530,40 +746,11 @@ class ReversiGUI(QMainWindow):
     def check_game_end(self):
         black_count = sum(row.count(1) for row in self.game_board)
         white_count = sum(row.count(2) for row in self.game_board)
-        if black_count == 0 or white_count == 0 or black_count + white_count == 64:
+        if black_count == 0 or white_count == 0 or black_count + white_count == self.board_size ** 2:
             #self.show_temporary_message(f"Game over. {'Black' if black_count > white_count else 'White'} wins.", 5000)
             return True
         return False
 
-    def simulate_move(self, temp_board, row, col, player):
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
-        to_flip = []
-
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            flip = []
-            while 0 <= r < len(temp_board) and 0 <= c < len(temp_board[0]) and temp_board[r][c] == 3 - player:
-                flip.append((r, c))
-                r += dr
-                c += dc
-            if 0 <= r < len(temp_board) and 0 <= c < len(temp_board[0]) and temp_board[r][c] == player and flip:
-                to_flip.extend(flip)
-
-        if to_flip:
-            temp_board[row][col] = player  # Actually apply the move
-            for r, c in to_flip:
-                temp_board[r][c] = player
-            return len(to_flip)
-        return 0  # Return the number of pieces flipped
-
-    def calculate_greedy_gain(self, row, col):
-        # Clone the current board
-        temp_board = [list(r) for r in self.game_board]
-        # Assume player is the current player
-        player = self.current_player
-        # Calculate potential gains by simulating the move
-        return self.simulate_move(temp_board, row, col, player)
-
     def update_board(self):
         black_count = sum(row.count(1) for row in self.game_board)
         white_count = sum(row.count(2) for row in self.game_board)
@@ -572,7 +759,7 @@ class ReversiGUI(QMainWindow):
         black_disc_icon = QIcon('Media/black_disk.png')
         white_disc_icon = QIcon('Media/white_disk.png')
         grey_circle_icon = QIcon('Media/grey_disk.png')  # Load the grey circle icon
-        size = QSize(64, 64)
+        size = QSize(64 * 8 // self.board_size, 64 * 8 // self.board_size)
         undo_button = self.findChild(QPushButton, "undoButton")  # Make sure button names are set correctly in setupSidePanel
         redo_button = self.findChild(QPushButton, "redoButton")
 
@@ -582,8 +769,15 @@ class ReversiGUI(QMainWindow):
 
         last_move = self.last_move if hasattr(self, 'last_move') else None  # Track the last move
 
-        for i in range(8):
-            for j in range(8):
+        # Legal moves and their flip counts for the human player, computed once for the whole board
+        human_moves = game_logic.moves_with_flips(self.game_board, self.current_player) if self.current_player == self.human_player else {}
+        show_scores = self.move_scores_checkbox.isChecked() and bool(human_moves)
+        if show_scores:
+            self.request_move_scores()
+        scores = self.move_scores if self.move_scores_key == (self.current_hash, self.current_player) else {}
+
+        for i in range(self.board_size):
+            for j in range(self.board_size):
                 self.buttons[i][j].setIconSize(size)
                 if self.game_board[i][j] == 1:
                     self.buttons[i][j].setIcon(black_disc_icon)
@@ -599,21 +793,51 @@ class ReversiGUI(QMainWindow):
                     self.buttons[i][j].setStyleSheet("")
 
                 # Show valid moves for the human player with a grey circle
-                if self.current_player == self.human_player and self.show_legal_moves and (i, j) in valid_moves(self.game_board, self.current_player):
+                if self.show_legal_moves and (i, j) in human_moves:
                     # Show legal moves for the current player
                     self.buttons[i][j].setIcon(grey_circle_icon)
-                    self.buttons[i][j].setIconSize(QSize(45, 45))
+                    self.buttons[i][j].setIconSize(QSize(45 * 8 // self.board_size, 45 * 8 // self.board_size))
                 else:
                     if self.game_board[i][j] == 0:
                         self.buttons[i][j].setIcon(QIcon())
 
-                if self.current_player == self.human_player and self.greedy_hints_checkbox.isChecked() and (i, j) in valid_moves(self.game_board, self.current_player):
-                    potential_gain = self.calculate_greedy_gain(i, j)
+                if show_scores and (i, j) in scores:
+                    self.buttons[i][j].setText(f"{scores[(i, j)]:+.1f}")  # Search score of the move
+                elif self.greedy_hints_checkbox.isChecked() and (i, j) in human_moves:
+                    potential_gain = human_moves[(i, j)][0]
                     self.buttons[i][j].setText(str(potential_gain))  # Show potential gain on the button
                     
                 else:
                     self.buttons[i][j].setText("")
              
+    def request_move_scores(self):
+        # Scores are searched in the background once per position; the board is redrawn when they arrive
+        key = (self.current_hash, self.current_player)
+        if self.move_scores_key == key or (self.analysis_worker is not None and self.analysis_worker.isRunning()):
+            return
+        if self.ai_move_waiting or (self.ai_worker is not None and self.ai_worker.isRunning()):
+            return  # The AI's search has the engine; the scores are requested again once it has moved
+        if self.calibration_pending():
+            return
+        self.analysis_worker = AnalysisWorker(self.game_state(), self.zobrist_keys, self.analysis_depth, self.analysis_time_limit)
+        self.analysis_worker.scoresComputed.connect(self.move_scores_received)
+        self.analysis_worker.start()
+
+    def move_scores_received(self, result):
+        self.move_scores_key, self.move_scores = result
+        self.update_board()
+
+    def toggle_profiling(self, state):
+        if state != Qt.Checked:
+            profiling.disable()
+            return
+        profiling.enable(self.profile_dir)
+        self.show_temporary_message(f"Profiling AI moves into {self.profile_dir}", 3000)
+
+    def dump_log(self):
+        count = event_log.dump(LOG_DUMP_FILE)
+        self.show_temporary_message(f"Saved {count} log events to {LOG_DUMP_FILE}", 3000)
+
     def show_temporary_message(self, message, duration):
         self.label_status.setText(message)
         QTimer.singleShot(duration, self.clear_status_message)
@@ -1,11 +1,19 @@
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
 from gui import ReversiGUI
+from event_log import event_log
+import profiling
 
 def main():
     """
     Main function to start the Reversi game application.
     """
+    event_log.stream_to(sys.stderr)  # Console output from a background thread, never from the GUI thread
+    if '--profile' in sys.argv[1:-1]:  # python main.py --profile DIR profiles every AI move into DIR
+        index = sys.argv.index('--profile')
+        profiling.enable(sys.argv[index + 1], os.environ.get('REVERSI_PROFILE_MODE', 'sample').lower())
+        del sys.argv[index:index + 2]
     app = QApplication(sys.argv)  # Create an application object for PyQt
     ex = ReversiGUI()             # Create an instance of the ReversiGUI class
     ex.show()                     # Show the main window
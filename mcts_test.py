@@ -0,0 +1,32 @@
+import unittest
+from ai import MctsEngine
+from game_logic import initialize_board, valid_moves, make_move
+
+class TestMcts(unittest.TestCase):
+    def test_returns_legal_move_and_reuses_subtree(self):
+        engine = MctsEngine(seed=3)
+        board = initialize_board()
+        move = engine.search(board, 1, playouts=500)
+        self.assertIn(move, valid_moves(board, 1))
+        self.assertGreater(engine.playouts_per_second, 0)
+
+        make_move(board, move[0], move[1], 1)
+        reply = valid_moves(board, 2)[0]
+        make_move(board, reply[0], reply[1], 2)
+        move = engine.search(board, 1, playouts=100)
+        self.assertIn(move, valid_moves(board, 1))
+        self.assertGreater(engine.reused_visits, 0)
+        self.assertEqual(engine.visits[engine.root], engine.reused_visits + 100)
+
+    def test_release_keeps_the_tree_of_a_running_search(self):
+        engine = MctsEngine(seed=3)
+        engine.search(initialize_board(), 1, playouts=100)
+        nodes = engine.node_count
+        with engine._lock:  # As held by a search on another thread
+            engine.release()
+        self.assertEqual(engine.node_count, nodes)
+        engine.release()
+        self.assertEqual(engine.node_count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
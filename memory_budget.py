@@ -0,0 +1,151 @@
+"""
+Process-wide memory budget for the engine's caches.
+
+Caches register a function reporting their footprint in bytes and, if they
+can give memory back, a function shrinking them to a target footprint. The
+governor sums the reports and, once the total passes the per-process limit,
+shrinks registered caches in priority order (cheapest to rebuild first) until
+the total is back under a low-water mark below the limit.
+
+Footprints are estimated by size accounting: a sample of entries is measured
+with sys.getsizeof and scaled to the cache's length, which stays cheap for
+caches with millions of entries. With tracemalloc tracing, report() also shows
+the traced total for comparison.
+
+The limit comes from REVERSI_MEMORY_LIMIT (e.g. "512M" or "2G"), otherwise half
+of the container's cgroup memory limit, otherwise no limit.
+"""
+import itertools
+import os
+import sys
+from time import monotonic
+
+LOW_WATER = 0.8  # Shrinking stops at this fraction of the limit, leaving room to grow again
+CHECK_PERIOD = 0.1  # check() enforces the budget at most this often, in seconds
+SAMPLE_ENTRIES = 32
+
+SIZE_SUFFIXES = {'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+CGROUP_LIMIT_FILES = ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+
+
+def parse_size(text):
+    """ Parses a byte count such as '1048576', '512M' or '2g'. """
+    text = text.strip().lower().rstrip('b')
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def default_limit():
+    """ REVERSI_MEMORY_LIMIT, else half the cgroup memory limit, else None (unlimited). """
+    if os.environ.get('REVERSI_MEMORY_LIMIT'):
+        return parse_size(os.environ['REVERSI_MEMORY_LIMIT'])
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "no limit" as a huge number close to 2**63
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value) // 2
+    return None
+
+
+def deep_sizeof(obj, seen=None):
+    """ Bytes used by an object and the containers, numbers and strings it references. """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or obj is None or isinstance(obj, bool) or (type(obj) is int and -5 <= obj <= 256):
+        return 0  # Already counted, or a singleton shared by the whole interpreter
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(type(obj), '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, name, None), seen) for name in type(obj).__slots__)
+    return size
+
+
+def mapping_footprint(mapping, samples=SAMPLE_ENTRIES):
+    """ Estimated bytes of a dict: its hash table plus sampled entries scaled to its length. """
+    if not mapping:
+        return sys.getsizeof(mapping)
+    sample = list(itertools.islice(mapping.items(), samples))
+    per_entry = sum(deep_sizeof(key) + deep_sizeof(value) for key, value in sample) / len(sample)
+    return sys.getsizeof(mapping) + int(per_entry * len(mapping))
+
+
+class MemoryGovernor:
+    def __init__(self, limit=None):
+        self.limit = limit
+        self._caches = {}
+        self._last_check = monotonic()
+        self.shrinks = 0
+
+    def register(self, name, footprint, shrink=None, priority=0):
+        """
+        Adds a cache to the budget.
+
+        Args:
+            name (str): Unique name of the cache; registering a name again replaces it.
+            footprint (callable): Returns the cache's current size in bytes.
+            shrink (callable, optional): Called with a target size in bytes; evicts entries
+                until the cache is at most that big. None for caches that only report.
+            priority (int, optional): Lower priorities are shrunk first.
+        """
+        self._caches[name] = (footprint, shrink, priority)
+
+    def unregister(self, name):
+        self._caches.pop(name, None)
+
+    def usage(self):
+        """ Current footprint of every registered cache in bytes. """
+        return {name: footprint() for name, (footprint, _, _) in self._caches.items()}
+
+    def total(self):
+        return sum(self.usage().values())
+
+    def report(self):
+        result = {'limit': self.limit, 'caches': self.usage(), 'shrinks': self.shrinks}
+        result['total'] = sum(result['caches'].values())
+        tracemalloc = sys.modules.get('tracemalloc')  # Whoever started tracing has imported it
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            result['traced'] = tracemalloc.get_traced_memory()[0]
+        return result
+
+    def enforce(self):
+        """ Shrinks caches until the total is under the low-water mark; returns the bytes freed. """
+        if self.limit is None:
+            return 0
+        usage = self.usage()
+        total = sum(usage.values())
+        if total <= self.limit:
+            return 0
+        excess = total - int(self.limit * LOW_WATER)
+        freed = 0
+        for name, (footprint, shrink, _) in sorted(self._caches.items(), key=lambda item: item[1][2]):
+            if excess <= 0:
+                break
+            if shrink is None or usage[name] == 0:
+                continue
+            shrink(max(usage[name] - excess, 0))
+            released = usage[name] - footprint()
+            freed += released
+            excess -= released
+        self.shrinks += 1
+        return freed
+
+    def check(self):
+        """ Cheap call for hot paths: enforces the budget if CHECK_PERIOD has passed since the last check. """
+        if self.limit is None:
+            return
+        now = monotonic()
+        if now - self._last_check >= CHECK_PERIOD:
+            self._last_check = now
+            self.enforce()
+
+
+memory_governor = MemoryGovernor(default_limit())
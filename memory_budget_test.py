@@ -0,0 +1,51 @@
+import unittest
+import ai
+from memory_budget import MemoryGovernor, parse_size, mapping_footprint
+from move_cache import MoveCache
+from probcut import random_positions
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parse_size('512M'), 512 << 20)
+        self.assertEqual(parse_size('2g'), 2 << 30)
+        self.assertEqual(parse_size('1000'), 1000)
+
+    def test_enforce_shrinks_low_priority_caches_first(self):
+        caches = {'cheap': {i: [i + 1000] * 20 for i in range(2000)}, 'dear': {i: [i + 1000] * 20 for i in range(2000)}}
+        def shrinker(name):
+            def shrink(target):
+                cache = caches[name]
+                keep = int(target / (mapping_footprint(cache) / len(cache)))
+                caches[name] = dict(list(cache.items())[len(cache) - keep:])
+            return shrink
+        governor = MemoryGovernor()
+        governor.register('cheap', lambda: mapping_footprint(caches['cheap']), shrinker('cheap'), priority=0)
+        governor.register('dear', lambda: mapping_footprint(caches['dear']), shrinker('dear'), priority=1)
+        dear_size = governor.usage()['dear']
+        governor.limit = int(governor.total() * 0.75)
+        self.assertGreater(governor.enforce(), 0)
+        self.assertLessEqual(governor.total(), governor.limit)
+        # Size estimates are approximate, so only most of the cut has to come from the cheap cache
+        self.assertGreater(governor.usage()['dear'], 0.9 * dear_size)
+        self.assertLess(governor.usage()['cheap'], 0.5 * dear_size)
+
+    def test_engine_caches_shrink(self):
+        cache = MoveCache()
+        for board, player in random_positions(50, seed=1):
+            cache.get(board, player)
+        target = cache.footprint() // 2
+        cache.shrink(target)
+        self.assertLessEqual(cache.footprint(), target)
+        self.assertLess(len(cache), 50)
+
+        ai.transposition_table.clear()
+        board, player = random_positions(1, seed=3)[0]
+        ai.search_position(board, player, 4, ai.zobrist_keys, ai.compute_hash(board, ai.zobrist_keys, player))
+        deepest = max(entry[0] for entry in ai.transposition_table.values())
+        entries = len(ai.transposition_table)
+        ai.shrink_transposition_table(mapping_footprint(ai.transposition_table) // 4)
+        self.assertLess(len(ai.transposition_table), entries / 3)
+        self.assertIn(deepest, [entry[0] for entry in ai.transposition_table.values()])
+
+if __name__ == '__main__':
+    unittest.main()
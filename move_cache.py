@@ -0,0 +1,109 @@
+"""
+Bounded cache of generated moves, shared by search, evaluation and the GUI.
+
+Entries are keyed by (Zobrist hash, side to move) when the caller knows the
+hash, or by the packed bitboards otherwise, and hold the legal move list, the
+legal move bitboard and both sides' mobility. The least recently used entry is
+evicted once the cache is full.
+"""
+from collections import OrderedDict, namedtuple
+
+from game_logic import board_to_bitboards, legal_moves_mask
+from memory_budget import memory_governor, mapping_footprint
+
+MoveInfo = namedtuple('MoveInfo', ['moves', 'mask', 'mobility', 'opponent_mobility'])
+
+
+class MoveCache:
+    def __init__(self, max_entries=200_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hit_rate}
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def footprint(self):
+        return mapping_footprint(self._entries)
+
+    def shrink(self, target_bytes):
+        """ Evicts least recently used entries until the cache is estimated to fit in target_bytes. """
+        # Entry sizes vary, so the estimate is refreshed until the cache fits. The
+        # survivors are copied into a fresh table because dicts never shrink on deletion.
+        while self._entries and self.footprint() > target_bytes:
+            keep = min(int(target_bytes / (self.footprint() / len(self._entries))), len(self._entries) - 1)
+            self.evictions += len(self._entries) - keep
+            self._entries = OrderedDict(list(self._entries.items())[len(self._entries) - keep:])
+
+    def get(self, board, player, current_hash=None):
+        """
+        Returns the MoveInfo of a position, generating it on a miss.
+
+        Args:
+            board (list of lists): The current game board.
+            player (int): The side to move.
+            current_hash (int, optional): Zobrist hash of the board; without it the key is the packed board.
+        """
+        packed = None
+        size = len(board)
+        if current_hash is not None:
+            key = (current_hash, player)
+        else:
+            packed = board_to_bitboards(board)
+            key = packed + (player, size)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        black, white = packed or board_to_bitboards(board)
+        own, opp = (black, white) if player == 1 else (white, black)
+        mask = legal_moves_mask(own, opp, size)
+        moves = []
+        remaining = mask
+        while remaining:  # Set bits in ascending order, i.e. row-major
+            bit = remaining & -remaining
+            remaining ^= bit
+            moves.append(divmod(bit.bit_length() - 1, size))
+        entry = MoveInfo(moves, mask, len(moves), legal_moves_mask(opp, own, size).bit_count())
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def mobility(self, board, player, current_hash=None):
+        """ (player mobility, opponent mobility), reusing the opponent's entry when only that one is cached. """
+        if current_hash is not None and (current_hash, player) not in self._entries:
+            entry = self._entries.get((current_hash, 3 - player))
+            if entry is not None:
+                self.hits += 1
+                return entry.opponent_mobility, entry.mobility
+        entry = self.get(board, player, current_hash)
+        return entry.mobility, entry.opponent_mobility
+
+
+move_cache = MoveCache()
+memory_governor.register('move_cache', move_cache.footprint, move_cache.shrink, priority=1)
+
+
+def cached_moves(board, player, current_hash=None):
+    """ Legal (row, col) moves of a position through the shared cache. """
+    return move_cache.get(board, player, current_hash).moves
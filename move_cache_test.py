@@ -0,0 +1,20 @@
+import unittest
+from game_logic import initialize_board, valid_moves
+from move_cache import MoveCache
+
+class TestMoveCache(unittest.TestCase):
+    def test_hits_and_eviction(self):
+        cache = MoveCache(max_entries=2)
+        board = initialize_board()
+        info = cache.get(board, 1, current_hash=123)
+        self.assertEqual(info.moves, valid_moves(board, 1))
+        self.assertEqual((info.mobility, info.opponent_mobility), (4, 4))
+        self.assertIs(cache.get(board, 1, current_hash=123), info)
+        cache.get(board, 2, current_hash=123)
+        cache.get(board, 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(len(cache), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Offline calibration of the Multi-ProbCut parameters used by ai.minimax.
+
+For every (deep depth, shallow depth) pair, full-width searches of both depths
+are run on a set of positions and the deep score is regressed on the shallow
+one: deep ~ a * shallow + b, with sigma the standard deviation of the
+residuals. The result is written to probcut.json, which ai.py loads at startup.
+
+Run with:
+    python probcut.py --data selfplay_data --positions 200 --out probcut.json
+"""
+import argparse
+import itertools
+import json
+import random
+
+import numpy as np
+
+import ai
+from game_logic import initialize_board, valid_moves, make_move, bitboards_to_board
+
+DEFAULT_PAIRS = ((3, 1), (4, 2), (5, 1), (5, 3), (6, 2), (6, 4))
+
+
+def random_positions(count, seed=1, min_plies=6, max_plies=50):
+    """ Positions reached by random play, as (board, side to move) pairs with at least one legal move. """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board, player = initialize_board(), 1
+        for _ in range(rng.randint(min_plies, max_plies)):
+            moves = valid_moves(board, player)
+            if not moves:
+                player = 3 - player
+                moves = valid_moves(board, player)
+                if not moves:
+                    break
+            row, col = rng.choice(moves)
+            make_move(board, row, col, player)
+            player = 3 - player
+        if valid_moves(board, player):
+            positions.append((board, player))
+    return positions
+
+
+def dataset_positions(paths, count, seed=1):
+    """ A random sample of recorded self-play positions as (board, side to move) pairs. """
+    from selfplay import iter_positions
+    rng = random.Random(seed)
+    sample = []
+    for index, position in enumerate(iter_positions(paths)):
+        # Reservoir sampling keeps memory bounded for any dataset size
+        if len(sample) < count:
+            sample.append(position)
+        else:
+            slot = rng.randint(0, index)
+            if slot < count:
+                sample[slot] = position
+    return [(bitboards_to_board(p.black, p.white), p.side) for p in sample]
+
+
+def search_score(board, player, depth):
+    """ Full-width Minimax score of a position for the side to move, with a fresh transposition table. """
+    ai.transposition_table.clear()
+    current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+    return float(ai.minimax([row[:] for row in board], depth, float('-inf'), float('inf'), True, player, ai.zobrist_keys, current_hash))
+
+
+def calibrate(positions, pairs=DEFAULT_PAIRS):
+    """ Fits (a, b, sigma) for every (deep, shallow) depth pair. """
+    depths = sorted(set(itertools.chain.from_iterable(pairs)))
+    scores = {depth: np.array([search_score(board, player, depth) for board, player in positions]) for depth in depths}
+    results = []
+    for deep, shallow in pairs:
+        a, b = np.polyfit(scores[shallow], scores[deep], 1)
+        a = max(a, 0.1)  # The cut test divides by a and assumes deep scores grow with shallow ones
+        sigma = float(np.std(scores[deep] - (a * scores[shallow] + b)))
+        results.append({'depth': deep, 'shallow': shallow, 'a': float(a), 'b': float(b), 'sigma': max(sigma, 1e-3)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate Multi-ProbCut parameters.")
+    parser.add_argument('--data', nargs='*', default=None, help="Self-play data to sample positions from")
+    parser.add_argument('--positions', type=int, default=100)
+    parser.add_argument('--pairs', default=None, help="Depth pairs as deep:shallow,..., e.g. 3:1,4:2")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', default='probcut.json')
+    args = parser.parse_args()
+
+    pairs = DEFAULT_PAIRS
+    if args.pairs:
+        pairs = tuple(tuple(int(d) for d in pair.split(':')) for pair in args.pairs.split(','))
+    if args.data:
+        positions = dataset_positions(args.data, args.positions, args.seed)
+    else:
+        positions = random_positions(args.positions, args.seed)
+    results = calibrate(positions, pairs)
+    with open(args.out, 'w') as f:
+        json.dump({'positions': len(positions), 'pairs': results}, f, indent=2)
+    for pair in results:
+        print(f"depth {pair['depth']} <- {pair['shallow']}: a={pair['a']:.3f} b={pair['b']:.3f} sigma={pair['sigma']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Per-move profiles of AI searches, written as flame-graph input.
+
+While ai.move_profiler is set, every find_best_move and
+find_best_move_original call is profiled and written to the profiler's
+directory, one file per move:
+
+- 'sample' mode (the default) runs a thread that records the search thread's
+  Python stack every interval seconds and writes collapsed stacks
+  (PID-NNNNN-engine-dD-difficulty.folded, one "frame;frame;frame count" line per
+  stack), as read by flamegraph.pl, speedscope or inferno. The outermost frame
+  of every stack names the move ("iterative depth 6 medium"), so the files of
+  many moves can be concatenated and compared. While a move is sampled, the
+  interpreter's switch interval is lowered to the sampling interval for the
+  whole process, so other threads also switch more often.
+- 'cprofile' mode runs the search under cProfile and writes its statistics
+  (.prof, read by pstats, snakeviz or flameprof) instead.
+
+index.jsonl in the same directory gets one line per move with the file name,
+position (64-character board string as read by analyze.py), side to move,
+engine, depth, difficulty, time, sample count and the search statistics.
+
+Profiling starts with REVERSI_PROFILE=<directory> (and REVERSI_PROFILE_MODE),
+main.py --profile <directory>, the GUI's "Profile AI Moves" toggle or
+enable() in code. To profile the search of one position:
+    python profiling.py profiles --position f5d6c3 --depth 6 --selective medium
+"""
+import os
+import sys
+import threading
+from collections import Counter
+from time import perf_counter
+from event_log import board_text
+
+MODES = ('sample', 'cprofile')
+SAMPLE_INTERVAL = 0.001
+INDEX_FILE = 'index.jsonl'
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the Python stack of one thread below a given frame.
+
+    Only stacks whose outermost frame below root_frame runs code are kept, so
+    samples taken while the thread enters or leaves the sampled call are dropped.
+    While sampling, the interpreter's switch interval, which applies to every
+    thread of the process, is lowered to the sampling interval.
+    """
+
+    def __init__(self, thread_id, root_frame, code, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.code = code
+        self.interval = interval
+        self.stacks = Counter()  # Tuples of code objects, outermost first
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='move-profiler', daemon=True)
+
+    def _run(self):
+        current_frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root_frame:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if frame is not None and stack and stack[-1] is self.code:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def __enter__(self):
+        # The sampler only runs when the search thread lets go of the GIL, at most every switch interval
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def collapsed(self, label):
+        """ Collapsed-stack lines, heaviest first, with label as the outermost frame. """
+        names = {}
+        lines = Counter()
+        for stack, count in self.stacks.items():
+            frames = [names.setdefault(code, frame_name(code)) for code in stack]
+            lines[';'.join([label] + frames)] += count
+        return [f"{stack} {count}" for stack, count in lines.most_common()]
+
+
+class MoveProfiler:
+    def __init__(self, directory, mode='sample', interval=SAMPLE_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {', '.join(MODES)}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        self.moves = 0
+        self._lock = threading.Lock()
+
+    def capture(self, function, args, board, player, engine, depth, selective=None):
+        """ Calls function(*args) under the profiler and writes its profile; returns what function returned. """
+        with self._lock:
+            self.moves += 1
+            number = self.moves
+        difficulty = selective or 'full'
+        name = f"{os.getpid()}-{number:05d}-{engine}-d{depth}-{difficulty}"
+        start = perf_counter()
+        if self.mode == 'cprofile':
+            import cProfile
+            profile = cProfile.Profile()
+            result = profile.runcall(function, *args)
+            seconds = perf_counter() - start
+            file_name = name + '.prof'
+            profile.dump_stats(os.path.join(self.directory, file_name))
+            samples = None
+        else:
+            with StackSampler(threading.get_ident(), sys._getframe(), function.__code__, self.interval) as sampler:
+                result = function(*args)
+            seconds = perf_counter() - start
+            file_name = name + '.folded'
+            lines = sampler.collapsed(f"{engine} depth {depth} {difficulty}")
+            with open(os.path.join(self.directory, file_name), 'w') as f:
+                f.write(''.join(line + '\n' for line in lines))
+            samples = sum(sampler.stacks.values())
+        self._write_index(file_name, board, player, engine, depth, difficulty, seconds, samples)
+        return result
+
+    def _write_index(self, file_name, board, player, engine, depth, difficulty, seconds, samples):
+        import json
+        from ai import last_search_stats
+        entry = {'file': file_name, 'position': board_text(board), 'player': player, 'engine': engine,
+                 'depth': depth, 'difficulty': difficulty, 'seconds': round(seconds, 4), 'samples': samples,
+                 'nodes': last_search_stats['nodes'], 'completed_depth': last_search_stats['depth']}
+        with self._lock, open(os.path.join(self.directory, INDEX_FILE), 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+
+def enable(directory, mode='sample', interval=SAMPLE_INTERVAL):
+    """ Profiles every following AI move of this process into directory; returns the profiler. """
+    import ai
+    ai.move_profiler = MoveProfiler(directory, mode, interval)
+    return ai.move_profiler
+
+
+def disable():
+    import ai
+    ai.move_profiler = None
+
+
+def from_environment(environ=os.environ):
+    """ The profiler configured by REVERSI_PROFILE and REVERSI_PROFILE_MODE, or None. """
+    directory = environ.get('REVERSI_PROFILE')
+    if not directory:
+        return None
+    return MoveProfiler(directory, environ.get('REVERSI_PROFILE_MODE', 'sample').lower())
+
+
+def main():
+    import argparse
+    import ai
+    from analyze import parse_position
+    parser = argparse.ArgumentParser(description="Profile the AI's search of one position.")
+    parser.add_argument('directory', help="Directory for the profile and its index entry")
+    parser.add_argument('--position', default='start', help="Move sequence or board string, as for analyze.py")
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--engine', choices=['minimax', 'iterative'], default='iterative')
+    parser.add_argument('--selective', choices=['easy', 'medium', 'hard'], default=None)
+    parser.add_argument('--mode', choices=MODES, default='sample')
+    parser.add_argument('--interval', type=float, default=SAMPLE_INTERVAL, help="Seconds between stack samples")
+    args = parser.parse_args()
+
+    board, player = parse_position(args.position)
+    current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+    profiler = enable(args.directory, args.mode, args.interval)
+    if args.engine == 'iterative':
+        ai.find_best_move(board, player, ai.zobrist_keys, current_hash, args.depth, selective=args.selective)
+    else:
+        ai.find_best_move_original(board, player, args.depth, ai.zobrist_keys, current_hash, selective=args.selective)
+    print(f"Profile written to {args.directory} ({profiler.moves} move, index in {INDEX_FILE})")
+
+
+if __name__ == '__main__':
+    main()
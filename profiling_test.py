@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+
+import ai
+import profiling
+from game_logic import initialize_board
+
+
+class MoveProfilerTest(unittest.TestCase):
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = temporary.name
+        self.board = initialize_board()
+        self.current_hash = ai.compute_hash(self.board, ai.zobrist_keys, 1)
+        self.addCleanup(profiling.disable)
+
+    def index(self):
+        with open(os.path.join(self.directory, profiling.INDEX_FILE)) as f:
+            return [json.loads(line) for line in f]
+
+    def test_sampled_moves_write_collapsed_stacks_and_index(self):
+        profiling.enable(self.directory, interval=0.0005)
+        move = ai.find_best_move(self.board, 1, ai.zobrist_keys, self.current_hash, 4, selective='medium')
+        profiling.disable()
+        self.assertEqual(move, ai.find_best_move(self.board, 1, ai.zobrist_keys, self.current_hash, 4, selective='medium'))
+        entry, = self.index()
+        self.assertEqual((entry['engine'], entry['depth'], entry['difficulty'], entry['player']), ('iterative', 4, 'medium', 1))
+        self.assertEqual(entry['position'], '-' * 27 + 'OX------XO' + '-' * 27)
+        with open(os.path.join(self.directory, entry['file'])) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(sum(int(line.rsplit(' ', 1)[1]) for line in lines), entry['samples'])
+        for line in lines:
+            frames = line.rsplit(' ', 1)[0].split(';')
+            self.assertEqual(frames[:2], ['iterative depth 4 medium', 'iterative_search (ai.py:%d)' % ai.iterative_search.__code__.co_firstlineno])
+
+    def test_cprofile_mode_writes_stats(self):
+        import pstats
+        profiling.enable(self.directory, mode='cprofile')
+        ai.find_best_move_original(self.board, 1, 3, ai.zobrist_keys, self.current_hash)
+        entry, = self.index()
+        self.assertTrue(entry['file'].endswith('-minimax-d3-full.prof'))
+        functions = {name for _, _, name in pstats.Stats(os.path.join(self.directory, entry['file'])).stats}
+        self.assertIn('minimax', functions)
+
+    def test_environment_configuration(self):
+        self.assertIsNone(profiling.from_environment({}))
+        profiler = profiling.from_environment({'REVERSI_PROFILE': self.directory, 'REVERSI_PROFILE_MODE': 'cProfile'})
+        self.assertEqual((profiler.directory, profiler.mode), (self.directory, 'cprofile'))
+        with self.assertRaises(ValueError):
+            profiling.MoveProfiler(self.directory, mode='perf')
+
+
+if __name__ == '__main__':
+    unittest.main()
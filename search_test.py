@@ -0,0 +1,132 @@
+import unittest
+import ai
+from game_logic import valid_moves, make_move
+from probcut import random_positions
+
+def reference_minimax(board, depth, maximizing_player, player, root_player):
+    moves = valid_moves(board, player)
+    if depth == 0 or not moves:
+        return ai.evaluate_board(ai.convert_board(board), root_player)
+    values = []
+    for row, col in moves:
+        child = [r[:] for r in board]
+        make_move(child, row, col, player)
+        values.append(reference_minimax(child, depth - 1, not maximizing_player, 3 - player, root_player))
+    return max(values) if maximizing_player else min(values)
+
+class TestSearch(unittest.TestCase):
+    def test_alpha_beta_matches_plain_minimax(self):
+        for board, player in random_positions(8, seed=4):
+            ai.transposition_table.clear()
+            current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+            for depth in (1, 2, 3):
+                _, score = ai.search_position(board, player, depth, ai.zobrist_keys, current_hash)
+                best = max(reference_minimax(make_move([r[:] for r in board], row, col, player)[0], depth - 1, False, 3 - player, player)
+                           for row, col in valid_moves(board, player))
+                self.assertAlmostEqual(score, best)
+
+    def test_multi_pv_scores_match_plain_minimax(self):
+        for board, player in random_positions(4, seed=6):
+            current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+            expected = sorted((reference_minimax(make_move([r[:] for r in board], row, col, player)[0], 2, False, 3 - player, player)
+                               for row, col in valid_moves(board, player)), reverse=True)
+            for k in (None, 2):
+                ai.transposition_table.clear()
+                lines = ai.multi_pv_search(board, player, ai.zobrist_keys, current_hash, 3, k)
+                self.assertEqual(len(lines), len(expected) if k is None else min(k, len(expected)))
+                for (move, score, pv), value in zip(lines, expected):
+                    self.assertAlmostEqual(score, value)
+                    self.assertEqual(pv[0], move)
+
+    def test_iterative_search_returns_the_deepest_iteration(self):
+        # Scores fall from odd to even search depths here, so an earlier iteration scores higher
+        for board, player in random_positions(3, seed=4):
+            current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+            ai.transposition_table.clear()
+            _, score = ai.iterative_search(board, player, ai.zobrist_keys, current_hash, max_depth=3)
+            ai.transposition_table.clear()
+            # Iteration depth d searches the replies to every root move d plies deep
+            _, expected = ai.search_position(board, player, 4, ai.zobrist_keys, current_hash)
+            self.assertAlmostEqual(score, expected)
+
+    def test_lazy_evaluation_bounds_hold(self):
+        for board, player in random_positions(40, seed=8, min_plies=2, max_plies=58):
+            exact = ai.evaluate_board(ai.convert_board(board), player)
+            value, flag = ai.evaluate_lazy(board, player, float('-inf'), float('inf'))
+            self.assertEqual(flag, ai.TT_EXACT)
+            self.assertAlmostEqual(value, exact)
+            for alpha in (exact - 4, exact - 1, exact + 0.5, exact + 3):
+                value, flag = ai.evaluate_lazy(board, player, alpha, alpha + 1)
+                if flag == ai.TT_UPPER:
+                    self.assertLessEqual(exact, value + 1e-9)
+                    self.assertLessEqual(value, alpha)
+                elif flag == ai.TT_LOWER:
+                    self.assertGreaterEqual(exact, value - 1e-9)
+                    self.assertGreaterEqual(value, alpha + 1)
+                else:
+                    self.assertAlmostEqual(value, exact)
+
+    def test_batched_leaves_match_plain_minimax(self):
+        ai.batched_leaves = True
+        try:
+            for board, player in random_positions(6, seed=9):
+                ai.transposition_table.clear()
+                current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+                children = [make_move([r[:] for r in board], row, col, player)[0] for row, col in valid_moves(board, player)]
+                for depth in (2, 3):
+                    _, score = ai.search_position(board, player, depth, ai.zobrist_keys, current_hash)
+                    self.assertAlmostEqual(score, max(reference_minimax(child, depth - 1, False, 3 - player, player) for child in children))
+        finally:
+            ai.batched_leaves = False
+
+    def test_batched_leaves_choose_the_same_moves(self):
+        # Lazy leaves may return bounds where batched ones are exact, so compare with full evaluation
+        ai.lazy_evaluation = False
+        try:
+            for board, player in random_positions(3, seed=21):
+                current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+                for selective in (None, 'easy', 'hard'):
+                    moves = []
+                    for batched in (False, True):
+                        ai.batched_leaves = batched
+                        ai.transposition_table.clear()
+                        moves.append(ai.find_best_move_original(board, player, 5, ai.zobrist_keys, current_hash, selective=selective))
+                    self.assertEqual(moves[0], moves[1])
+        finally:
+            ai.batched_leaves = False
+            ai.lazy_evaluation = True
+
+    def test_full_width_search_ignores_selective_entries(self):
+        for board, player in random_positions(4, seed=9):
+            current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+            ai.transposition_table.clear()
+            cold = ai.search_position(board, player, 5, ai.zobrist_keys, current_hash)
+            ai.transposition_table.clear()
+            ai.search_position(board, player, 5, ai.zobrist_keys, current_hash, selective='hard')
+            self.assertTrue(any(entry[4] for entry in ai.transposition_table.values()))
+            self.assertEqual(ai.search_position(board, player, 5, ai.zobrist_keys, current_hash), cold)
+
+    def test_selective_search_returns_legal_moves(self):
+        for board, player in random_positions(4, seed=9):
+            current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+            for level in ai.SELECTIVE_SETTINGS:
+                ai.transposition_table.clear()
+                move = ai.find_best_move_original(board, player, 5, ai.zobrist_keys, current_hash, selective=level)
+                self.assertIn(move, valid_moves(board, player))
+
+    def test_node_budget_is_bounded_and_reproducible(self):
+        board, player = random_positions(1, seed=2)[0]
+        current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+        results = []
+        for _ in range(2):
+            ai.transposition_table.clear()
+            ai.move_cache.clear()
+            move = ai.find_best_move(board, player, ai.zobrist_keys, current_hash, max_depth=20, max_nodes=3000)
+            results.append((move, ai.last_search_stats['nodes'], ai.last_search_stats['depth']))
+        self.assertEqual(results[0], results[1])
+        self.assertIn(results[0][0], valid_moves(board, player))
+        self.assertLessEqual(results[0][1], 3001)
+        self.assertLess(results[0][2], 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,268 @@
+"""
+Binary traces of Minimax searches and a reader that summarises them.
+
+While ai.search_tracer is set, every minimax node writes one fixed-size record
+when it returns: its hash, remaining depth, window, score, best move and the
+index of that move in the node's ordered move list, its number of legal moves,
+the number of minimax calls it made directly, and flags (transposition table
+hit, leaf, ProbCut, cutoff, maximizing, batched leaves). Records are in
+post-order, so the child counts are enough to rebuild the tree. A SEARCH
+marker starts every root search and a ROOT marker precedes the subtree of
+every root move (its hash is the position after the move, its move field the
+square and its moves field the board size).
+
+Records go through a buffered file, so tracing costs one struct.pack per node;
+after max_events records the tracer drops the rest and notes the count in the
+END record written by close().
+
+The reader reports node and flag counts, the effective branching factor of
+every search, how often the first ordered move was the best or caused the
+cutoff, and the root moves and child positions with the largest subtrees.
+
+Run with:
+    python search_trace.py record trace.bin --depth 6 --position f5d6c3
+    python search_trace.py summary trace.bin --top 10
+"""
+import struct
+from collections import Counter
+from contextlib import contextmanager
+
+MAGIC = b'RVTR'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')  # Magic, version, record size
+# hash, depth, flags, move, move index, legal moves, children, alpha, beta, score
+RECORD = struct.Struct('<QbBHBBHfff')
+
+TT_HIT, LEAF, PROBCUT, CUTOFF, MAXIMIZING, BATCHED, ROOT, SEARCH = (1 << bit for bit in range(8))
+END = ROOT | SEARCH
+NO_MOVE = 0xFFFF
+NO_INDEX = 0xFF
+
+BUFFER_SIZE = 1 << 20
+DEFAULT_MAX_EVENTS = 50_000_000  # About 1.4 GB of records
+
+
+class SearchTracer:
+    def __init__(self, path, max_events=DEFAULT_MAX_EVENTS, buffer_size=BUFFER_SIZE):
+        self.file = open(path, 'wb', buffering=buffer_size)
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._write = self.file.write
+        self._pack = RECORD.pack
+        self._children = [0]  # Minimax calls made so far by every open node, innermost last
+        self.events = 0
+        self.max_events = max_events
+        self.dropped = 0
+
+    def _record(self, *fields):
+        if self.events >= self.max_events:
+            self.dropped += 1
+            return
+        self.events += 1
+        self._write(self._pack(*fields))
+
+    def begin_search(self):
+        self._children = [0]  # Nodes left open by an aborted search are abandoned
+        self._record(0, 0, SEARCH, NO_MOVE, NO_INDEX, 0, 0, 0.0, 0.0, 0.0)
+
+    def root(self, move, depth, size, current_hash):
+        self._children = [0]
+        self._record(current_hash, depth, ROOT, move[0] * size + move[1], NO_INDEX, size, 0, 0.0, 0.0, 0.0)
+
+    def enter(self):
+        children = self._children
+        children[-1] += 1
+        children.append(0)
+
+    def exit(self, current_hash, depth, maximizing, alpha, beta, score, flags, size=8, move=None, move_index=None, moves=0):
+        children = self._children.pop()
+        if maximizing:
+            flags |= MAXIMIZING
+        self._record(current_hash, depth, flags, NO_MOVE if move is None else move[0] * size + move[1],
+                     NO_INDEX if move_index is None else min(move_index, 254), min(moves, 255), children,
+                     alpha, beta, score)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.max_events += 1  # Room for the END record, which holds the number of dropped records
+        self._record(self.dropped, 0, END, NO_MOVE, NO_INDEX, 0, 0, 0.0, 0.0, 0.0)
+        self.file.close()
+
+
+@contextmanager
+def tracing(path, max_events=DEFAULT_MAX_EVENTS):
+    """ Traces every Minimax search in this process while the block runs. """
+    import ai
+    tracer = SearchTracer(path, max_events)
+    ai.search_tracer = tracer
+    try:
+        yield tracer
+    finally:
+        ai.search_tracer = None
+        tracer.close()
+
+
+def read_trace(path, chunk_records=1 << 16):
+    """
+    Yields the records of a trace as tuples in RECORD field order.
+
+    Raises:
+        ValueError: If the file is not a search trace of this version.
+    """
+    with open(path, 'rb') as f:
+        magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a version {VERSION} search trace")
+        while True:
+            chunk = f.read(RECORD.size * chunk_records)
+            if not chunk:
+                return
+            yield from RECORD.iter_unpack(chunk[:len(chunk) - len(chunk) % RECORD.size])
+
+
+def square_name(square, size):
+    if square == NO_MOVE:
+        return None
+    return chr(ord('a') + square % size) + str(square // size + 1)
+
+
+def summarise_trace(path, top=10):
+    """
+    Statistics of a trace.
+
+    Returns:
+        dict: Record counts ('nodes', 'tt_hits', 'leaves', 'probcuts', 'cutoffs', 'dropped'),
+        'searches' (per search: nodes per iteration depth and effective branching factors),
+        'ordering' (best-first and first-move cutoff rates of interior nodes) and 'hot'
+        (the top root moves and the largest subtrees below them).
+    """
+    counts = Counter()
+    searches = []
+    root_subtrees = []  # (nodes, search, depth, root move, largest child (nodes, hash, depth))
+    interior = best_first = cutoffs = first_cutoffs = 0
+    cutoff_index_total = 0
+    stack = []  # Open subtrees: (nodes, hash, depth, largest child)
+    root = None
+    size = 8
+
+    def close_root():
+        if root is not None and stack:
+            nodes = sum(entry[0] for entry in stack)
+            top_node = max(stack, key=lambda entry: entry[0])  # The position after the root move
+            searches[-1]['iterations'][root[1]] = searches[-1]['iterations'].get(root[1], 0) + nodes
+            root_subtrees.append((nodes, len(searches) - 1, root[1], root[0], top_node[3]))
+        stack.clear()
+
+    for current_hash, depth, flags, move, move_index, moves, children, alpha, beta, score in read_trace(path):
+        if flags & ROOT or flags & SEARCH:
+            close_root()
+            if flags == END:
+                counts['dropped'] += current_hash
+            elif flags & SEARCH:
+                searches.append({'iterations': {}})
+                root = None
+            else:
+                size = moves
+                root = (square_name(move, size), depth)
+                if not searches:
+                    searches.append({'iterations': {}})
+            continue
+        counts['nodes'] += 1
+        counts['tt_hits'] += bool(flags & TT_HIT)
+        counts['leaves'] += bool(flags & LEAF)
+        counts['probcuts'] += bool(flags & PROBCUT)
+        if not flags & (TT_HIT | LEAF | PROBCUT):
+            interior += 1
+            best_first += move_index == 0
+            if flags & CUTOFF:
+                cutoffs += 1
+                first_cutoffs += move_index == 0
+                cutoff_index_total += move_index
+        nodes, largest = 1, None
+        for _ in range(min(children, len(stack))):
+            child = stack.pop()
+            nodes += child[0]
+            if largest is None or child[0] > largest[0]:
+                largest = child[:3]
+        stack.append((nodes, current_hash, depth, largest))
+    close_root()
+    counts['cutoffs'] = cutoffs
+
+    for search in searches:
+        iterations = search['iterations']
+        depths = sorted(iterations)
+        search['iterations'] = {depth: iterations[depth] for depth in depths}
+        if depths:
+            # nodes = b ** depth for a uniform tree, and successive iterations grow by b
+            search['ebf'] = round(iterations[depths[-1]] ** (1 / max(depths[-1], 1)), 3)
+            growth = [iterations[b] / iterations[a] for a, b in zip(depths, depths[1:]) if iterations[a]]
+            search['iteration_growth'] = round(sum(growth) / len(growth), 3) if growth else None
+
+    ordering = {'interior_nodes': interior,
+                'best_move_first': round(best_first / interior, 4) if interior else None,
+                'first_move_cutoffs': round(first_cutoffs / cutoffs, 4) if cutoffs else None,
+                'mean_cutoff_index': round(cutoff_index_total / cutoffs, 3) if cutoffs else None}
+    hot = [{'search': search, 'depth': depth, 'move': move, 'nodes': nodes,
+            'largest_child': None if child is None else {'hash': f"{child[1]:016x}", 'depth': child[2], 'nodes': child[0]}}
+           for nodes, search, depth, move, child in sorted(root_subtrees, key=lambda item: item[0], reverse=True)[:top]]
+    result = dict(counts)
+    result.update(searches=searches, ordering=ordering, hot=hot)
+    return result
+
+
+def record(path, position, depth, engine='iterative', selective=None, max_events=DEFAULT_MAX_EVENTS):
+    """ Searches a position with tracing on; returns the move found and the tracer. """
+    import ai
+    from analyze import parse_position
+    board, player = parse_position(position)
+    current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+    with tracing(path, max_events) as tracer:
+        if engine == 'iterative':
+            move, _ = ai.iterative_search(board, player, ai.zobrist_keys, current_hash, max_depth=depth, selective=selective)
+        else:
+            move, _ = ai.search_position(board, player, depth, ai.zobrist_keys, current_hash, selective=selective)
+    return move, tracer
+
+
+def main():
+    import argparse
+    import json  # Imported here, since ai imports this module and startup time counts
+    parser = argparse.ArgumentParser(description="Record and summarise Minimax search traces.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record', help="Trace the search of one position")
+    record_parser.add_argument('trace')
+    record_parser.add_argument('--position', default='start', help="Move sequence or board string, as for analyze.py")
+    record_parser.add_argument('--depth', type=int, default=5)
+    record_parser.add_argument('--engine', choices=['minimax', 'iterative'], default='iterative')
+    record_parser.add_argument('--selective', choices=['easy', 'medium', 'hard'], default=None)
+    record_parser.add_argument('--max-events', type=int, default=DEFAULT_MAX_EVENTS)
+    summary_parser = commands.add_parser('summary', help="Summarise a trace")
+    summary_parser.add_argument('trace')
+    summary_parser.add_argument('--top', type=int, default=10, help="Number of hot subtrees to list")
+    summary_parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        move, tracer = record(args.trace, args.position, args.depth, args.engine, args.selective, args.max_events)
+        print(f"Best move {square_name(move[0] * 8 + move[1], 8) if move else None}; {tracer.events} records written, {tracer.dropped} dropped")
+        return
+    summary = summarise_trace(args.trace, args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{summary.get('nodes', 0)} nodes: {summary.get('tt_hits', 0)} table hits, {summary.get('leaves', 0)} leaves, "
+          f"{summary.get('probcuts', 0)} ProbCuts, {summary.get('cutoffs', 0)} cutoffs, {summary.get('dropped', 0)} dropped")
+    for index, search in enumerate(summary['searches']):
+        print(f"search {index}: nodes per depth {search['iterations']}, EBF {search.get('ebf')}, "
+              f"iteration growth {search.get('iteration_growth')}")
+    ordering = summary['ordering']
+    print(f"ordering: best move first at {ordering['best_move_first']} of {ordering['interior_nodes']} interior nodes, "
+          f"first-move cutoffs {ordering['first_move_cutoffs']}, mean cutoff index {ordering['mean_cutoff_index']}")
+    for entry in summary['hot']:
+        child = entry['largest_child']
+        print(f"search {entry['search']} depth {entry['depth']} move {entry['move']}: {entry['nodes']} nodes"
+              + ('' if child is None else f", largest child {child['hash']} with {child['nodes']} nodes"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import ai
+from analyze import parse_position
+from search_trace import SearchTracer, tracing, read_trace, summarise_trace, SEARCH, ROOT, END
+
+class TestSearchTrace(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'trace.bin')
+        ai.transposition_table.clear()
+        ai.evaluate_board.cache_clear()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def search(self, depth=4):
+        board, player = parse_position('f5d6c3')
+        return ai.iterative_search(board, player, ai.zobrist_keys, ai.compute_hash(board, ai.zobrist_keys, player), max_depth=depth)
+
+    def test_trace_covers_every_node(self):
+        with tracing(self.path):
+            move, _ = self.search()
+        self.assertIsNone(ai.search_tracer)
+        summary = summarise_trace(self.path)
+        self.assertEqual(summary['nodes'], ai.last_search_stats['nodes'])
+        self.assertEqual(len(summary['searches']), 1)
+        self.assertEqual(sum(summary['searches'][0]['iterations'].values()), summary['nodes'])
+        self.assertEqual(list(summary['searches'][0]['iterations']), [1, 2, 3, 4])
+        self.assertGreater(summary['ordering']['interior_nodes'], 0)
+        self.assertEqual(summary['hot'][0]['nodes'], max(entry['nodes'] for entry in summary['hot']))
+        records = list(read_trace(self.path))
+        self.assertEqual(records[0][2], SEARCH)
+        self.assertEqual(records[1][2], ROOT)
+        self.assertEqual(records[-1][2], END)
+
+    def test_event_limit_drops_and_counts(self):
+        with tracing(self.path, max_events=50) as tracer:
+            self.search(3)
+        self.assertEqual(tracer.events, 51)  # The END record is always written
+        self.assertEqual(summarise_trace(self.path)['dropped'], tracer.dropped)
+        self.assertGreater(tracer.dropped, 0)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a trace at all')
+        with self.assertRaises(ValueError):
+            list(read_trace(self.path))
+        SearchTracer(self.path).close()
+        self.assertEqual([record[2] for record in read_trace(self.path)], [END])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+"""
+Self-play data generator for tuning the evaluator.
+
+Engines from ai.py play each other from randomised openings across worker
+processes. Every position an engine searched is recorded as a fixed-size
+binary record:
+
+    black bitboard   uint64
+    white bitboard   uint64
+    side to move     uint8   (1 black, 2 white)
+    final result     int8    (black discs minus white discs at game end)
+    search score     float32 (from the side to move, NaN when unknown)
+
+Records are grouped into chunks that are zlib-compressed independently, so a
+reader only ever holds one chunk in memory however large the dataset grows.
+
+File layout:
+    header  b'RVSP' | uint16 version | uint16 record size
+    chunk   uint32 compressed length | uint32 record count | zlib data
+    ...
+
+Run with:
+    python selfplay.py --games 1000 --workers 4 --engine minimax:3 --out selfplay_data
+"""
+import argparse
+import glob
+import math
+import os
+import random
+import struct
+import zlib
+from collections import namedtuple
+from multiprocessing import Pool
+
+import numpy as np
+
+from game_logic import valid_moves, GameState
+
+MAGIC = b'RVSP'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+CHUNK_HEADER = struct.Struct('<II')
+RECORD = struct.Struct('<QQBbf')
+RECORD_DTYPE = np.dtype([('black', '<u8'), ('white', '<u8'), ('side', 'u1'), ('result', 'i1'), ('score', '<f4')])
+FILE_EXTENSION = '.rvsp'
+
+Position = namedtuple('Position', ['black', 'white', 'side', 'result', 'score'])
+
+
+class PositionWriter:
+    """ Buffers position records and writes them as compressed chunks. """
+
+    def __init__(self, path, chunk_records=4096, compression_level=6):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.compression_level = compression_level
+        self.records_written = 0
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def write(self, black, white, side, result, score):
+        self._buffer += RECORD.pack(black, white, side, result, math.nan if score is None else score)
+        self._buffered += 1
+        if self._buffered >= self.chunk_records:
+            self.flush()
+
+    def flush(self):
+        if not self._buffered:
+            return
+        data = zlib.compress(bytes(self._buffer), self.compression_level)
+        self._file.write(CHUNK_HEADER.pack(len(data), self._buffered))
+        self._file.write(data)
+        self.records_written += self._buffered
+        self._buffer.clear()
+        self._buffered = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def dataset_files(paths):
+    """ Expands directories and glob patterns into a sorted list of data files. """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*' + FILE_EXTENSION))))
+        else:
+            files.extend(sorted(glob.glob(path)) or [path])
+    return files
+
+
+def iter_chunks(paths):
+    """ Yields (raw record bytes, record count) for every chunk, decompressing one chunk at a time. """
+    for path in dataset_files(paths):
+        with open(path, 'rb') as f:
+            magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f"Not a self-play data file: {path}")
+            while True:
+                header = f.read(CHUNK_HEADER.size)
+                if len(header) < CHUNK_HEADER.size:
+                    break
+                length, count = CHUNK_HEADER.unpack(header)
+                yield zlib.decompress(f.read(length)), count
+
+
+def iter_arrays(paths):
+    """ Yields one NumPy structured array (RECORD_DTYPE) per chunk. """
+    for data, count in iter_chunks(paths):
+        yield np.frombuffer(data, dtype=RECORD_DTYPE, count=count)
+
+
+def iter_positions(paths):
+    """ Yields every recorded position as a Position tuple. """
+    for data, count in iter_chunks(paths):
+        for record in RECORD.iter_unpack(data):
+            yield Position(*record)
+
+
+def make_engine(spec):
+    """
+    Builds an engine from a spec string: 'greedy', 'random', 'minimax:<depth>' or 'iterative:<depth>'.
+
+    The engine is called as engine(board, player, zobrist_keys, current_hash, passes) and returns (move, score).
+    """
+    import ai
+    name, _, depth = spec.partition(':')
+    if name == 'minimax':
+        depth = int(depth or 3)
+        return lambda board, player, zobrist_keys, current_hash, passes=0: ai.search_position(
+            board, player, depth, zobrist_keys, current_hash, passes=passes)
+    if name == 'iterative':
+        depth = int(depth or 5)
+        return lambda board, player, zobrist_keys, current_hash, passes=0: (ai.find_best_move(
+            board, player, zobrist_keys, current_hash, max_depth=depth, passes=passes), None)
+    if name == 'greedy':
+        from simulator_greedy import find_greedy_move
+        return lambda board, player, zobrist_keys, current_hash, passes=0: (find_greedy_move(board, player), None)
+    if name == 'random':
+        return lambda board, player, zobrist_keys, current_hash, passes=0: (random.choice(valid_moves(board, player)), None)
+    raise ValueError(f"Unknown engine spec: {spec}")
+
+
+def play_selfplay_game(engines, rng, random_plies, zobrist_keys):
+    """
+    Plays one game from a randomised opening and returns (positions, final disc difference).
+
+    The first random_plies moves are chosen uniformly at random; after that the
+    engines alternate and each searched position is kept with its score.
+    """
+    state = GameState.initial(zobrist_keys=zobrist_keys)
+    ply = 0
+    positions = []
+    while True:
+        moves = state.legal_moves()
+        if not moves:
+            if state.is_terminal():
+                break
+            state = state.pass_turn(zobrist_keys)
+            continue
+        if ply < random_plies:
+            move = rng.choice(moves)
+        else:
+            move, score = engines[state.player](state.to_board(), state.player, zobrist_keys, state.hash, state.passes)
+            positions.append((state.black, state.white, state.player, None if score is None else float(score)))
+        state = state.play(move, zobrist_keys)
+        ply += 1
+    black, white = state.disc_counts()
+    result = black - white
+    return positions, result
+
+
+def generate(task):
+    """ Pool worker: plays a share of the games and streams them into its own data files. """
+    import ai
+    worker, games, black_spec, white_spec, random_plies, seed, out_dir, records_per_file = task
+    rng = random.Random(seed)
+    random.seed(seed)
+    engines = {1: make_engine(black_spec), 2: make_engine(white_spec)}
+    file_index = 0
+    writer = None
+    total = 0
+    try:
+        for _ in range(games):
+            if writer is None or writer.records_written >= records_per_file:
+                if writer is not None:
+                    writer.close()
+                path = os.path.join(out_dir, f"selfplay-{seed}-{file_index:05d}{FILE_EXTENSION}")
+                writer = PositionWriter(path)
+                file_index += 1
+            # Searches of different games must not share cached scores
+            ai.transposition_table.clear()
+            ai.evaluate_board.cache_clear()
+            positions, result = play_selfplay_game(engines, rng, rng.randint(*random_plies), ai.zobrist_keys)
+            for black, white, side, score in positions:
+                writer.write(black, white, side, result, score)
+            total += len(positions)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate labelled self-play positions.")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--engine', default='minimax:3', help="Engine spec for both sides")
+    parser.add_argument('--white-engine', default=None, help="Engine spec for White (default: --engine)")
+    parser.add_argument('--random-plies', default='4-10', help="Random opening length, e.g. 6 or 4-10")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--records-per-file', type=int, default=1_000_000)
+    parser.add_argument('--out', default='selfplay_data')
+    args = parser.parse_args()
+
+    low, _, high = args.random_plies.partition('-')
+    random_plies = (int(low), int(high or low))
+    os.makedirs(args.out, exist_ok=True)
+    workers = max(1, min(args.workers, args.games))
+    tasks = [(worker, args.games // workers + (worker < args.games % workers), args.engine,
+              args.white_engine or args.engine, random_plies, args.seed * 1000 + worker, args.out,
+              args.records_per_file) for worker in range(workers)]
+    with Pool(workers) as pool:
+        total = sum(pool.imap_unordered(generate, tasks))
+    print(f"Wrote {total} positions from {args.games} games to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
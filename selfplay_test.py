@@ -0,0 +1,24 @@
+import os
+import tempfile
+import unittest
+from game_logic import initialize_board, board_to_bitboards, bitboards_to_board
+from selfplay import PositionWriter, iter_positions, iter_arrays
+
+class TestSelfPlayFormat(unittest.TestCase):
+    def test_bitboard_round_trip(self):
+        board = initialize_board()
+        self.assertEqual(bitboards_to_board(*board_to_bitboards(board)), board)
+
+    def test_chunked_round_trip(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            path = os.path.join(out_dir, 'data.rvsp')
+            with PositionWriter(path, chunk_records=3) as writer:
+                for i in range(10):
+                    writer.write(i, 1 << 63, 1 + i % 2, i - 5, None if i == 0 else i / 2)
+            positions = list(iter_positions(out_dir))
+            self.assertEqual(len(positions), 10)
+            self.assertEqual(positions[4], (4, 1 << 63, 1, -1, 2.0))
+            self.assertEqual([len(chunk) for chunk in iter_arrays(path)], [3, 3, 3, 1])
+
+if __name__ == '__main__':
+    unittest.main()
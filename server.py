@@ -0,0 +1,384 @@
+"""
+Asyncio game server hosting many concurrent human-vs-AI Reversi games.
+
+Clients speak newline-delimited JSON over a plain TCP connection. Every game
+lives in memory as a GameSession, and AI moves are computed by a bounded
+process pool shared by all sessions. Pending AI requests are dispatched
+round-robin across sessions, each request carries a time budget enforced by
+the search itself, and once too many requests are pending new submissions
+wait, which stops the server from reading further commands on that connection.
+
+Run with:
+    python server.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from calibration import FALLBACK_SETTINGS, get_difficulty_settings
+from game_logic import initialize_board, valid_moves, make_move, moves_with_flips
+from shared_tables import share_engine_tables, install_engine_tables
+
+# Search settings per difficulty: fixed depth for Minimax, max depth for
+# iterative deepening, and the node budget and time budget (in seconds) of a
+# single AI move. The node budget makes the cost of a request reproducible;
+# the time budget is a safety net for slow hosts. --calibrate replaces them
+# with settings measured on this host.
+DIFFICULTY_SETTINGS = dict(FALLBACK_SETTINGS)
+
+AI_STRATEGIES = ('greedy', 'minimax', 'iterative')
+
+# Extra time granted to a worker before the server gives up on its answer
+TIME_BUDGET_GRACE = 1.0
+
+
+class ProtocolError(Exception):
+    """ Raised for malformed or invalid client commands. """
+    pass
+
+
+def run_search(strategy, board, player, depth, time_limit, selective=None, max_nodes=None):
+    """
+    Computes an AI move inside a pool worker process.
+
+    Each worker keeps its own Zobrist keys and transposition table, so only the
+    board, the player and the search settings travel between processes.
+    """
+    import ai
+    if strategy == 'greedy':
+        from simulator_greedy import find_greedy_move
+        return find_greedy_move(board, player)
+    current_hash = ai.compute_hash(board, ai.zobrist_keys, player)
+    if strategy == 'iterative':
+        return ai.find_best_move(board, player, ai.zobrist_keys, current_hash, max_depth=depth, time_limit=time_limit,
+                                  selective=selective, max_nodes=max_nodes)
+    return ai.find_best_move_original(board, player, depth, ai.zobrist_keys, current_hash, time_limit=time_limit,
+                                      selective=selective, max_nodes=max_nodes)
+
+
+def fallback_move(board, player):
+    """ Move played when a worker overruns its budget: the one flipping the most discs. """
+    flips = moves_with_flips(board, player)
+    return max(flips, key=lambda move: flips[move][0]) if flips else None
+
+
+class SearchScheduler:
+    """
+    Queues AI move requests and feeds them fairly to a process pool.
+
+    Requests are kept in one FIFO per session and dispatched round-robin across
+    sessions, so a session that queues many searches cannot delay the others.
+    At most max_pending requests may be queued or running; further submit()
+    calls wait for a slot, which propagates backpressure to the clients.
+    """
+
+    def __init__(self, executor, max_workers, max_pending):
+        self.executor = executor
+        self.max_workers = max_workers
+        self._slots = asyncio.Semaphore(max_pending)
+        self._queues = OrderedDict()  # session id -> deque of (job, future)
+        self._ready = asyncio.Event()
+        self._dispatchers = []
+        self.completed = 0
+        self.timeouts = 0
+
+    def start(self):
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.max_workers)]
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+
+    @property
+    def pending(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def submit(self, session_id, job):
+        """ Queues a search job for a session and waits for its move. """
+        await self._slots.acquire()
+        try:
+            future = asyncio.get_running_loop().create_future()
+            self._queues.setdefault(session_id, deque()).append((job, future))
+            self._ready.set()
+            return await future
+        finally:
+            self._slots.release()
+
+    def _next_job(self):
+        # Take the oldest request of the first session in line, then move that
+        # session to the back of the line if it still has requests waiting
+        session_id, queue = next(iter(self._queues.items()))
+        job, future = queue.popleft()
+        del self._queues[session_id]
+        if queue:
+            self._queues[session_id] = queue
+        if not self._queues:
+            self._ready.clear()
+        return job, future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            if not self._queues:
+                continue
+            job, future = self._next_job()
+            if future.cancelled():
+                continue
+            search = loop.run_in_executor(self.executor, run_search, job['strategy'], job['board'],
+                                          job['player'], job['depth'], job['time_limit'], job['selective'], job['max_nodes'])
+            try:
+                move = await asyncio.wait_for(asyncio.shield(search), job['time_limit'] + TIME_BUDGET_GRACE)
+            except asyncio.TimeoutError:
+                # The worker stays busy until its search notices the deadline;
+                # answer now so the game does not stall
+                self.timeouts += 1
+                move = fallback_move(job['board'], job['player'])
+                await asyncio.wait([search])
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+                continue
+            self.completed += 1
+            if not future.done():
+                future.set_result(tuple(move) if move else None)
+
+
+class GameSession:
+    """ One human-vs-AI game held in server memory. """
+
+    def __init__(self, session_id, strategy, difficulty, human_player):
+        self.session_id = session_id
+        self.strategy = strategy
+        self.difficulty = difficulty
+        self.human_player = human_player
+        self.ai_player = 3 - human_player
+        self.board = initialize_board()
+        self.current_player = 1
+        self.moves = []
+        self.lock = asyncio.Lock()
+
+    def is_over(self):
+        return not valid_moves(self.board, 1) and not valid_moves(self.board, 2)
+
+    def play(self, move):
+        self.board, _ = make_move(self.board, move[0], move[1], self.current_player)
+        self.moves.append((self.current_player, move))
+        self.current_player = 3 - self.current_player
+
+    def pass_turn(self):
+        self.current_player = 3 - self.current_player
+
+    def search_job(self):
+        settings = DIFFICULTY_SETTINGS[self.difficulty]
+        depth = settings['depth_iterative'] if self.strategy == 'iterative' else settings['depth_original']
+        return {
+            'strategy': self.strategy,
+            'board': [row[:] for row in self.board],
+            'player': self.current_player,
+            'depth': depth,
+            'time_limit': settings['time_limit'],
+            'selective': self.difficulty,
+            'max_nodes': settings['max_nodes'],
+        }
+
+    def snapshot(self):
+        black = sum(row.count(1) for row in self.board)
+        white = sum(row.count(2) for row in self.board)
+        return {
+            'session': self.session_id,
+            'board': self.board,
+            'to_move': self.current_player,
+            'legal_moves': valid_moves(self.board, self.current_player),
+            'score': {'black': black, 'white': white},
+            'game_over': self.is_over(),
+        }
+
+
+class ReversiServer:
+    """
+    Accepts client connections and routes their commands to game sessions.
+
+    Commands (one JSON object per line, answered by one JSON object per line):
+        {"cmd": "new", "ai": "minimax", "difficulty": "easy", "human": 1}
+        {"cmd": "move", "session": 3, "row": 2, "col": 3}
+        {"cmd": "state", "session": 3}
+        {"cmd": "close", "session": 3}
+        {"cmd": "stats"}
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, max_pending=None, max_sessions=1000):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self._session_ids = itertools.count(1)
+        self._executor = None
+        self._tables = None
+        self._server = None
+        self.scheduler = None
+
+    async def start(self):
+        self._tables = share_engine_tables()  # One copy of the engine tables for all workers
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=install_engine_tables,
+                                             initargs=(self._tables.name,))
+        self.scheduler = SearchScheduler(self._executor, self.workers, self.max_pending)
+        self.scheduler.start()
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.scheduler is not None:
+            await self.scheduler.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._tables is not None:
+            self._tables.unlink()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.handle_command(json.loads(line))
+                except (ProtocolError, ValueError, KeyError, TypeError) as error:
+                    response = {'ok': False, 'error': str(error)}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_command(self, message):
+        if not isinstance(message, dict):
+            raise ProtocolError(f"Commands must be JSON objects, got {type(message).__name__}")
+        command = message.get('cmd')
+        if command == 'new':
+            return await self.new_game(message)
+        if command == 'stats':
+            return {'ok': True, 'sessions': len(self.sessions), 'pending': self.scheduler.pending,
+                    'completed': self.scheduler.completed, 'timeouts': self.scheduler.timeouts}
+        session = self.sessions.get(message.get('session'))
+        if session is None:
+            raise ProtocolError(f"Unknown session: {message.get('session')}")
+        if command == 'move':
+            return await self.human_move(session, (int(message['row']), int(message['col'])))
+        if command == 'state':
+            return dict(session.snapshot(), ok=True)
+        if command == 'close':
+            del self.sessions[session.session_id]
+            return {'ok': True, 'session': session.session_id}
+        raise ProtocolError(f"Unknown command: {command}")
+
+    async def new_game(self, message):
+        strategy = message.get('ai', 'minimax')
+        difficulty = message.get('difficulty', 'easy')
+        human_player = int(message.get('human', 1))
+        if strategy not in AI_STRATEGIES:
+            raise ProtocolError(f"Unknown AI strategy: {strategy}")
+        if difficulty not in DIFFICULTY_SETTINGS:
+            raise ProtocolError(f"Unknown difficulty: {difficulty}")
+        if human_player not in (1, 2):
+            raise ProtocolError(f"Invalid human player: {human_player}")
+        if len(self.sessions) >= self.max_sessions:
+            raise ProtocolError("Server is full")
+
+        session = GameSession(next(self._session_ids), strategy, difficulty, human_player)
+        self.sessions[session.session_id] = session
+        async with session.lock:
+            ai_moves = await self.advance(session)
+        return dict(session.snapshot(), ok=True, ai_moves=ai_moves)
+
+    async def human_move(self, session, move):
+        async with session.lock:
+            if session.current_player != session.human_player:
+                raise ProtocolError("Not your turn")
+            if move not in valid_moves(session.board, session.current_player):
+                raise ProtocolError(f"Invalid move: {move}")
+            session.play(move)
+            ai_moves = await self.advance(session)
+        return dict(session.snapshot(), ok=True, ai_moves=ai_moves)
+
+    async def advance(self, session):
+        """ Plays AI moves and passes until the human has a move or the game ends. """
+        ai_moves = []
+        while not session.is_over():
+            if not valid_moves(session.board, session.current_player):
+                session.pass_turn()
+                continue
+            if session.current_player == session.human_player:
+                break
+            move = await self.scheduler.submit(session.session_id, session.search_job())
+            if move not in valid_moves(session.board, session.current_player):
+                move = fallback_move(session.board, session.current_player)
+            session.play(move)
+            ai_moves.append(move)
+        return ai_moves
+
+
+class ReversiClient:
+    """ Minimal client for the line-delimited JSON protocol, used for testing. """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def call(self, cmd, **params):
+        self.writer.write(json.dumps(dict(params, cmd=cmd)).encode() + b'\n')
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def main(args):
+    if args.calibrate:
+        DIFFICULTY_SETTINGS.update(get_difficulty_settings())
+    server = ReversiServer(args.host, args.port, workers=args.workers,
+                           max_pending=args.max_pending, max_sessions=args.max_sessions)
+    await server.start()
+    print(f"Reversi server listening on {server.host}:{server.port} with {server.workers} search workers")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Host many concurrent human-vs-AI Reversi games.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="Search processes (default: CPU count)")
+    parser.add_argument('--max-pending', type=int, default=None, help="Queued AI requests before clients are throttled")
+    parser.add_argument('--max-sessions', type=int, default=1000)
+    parser.add_argument('--calibrate', action='store_true', help="Derive difficulty settings from this host's measured speed")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import unittest
+from collections import deque
+from server import ReversiServer, ReversiClient, SearchScheduler
+
+class TestReversiServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await ReversiServer(port=0, workers=2).start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def test_human_move_gets_ai_reply(self):
+        client = await ReversiClient.connect(port=self.server.port)
+        game = await client.call('new', ai='minimax', difficulty='easy', human=1)
+        self.assertTrue(game['ok'])
+        self.assertEqual(game['to_move'], 1)
+
+        reply = await client.call('move', session=game['session'], row=2, col=3)
+        self.assertTrue(reply['ok'])
+        self.assertEqual(len(reply['ai_moves']), 1)
+        self.assertEqual(reply['to_move'], 1)
+        self.assertEqual(reply['score']['black'] + reply['score']['white'], 6)
+        await client.close()
+
+    async def test_concurrent_sessions(self):
+        clients = [await ReversiClient.connect(port=self.server.port) for _ in range(4)]
+        games = await asyncio.gather(*(c.call('new', ai='greedy', human=2) for c in clients))
+        for game in games:
+            self.assertTrue(game['ok'])
+            self.assertEqual(len(game['ai_moves']), 1)
+        stats = await clients[0].call('stats')
+        self.assertEqual(stats['sessions'], 4)
+        for client in clients:
+            await client.close()
+
+    async def test_invalid_move_is_rejected(self):
+        client = await ReversiClient.connect(port=self.server.port)
+        game = await client.call('new', ai='greedy')
+        reply = await client.call('move', session=game['session'], row=0, col=0)
+        self.assertFalse(reply['ok'])
+        await client.close()
+
+    async def test_non_object_message_is_a_protocol_error(self):
+        client = await ReversiClient.connect(port=self.server.port)
+        for message in (b'[]\n', b'1\n'):
+            client.writer.write(message)
+            reply = json.loads(await client.reader.readline())
+            self.assertFalse(reply['ok'])
+        self.assertTrue((await client.call('stats'))['ok'])
+        await client.close()
+
+class TestSearchScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_round_robin_across_sessions(self):
+        scheduler = SearchScheduler(executor=None, max_workers=1, max_pending=10)
+        loop = asyncio.get_running_loop()
+        for session_id, job in [(1, 'a1'), (1, 'a2'), (1, 'a3'), (2, 'b1'), (3, 'c1')]:
+            scheduler._queues.setdefault(session_id, deque()).append((job, loop.create_future()))
+        order = [scheduler._next_job()[0] for _ in range(5)]
+        self.assertEqual(order, ['a1', 'b1', 'c1', 'a2', 'a3'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+Read-only NumPy tables shared by every process on a host.
+
+Precomputed engine data (evaluation weights, ProbCut parameters, and any
+larger pattern or book tables) is packed into one flat buffer: a header, a
+JSON directory of (name, dtype, shape, offset) and the arrays, each aligned to
+ALIGNMENT bytes. The buffer lives either in a file, mapped with np.memmap so
+that all processes reading it share the page cache, or in a
+multiprocessing.shared_memory segment created by a pool's parent process.
+Readers get read-only array views into the mapping: nothing is parsed beyond
+the directory and nothing is copied, so a worker's startup cost and resident
+memory do not grow with the tables.
+
+    write_tables('engine.rvtb', ai.engine_tables())    # Or: python shared_tables.py engine.rvtb
+    tables = map_tables('engine.rvtb')                 # REVERSI_TABLES=engine.rvtb makes ai do this
+
+    shared = share_engine_tables()                     # In a pool's parent
+    install_engine_tables(shared.name)                 # Pool initializer of each worker
+    shared.unlink()                                    # Once the pool has shut down
+"""
+import json
+import os
+import struct
+
+MAGIC = b'RVTB'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')  # Magic, version, directory length
+ALIGNMENT = 64
+
+_mapped = {}  # (path, mtime) -> tables, so a process maps each file once
+_attached = {}  # Segment name -> (SharedMemory, tables), kept open while the process runs
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def layout(tables):
+    """
+    Directory and total size of a buffer holding tables.
+
+    Args:
+        tables (dict): NumPy arrays by name.
+
+    Returns:
+        tuple: (directory bytes, [(name, array, offset)], size in bytes).
+    """
+    import numpy as np
+    arrays = {name: np.ascontiguousarray(array) for name, array in tables.items()}
+    # The directory holds the offsets and its length moves them, so repeat until it stops changing
+    directory = b''
+    while True:
+        offset = _align(HEADER.size + len(directory))
+        entries = []
+        for name, array in arrays.items():
+            entries.append([name, array.dtype.str, list(array.shape), offset])
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(entries).encode()
+        if encoded == directory:
+            break
+        directory = encoded
+    placed = [(name, arrays[name], entry_offset) for name, _, _, entry_offset in entries]
+    return directory, placed, offset
+
+
+def pack_into(buffer, directory, placed):
+    import numpy as np
+    HEADER.pack_into(buffer, 0, MAGIC, VERSION, len(directory))
+    buffer[HEADER.size:HEADER.size + len(directory)] = directory
+    for _, array, offset in placed:
+        np.ndarray(array.shape, array.dtype, buffer=buffer, offset=offset)[...] = array
+
+
+def views(buffer):
+    """
+    Read-only arrays over a buffer written by pack_into.
+
+    Raises:
+        ValueError: If the buffer does not hold tables of this version.
+    """
+    import numpy as np
+    magic, version, directory_length = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} table buffer")
+    directory = json.loads(bytes(buffer[HEADER.size:HEADER.size + directory_length]))
+    tables = {}
+    for name, dtype, shape, offset in directory:
+        array = np.ndarray(tuple(shape), np.dtype(dtype), buffer=buffer, offset=offset)
+        array.flags.writeable = False
+        tables[name] = array
+    return tables
+
+
+def write_tables(path, tables):
+    """ Writes tables to a file for map_tables, replacing it atomically so running readers keep the old one. """
+    directory, placed, size = layout(tables)
+    buffer = bytearray(size)
+    pack_into(buffer, directory, placed)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(buffer)
+    os.replace(temporary, path)
+
+
+def map_tables(path):
+    """ Read-only views of the tables in a file, mapped once per process and file version. """
+    import numpy as np
+    key = (os.path.realpath(path), os.stat(path).st_mtime_ns)
+    tables = _mapped.get(key)
+    if tables is None:
+        tables = _mapped.setdefault(key, views(np.memmap(path, dtype=np.uint8, mode='r')))
+    return tables
+
+
+class SharedTables:
+    """ A shared memory segment holding tables, owned by the process that created it. """
+
+    def __init__(self, tables):
+        from multiprocessing import shared_memory
+        directory, placed, size = layout(tables)
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        pack_into(self.memory.buf, directory, placed)
+        self.name = self.memory.name
+
+    def unlink(self):
+        """ Frees the segment; processes still attached keep their mapping until they exit. """
+        if self.memory is None:
+            return
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
+
+
+def attach(name):
+    """ Read-only views of the tables in the shared memory segment called name. """
+    entry = _attached.get(name)
+    if entry is None:
+        from multiprocessing import shared_memory
+        # Pool workers share their parent's resource tracker, so the creator's unlink also clears their registration
+        memory = shared_memory.SharedMemory(name=name)
+        entry = _attached.setdefault(name, (memory, views(memory.buf)))
+    return entry[1]
+
+
+def share_engine_tables():
+    """ A segment holding this process's engine tables, for pool workers to install_engine_tables. """
+    import ai
+    return SharedTables(ai.engine_tables())
+
+
+def install_engine_tables(name):
+    """ Pool initializer: the engine of this worker uses the tables of the segment called name. """
+    import ai
+    ai.install_tables(attach(name))
+
+
+def main():
+    import argparse
+    import ai
+    parser = argparse.ArgumentParser(description="Export the engine's tables for REVERSI_TABLES.")
+    parser.add_argument('path')
+    args = parser.parse_args()
+    tables = ai.engine_tables()
+    write_tables(args.path, tables)
+    print(f"Wrote {', '.join(tables)} to {args.path} ({os.path.getsize(args.path)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import ai
+import shared_tables
+from game_logic import initialize_board
+
+
+def _worker_tables(_):
+    # What the worker's search reads, and whether it reads it from the shared segment
+    weights = ai.installed_tables['weights']
+    lookups = [ai.adjust_weights_based_on_board(phase, empties) for phase, empties in (('mid', 30), ('end', 10), ('end', 11))]
+    return lookups, [ai.probcut_checks(depth) for depth in (3, 4, 6)], ai.tuned_weights, weights.flags.owndata
+
+
+class SharedTablesTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = {'scalar': np.array(3, dtype=np.uint8), 'weights': np.arange(12, dtype=np.float64).reshape(3, 4),
+                       'keys': np.array([1, 2**64 - 1], dtype=np.uint64), 'empty': np.zeros((0, 5))}
+
+    def assert_tables(self, views):
+        self.assertEqual(sorted(views), sorted(self.tables))
+        for name, array in self.tables.items():
+            np.testing.assert_array_equal(views[name], array)
+            self.assertEqual(views[name].dtype, array.dtype)
+            self.assertFalse(views[name].flags.writeable)
+            self.assertEqual(views[name].ctypes.data % shared_tables.ALIGNMENT, 0)
+
+    def test_file_round_trip_maps_once(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'tables.rvtb')
+        shared_tables.write_tables(path, self.tables)
+        views = shared_tables.map_tables(path)
+        self.assert_tables(views)
+        self.assertIs(shared_tables.map_tables(path), views)
+        with self.assertRaises(ValueError):
+            views['weights'][0, 0] = 1
+
+    def test_shared_memory_round_trip(self):
+        shared = shared_tables.SharedTables(self.tables)
+        self.addCleanup(shared.unlink)
+        self.assert_tables(shared_tables.attach(shared.name))
+
+    def test_installing_tables_drops_scores_of_the_old_weights(self):
+        saved = ai.installed_tables, ai.weight_rows, ai.tuned_weights, ai.probcut_params
+        self.addCleanup(ai.clear_eval_cache)
+        self.addCleanup(ai.transposition_table.clear)
+        self.addCleanup(setattr, ai, 'probcut_params', saved[3])
+        self.addCleanup(setattr, ai, 'tuned_weights', saved[2])
+        self.addCleanup(setattr, ai, 'weight_rows', saved[1])
+        self.addCleanup(setattr, ai, 'installed_tables', saved[0])
+        board = initialize_board()
+        ai.installed_tables, ai.tuned_weights, ai.probcut_params = None, None, {}
+        before = ai.evaluate_board(ai.convert_board(board), 1)
+        ai.transposition_table[(0, 1, True)] = (1, ai.TT_EXACT, before, None, False)
+        weights = {name: 10.0 for name in ai.WEIGHT_FEATURES}
+        ai.tuned_weights = ('phase', {phase: weights for phase in ai.PHASES})
+        tables = ai.engine_tables()
+        ai.tuned_weights = None
+        ai.install_tables(tables)
+        self.assertEqual(ai.transposition_table, {})
+        self.assertNotEqual(ai.evaluate_board(ai.convert_board(board), 1), before)
+
+    def test_pool_workers_install_engine_tables(self):
+        saved = ai.tuned_weights, ai.probcut_params
+        self.addCleanup(setattr, ai, 'probcut_params', saved[1])
+        self.addCleanup(setattr, ai, 'tuned_weights', saved[0])
+        ai.tuned_weights = ('empties', {30: ai.default_weights('mid'), 10: ai.default_weights('end')})
+        ai.probcut_params = {4: [(2, 0.5, 1.0, 2.0)]}
+        shared = shared_tables.share_engine_tables()
+        lookups = [ai.default_weights('mid'), ai.default_weights('end'), ai.default_weights('end')]
+        checks = [[], [(2, 0.5, 1.0, 2.0)], [(4, 0.5, 1.0, 2.0)]]
+        self.assertEqual(([ai.adjust_weights_based_on_board(phase, empties) for phase, empties in (('mid', 30), ('end', 10), ('end', 11))],
+                          [ai.probcut_checks(depth) for depth in (3, 4, 6)]), (lookups, checks))
+        ai.tuned_weights, ai.probcut_params = saved
+        try:
+            with ProcessPoolExecutor(1, initializer=shared_tables.install_engine_tables, initargs=(shared.name,)) as executor:
+                self.assertEqual(executor.submit(_worker_tables, None).result(), (lookups, checks, None, False))
+        finally:
+            shared.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,64 +1,46 @@
-from game_logic import valid_moves, make_move, initialize_board, print_board
+from game_logic import moves_with_flips, GameState
 from ai import find_best_move, find_best_move_original, init_zobrist, compute_hash 
+from event_log import event_log
 #from ai_with_hashing import find_best_move, find_best_move_original
 
-zobrist_keys = init_zobrist()
-
 
 def find_greedy_move(board, player):
     """ This function finds the best move based purely on maximizing the immediate number of discs flipped. """
-    valid_moves_list = valid_moves(board, player)
     best_move = None
     max_flips = -1
-    for move in valid_moves_list:
-        temp_board = [row[:] for row in board]
-        temp_board, _ = make_move(temp_board, move[0], move[1], player, zobrist_keys, 0)  # Passing a dummy hash value
-        num_flips = count_flips(board, temp_board, player)
+    for move, (num_flips, _) in moves_with_flips(board, player).items():
         if num_flips > max_flips:
             max_flips = num_flips
             best_move = move
     return best_move
 
-def count_flips(original_board, new_board, player):
-    """
-    Counts the number of pieces flipped between the original and new board states.
-    """
-    flips = 0
-    for r in range(8):
-        for c in range(8):
-            if original_board[r][c] != new_board[r][c] and new_board[r][c] == player:
-                flips += 1
-    return flips
-
-def play_game(ai1, ai2, verbose=True):
+def play_game(ai1, ai2, zobrist_keys, verbose=True):
     """ Simulates a game between two AIs, returning the winner and optionally printing each move's details. 
     ai1 and ai2 are functions that take a board and a player number and return a move. 
     'verbose' controls the amount of detail printed about the game. """
-    board = initialize_board()
-    current_player = 1
+    state = GameState.initial(zobrist_keys=zobrist_keys)
     move_count = 0
-    current_hash = compute_hash(board, zobrist_keys)  # Compute initial hash
 
     if verbose:
         #print("Starting a new game between Minimax and Greedy AI.")
 
-        while valid_moves(board, current_player):
-            player_name = "Minimax" if current_player == 1 else "Greedy"
-            move = ai1(board, current_player) if current_player == 1 else ai2(board, current_player)
-            board, current_hash = make_move(board, move[0], move[1], current_player, zobrist_keys, current_hash)
+        while state.legal_moves_mask():
+            player_name = "Minimax" if state.player == 1 else "Greedy"
+            move = ai1(state.to_board(), state.player) if state.player == 1 else ai2(state.to_board(), state.player)
+            state = state.play(move, zobrist_keys)
 
             #if verbose:
                 #print(f"Move {move_count+1} by {player_name}: Placed at {move}.")
-                #print_board(board)  # Assuming print_board prints the board to the console.
+                #print_board(state.to_board())  # Assuming print_board prints the board to the console.
 
-            current_player = 3 - current_player
             move_count += 1
 
             if move_count > 60:  # Safety check to prevent infinite loops
                 if verbose:
-                    print("Ending game due to high move count.")
+                    event_log.warning('game_aborted', moves=move_count)
                 break
 
+    board = state.to_board()
     black_discs = sum(row.count(1) for row in board)
     white_discs = sum(row.count(2) for row in board)
     winner = "draw"
@@ -68,21 +50,22 @@ def play_game(ai1, ai2, verbose=True):
         winner = "Greedy"
 
     if verbose:
-        print(f"Game over. Winner: {winner} (Black: {black_discs}, White: {white_discs})")
+        event_log.info('game_over', winner=winner, black=black_discs, white=white_discs)
 
     return 1 if winner == "Minimax" else 2 if winner == "Greedy" else 0
 
 def main():
-    #ai_minimax = lambda board, player: find_best_move(board, player, zobrist_keys, compute_hash(board, zobrist_keys), max_depth = 10)
-    ai_minimax = lambda board, player: find_best_move_original(board, player, 6, zobrist_keys, compute_hash(board, zobrist_keys))
-    ai_greedy = lambda board, player: lambda board, player: find_best_move(board, player, zobrist_keys, compute_hash(board, zobrist_keys), max_depth = 10)
+    zobrist_keys = init_zobrist()
+    #ai_minimax = lambda board, player: find_best_move(board, player, zobrist_keys, compute_hash(board, zobrist_keys, player), max_depth = 10)
+    ai_minimax = lambda board, player: find_best_move_original(board, player, 6, zobrist_keys, compute_hash(board, zobrist_keys, player))
+    ai_greedy = lambda board, player: lambda board, player: find_best_move(board, player, zobrist_keys, compute_hash(board, zobrist_keys, player), max_depth = 10)
 
     results = {'Minimax Wins': 0, 'Greedy Wins': 0, 'Draws': 0}
     num_games = 10
 
     for i in range(num_games):
-        print(f"Game {i+1}:")
-        result = play_game(ai_minimax, ai_greedy, verbose=True)
+        event_log.info('game_start', game=i + 1)
+        result = play_game(ai_minimax, ai_greedy, zobrist_keys, verbose=True)
         if result == 1:
             results['Minimax Wins'] += 1
         elif result == 2:
@@ -94,4 +77,6 @@ def main():
     print(results)
 
 if __name__ == "__main__":
+    event_log.stream_to()
     main()
+    event_log.stop_streaming()
@@ -1,35 +1,34 @@
-from game_logic import valid_moves, make_move, initialize_board, print_board
-from ai import find_best_move, init_zobrist, compute_hash
+from game_logic import initialize_board, GameState
+from ai import find_best_move, init_zobrist
+from event_log import event_log
 
-zobrist_keys = init_zobrist()
 
 def play_game(ai1, ai2, board, zobrist_keys, verbose=True):
     results = {'Shallow Wins': 0, 'Deep Wins': 0, 'Draws': 0}
     num_games = 10
 
     for i in range(num_games):
-        current_player = 1
-        current_hash = compute_hash(board, zobrist_keys)
+        state = GameState.from_board(board, 1, zobrist_keys)
         move_count = 0
 
-        while valid_moves(board, 1) or valid_moves(board, 2):
-            ai = ai1 if current_player == 1 else ai2
-            move = ai(board, current_player, zobrist_keys, current_hash)
+        while not state.is_terminal():
+            ai = ai1 if state.player == 1 else ai2
+            move = ai(state.to_board(), state.player, zobrist_keys, state.hash, state.passes)
             if move:
-                board, current_hash = make_move(board, move[0], move[1], current_player, zobrist_keys, current_hash)
+                player = state.player
+                state = state.play(move, zobrist_keys)
                 if verbose:
-                    print(f"Game {i+1}: Player {current_player} moves at {move}")
-                    print_board(board)  # Print the board after each move
-                current_player = 3 - current_player
+                    event_log.debug('move', game=i + 1, player=player, move=move, board=state)  # Formatted off the game loop
                 move_count += 1
             else:
                 if verbose:
-                    print(f"Player {current_player} passes")
-                current_player = 3 - current_player  # Switch player if no valid move
+                    event_log.debug('pass', game=i + 1, player=state.player)
+                state = state.pass_turn(zobrist_keys)  # Switch player if no valid move
 
             if move_count > 60:  # Safety to prevent infinite loops
                 break
 
+        board = state.to_board()
         winner = determine_winner(board)
         if winner == 1:
             results['Shallow Wins'] += 1
@@ -38,10 +37,9 @@ def play_game(ai1, ai2, board, zobrist_keys, verbose=True):
         else:
             results['Draws'] += 1
 
-        # Print score for each player
         black_discs = sum(row.count(1) for row in board)
         white_discs = sum(row.count(2) for row in board)
-        print(f"Game {i+1}: Score - Black: {black_discs}, White: {white_discs}")
+        event_log.info('game_over', game=i + 1, black=black_discs, white=white_discs)
 
     print("\nFinal Results after {} games:".format(num_games))
     print(results)
@@ -60,11 +58,14 @@ def determine_winner(board):
 
 def test_deepening_different_depths():
     board = initialize_board()
+    zobrist_keys = init_zobrist()
 
-    ai_deepening_shallow = lambda board, player, zobrist_keys, current_hash: find_best_move(board, player, zobrist_keys, current_hash, max_depth=3)
-    ai_deepening_deep = lambda board, player, zobrist_keys, current_hash: find_best_move(board, player, zobrist_keys, current_hash, max_depth=7)
+    ai_deepening_shallow = lambda board, player, zobrist_keys, current_hash, passes: find_best_move(board, player, zobrist_keys, current_hash, max_depth=3, passes=passes)
+    ai_deepening_deep = lambda board, player, zobrist_keys, current_hash, passes: find_best_move(board, player, zobrist_keys, current_hash, max_depth=7, passes=passes)
 
     play_game(ai_deepening_shallow, ai_deepening_deep, board, zobrist_keys)
 
-# Call the test function
-test_deepening_different_depths()
+if __name__ == "__main__":
+    event_log.stream_to()
+    test_deepening_different_depths()
+    event_log.stop_streaming()
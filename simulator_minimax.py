@@ -1,7 +1,6 @@
-from game_logic import valid_moves, make_move, initialize_board, print_board
-from ai import find_best_move, find_best_move_original, init_zobrist, compute_hash 
-
-zobrist_keys = init_zobrist()
+from game_logic import GameState
+from ai import find_best_move, find_best_move_original, init_zobrist
+from event_log import event_log
 
 
 def play_game(ai1, ai2, zobrist_keys, verbose=True):
@@ -9,29 +8,27 @@ def play_game(ai1, ai2, zobrist_keys, verbose=True):
     num_games = 10
 
     for i in range(num_games):
-        board = initialize_board()
-        current_player = 1
-        current_hash = compute_hash(board, zobrist_keys)
+        state = GameState.initial(zobrist_keys=zobrist_keys)
         move_count = 0
 
-        while valid_moves(board, 1) or valid_moves(board, 2):
-            ai = ai1 if current_player == 1 else ai2
-            move = ai(board, current_player, zobrist_keys, current_hash)
+        while not state.is_terminal():
+            ai = ai1 if state.player == 1 else ai2
+            move = ai(state.to_board(), state.player, zobrist_keys, state.hash, state.passes)
             if move:
-                board, current_hash = make_move(board, move[0], move[1], current_player, zobrist_keys, current_hash)
+                player = state.player
+                state = state.play(move, zobrist_keys)
                 if verbose:
-                    print(f"Game {i+1}: Player {current_player} moves at {move}")
-                    print_board(board)  # Print the board after each move
-                current_player = 3 - current_player
+                    event_log.debug('move', game=i + 1, player=player, move=move, board=state)  # Formatted off the game loop
                 move_count += 1
             else:
                 if verbose:
-                    print(f"Player {current_player} passes")
-                current_player = 3 - current_player  # Switch player if no valid move
+                    event_log.debug('pass', game=i + 1, player=state.player)
+                state = state.pass_turn(zobrist_keys)  # Switch player if no valid move
 
             if move_count > 60:  # Safety to prevent infinite loops
                 break
 
+        board = state.to_board()
         winner = determine_winner(board)
         if winner == 1:
             results['Minimax Wins'] += 1
@@ -56,10 +53,13 @@ def determine_winner(board):
         return 0  # Draw
 
 def test_minimax_vs_deepening():
-    ai_minimax = lambda board, player, zobrist_keys, current_hash: find_best_move_original(board, player, 3, zobrist_keys, current_hash)
-    ai_deepening = lambda board, player, zobrist_keys, current_hash: find_best_move(board, player, zobrist_keys, current_hash, max_depth=5)
+    zobrist_keys = init_zobrist()
+    ai_minimax = lambda board, player, zobrist_keys, current_hash, passes: find_best_move_original(board, player, 3, zobrist_keys, current_hash, passes=passes)
+    ai_deepening = lambda board, player, zobrist_keys, current_hash, passes: find_best_move(board, player, zobrist_keys, current_hash, max_depth=5, passes=passes)
 
     play_game(ai_minimax, ai_deepening, zobrist_keys)
 
-# Call the test function
-test_minimax_vs_deepening()
+if __name__ == "__main__":
+    event_log.stream_to()
+    test_minimax_vs_deepening()
+    event_log.stop_streaming()
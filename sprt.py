@@ -0,0 +1,101 @@
+"""
+Sequential probability ratio test (SPRT) for engine matches.
+
+A match between engine A and engine B tests H0: "A is elo0 stronger than B"
+against H1: "A is elo1 stronger", with error rates alpha (accepting H1 when
+H0 holds) and beta (the reverse). After every finished game pair the
+log-likelihood ratio of the observed scores is compared with the bounds
+ln(beta / (1 - alpha)) and ln((1 - beta) / alpha); the match stops as soon as
+it crosses one, which for clear-cut comparisons takes far fewer games than a
+fixed-length match.
+
+Games are scored in pairs, the same opening played once with each colour, so
+the bias of an opening cancels out within a pair. The ratio uses the normal
+approximation of the generalised SPRT on the per-pair scores (0, 0.25, 0.5,
+0.75 or 1 for A), and Elo differences use the logistic model.
+"""
+import math
+
+Z_95 = 1.959964  # Two-sided 95% quantile of the normal distribution
+MIN_VARIANCE = 1e-3  # Keeps the ratio finite while every pair has ended the same way
+MIN_PAIRS = 8  # The normal approximation is too rough to stop on fewer pairs
+
+
+def elo_to_score(elo):
+    """ Expected score of the stronger side of an elo difference. """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def pair_scores(results, engine_a):
+    """
+    Per-pair scores of engine_a from game results, for every opening whose two games have finished.
+
+    Args:
+        results (list): Game results as reported by tournament workers, with 'game', 'opening' and
+            'result' (black discs minus white discs).
+        engine_a (str): Engine spec of A, which tournament.schedule() gives Black in the even games.
+
+    Returns:
+        list: One score from 0 to 1 per complete pair, in opening order.
+    """
+    games = {}
+    for result in results:
+        # The game number, not the spec, tells A's colour: both sides may use the same spec
+        margin = result['result'] if result['game'] % 2 == 0 else -result['result']
+        games.setdefault(result['opening'], []).append(1.0 if margin > 0 else 0.0 if margin < 0 else 0.5)
+    return [sum(scores) / 2 for _, scores in sorted(games.items()) if len(scores) == 2]
+
+
+def mean_and_variance(scores):
+    mean = sum(scores) / len(scores)
+    return mean, sum((score - mean) ** 2 for score in scores) / len(scores)
+
+
+def elo_estimate(scores):
+    """ (Elo difference, lower, upper) of A over B with a 95% confidence interval, or None without data. """
+    if not scores:
+        return None
+    mean, variance = mean_and_variance(scores)
+    margin = Z_95 * math.sqrt(variance / len(scores))
+    return score_to_elo(mean), score_to_elo(mean - margin), score_to_elo(mean + margin)
+
+
+class SPRT:
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        if elo1 <= elo0:
+            raise ValueError("elo1 must be larger than elo0")
+        self.elo0, self.elo1 = elo0, elo1
+        self.alpha, self.beta = alpha, beta
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def llr(self, scores):
+        """ Log-likelihood ratio of H1 over H0 for a list of per-pair scores. """
+        if not scores:
+            return 0.0
+        mean, variance = mean_and_variance(scores)
+        s0, s1 = elo_to_score(self.elo0), elo_to_score(self.elo1)
+        return len(scores) * (s1 - s0) * (2 * mean - s0 - s1) / (2 * max(variance, MIN_VARIANCE))
+
+    def decision(self, scores):
+        """ 'H1' (A is at least elo1 stronger), 'H0' (at most elo0) or None while undecided. """
+        if len(scores) < MIN_PAIRS:
+            return None
+        llr = self.llr(scores)
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def report(self, scores):
+        """ Human-readable state of the test. """
+        estimate = elo_estimate(scores)
+        elo = "n/a" if estimate is None else f"{estimate[0]:+.1f} [{estimate[1]:+.1f}, {estimate[2]:+.1f}]"
+        return (f"{len(scores)} pairs, Elo {elo}, LLR {self.llr(scores):.2f} "
+                f"[{self.lower:.2f}, {self.upper:.2f}] for H0 elo <= {self.elo0:g} vs H1 elo >= {self.elo1:g}")
@@ -0,0 +1,65 @@
+import math
+import unittest
+from sprt import SPRT, elo_to_score, score_to_elo, pair_scores, elo_estimate
+from tournament import schedule, run_local
+
+class TestSPRT(unittest.TestCase):
+    def test_elo_score_round_trip(self):
+        self.assertAlmostEqual(elo_to_score(0), 0.5)
+        self.assertAlmostEqual(score_to_elo(elo_to_score(35.0)), 35.0)
+        self.assertAlmostEqual(elo_to_score(400), 10 / 11)
+
+    def test_pair_scores_need_both_colours(self):
+        games = schedule('a', 'b', 5)
+        results = [dict(games[0], result=6), dict(games[1], result=6), dict(games[2], result=0), dict(games[4], result=-2)]
+        # a wins as Black and loses as White in opening 0; openings 1 and 2 are incomplete
+        self.assertEqual(pair_scores(results, 'a'), [0.5])
+        results.append(dict(games[3], result=-8))
+        self.assertEqual(pair_scores(results, 'a'), [0.5, 0.75])
+
+    def test_self_match_pairs_score_each_colour_once(self):
+        games = schedule('greedy', 'greedy', 6)
+        # Black wins every game, so A wins one game of each pair and loses the other
+        self.assertEqual(pair_scores([dict(game, result=4 + game['game']) for game in games], 'greedy'), [0.5, 0.5, 0.5])
+        for margin in (2, -2, 0):
+            first, second = dict(games[0], result=margin), dict(games[1], result=-margin)
+            # Swapping the colours of a pair's results turns A's score into 1 minus it
+            swapped = dict(games[0], result=-margin), dict(games[1], result=margin)
+            self.assertEqual(pair_scores([first, second], 'greedy')[0], 1 - pair_scores(list(swapped), 'greedy')[0])
+        self.assertEqual(pair_scores([dict(games[0], result=2), dict(games[1], result=-2)], 'greedy'), [1.0])
+
+    def test_bounds_and_decisions(self):
+        test = SPRT(0, 10, alpha=0.05, beta=0.05)
+        self.assertAlmostEqual(test.upper, math.log(19))
+        self.assertAlmostEqual(test.lower, -math.log(19))
+        self.assertIsNone(test.decision([]))
+        self.assertIsNone(test.decision([1.0, 0.5, 0.0]))
+        self.assertEqual(test.decision([1.0, 0.75] * 40), 'H1')
+        self.assertEqual(test.decision([0.0, 0.25] * 40), 'H0')
+        self.assertLess(test.llr([0.5, 0.25] * 10), 0)
+        with self.assertRaises(ValueError):
+            SPRT(10, 0)
+
+    def test_elo_estimate_brackets_the_score(self):
+        elo, low, high = elo_estimate([1.0, 0.5, 0.75, 0.5] * 25)
+        self.assertAlmostEqual(elo, score_to_elo(0.6875))
+        self.assertLess(low, elo)
+        self.assertLess(elo, high)
+        self.assertIsNone(elo_estimate([]))
+
+    def test_match_stops_when_decided(self):
+        test = SPRT(-100, 0)  # Greedy is over 100 Elo stronger than random play, far outside the indifference zone
+        assignments = schedule('greedy', 'random', 200)
+        decisions = []
+
+        def stop(results):
+            decisions.append(test.decision(pair_scores(results, 'greedy')))
+            return decisions[-1] is not None
+
+        results, failures = run_local(assignments, workers=2, stop=stop)
+        self.assertEqual(failures, {})
+        self.assertLess(len(results), len(assignments))
+        self.assertEqual(decisions[-1], 'H1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Startup benchmark: module import times, worker-process spawn and GUI launch.
+
+Every measurement runs in a fresh interpreter, so nothing is cached between
+runs except the compiled bytecode. Imports are timed from the first import
+statement to its return and also report whether NumPy was pulled in. Worker
+spawn is the time from creating a "spawn" process pool to the first result of
+a job that imports the engine, as analyze.py and the server pay it. GUI launch
+is the time from starting the interpreter's imports to the main window being
+shown (on the offscreen platform unless a display is configured).
+
+Run with:
+    python startup_benchmark.py
+    python startup_benchmark.py --repeat 10 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ENGINE_MODULES = ('game_logic', 'move_cache', 'ai', 'simulator_greedy', 'simulator_random',
+                  'simulator_minimax', 'simulator_iterative', 'calibration', 'server', 'analyze')
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start, 'numpy': 'numpy' in sys.modules}}))
+"""
+
+SPAWN_SCRIPT = """
+import json, multiprocessing, time
+from concurrent.futures import ProcessPoolExecutor
+from startup_benchmark import spawn_job
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        executor.submit(spawn_job).result()
+        print(json.dumps({'seconds': time.perf_counter() - start}))
+"""
+
+GUI_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from gui import ReversiGUI
+app = QApplication(sys.argv)
+window = ReversiGUI()
+window.show()
+app.processEvents()
+print(json.dumps({'seconds': time.perf_counter() - start}))
+window.calibration_worker.wait()
+"""
+
+
+def spawn_job():
+    """ Worker-side job of the spawn measurement: loads the engine like an analysis worker. """
+    import ai
+    return ai.BOARD_SIZE
+
+
+def run_script(script, env=None):
+    """ Runs a snippet in a fresh interpreter from this directory and returns its JSON result line. """
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-c', script], cwd=here, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarise(samples):
+    seconds = [sample['seconds'] for sample in samples]
+    summary = {'median_ms': round(statistics.median(seconds) * 1000, 1), 'min_ms': round(min(seconds) * 1000, 1)}
+    if 'numpy' in samples[0]:
+        summary['numpy'] = any(sample['numpy'] for sample in samples)
+    return summary
+
+
+def measure_imports(modules=ENGINE_MODULES, repeat=5):
+    """ Median and best import time of every module, each in a fresh interpreter. """
+    run_script(IMPORT_SCRIPT.format(module=modules[0]))  # Warm the bytecode cache
+    return {module: summarise([run_script(IMPORT_SCRIPT.format(module=module)) for _ in range(repeat)])
+            for module in modules}
+
+
+def measure_spawn(repeat=5):
+    return summarise([run_script(SPAWN_SCRIPT) for _ in range(repeat)])
+
+
+def measure_gui(repeat=5):
+    """ Window launch time, or None when PyQt5 is not installed. """
+    try:
+        import PyQt5  # noqa: F401
+    except ImportError:
+        return None
+    env = dict(os.environ)
+    if not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return summarise([run_script(GUI_SCRIPT, env) for _ in range(repeat)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import, worker spawn and GUI launch times.")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument('--no-gui', action='store_true', help="Skip the GUI launch measurement")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = {'imports': measure_imports(repeat=args.repeat), 'worker_spawn': measure_spawn(args.repeat)}
+    if not args.no_gui:
+        results['gui_launch'] = measure_gui(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for module, summary in results['imports'].items():
+        note = ' (imports NumPy)' if summary['numpy'] else ''
+        print(f"import {module:<20} {summary['median_ms']:>7.1f} ms median, {summary['min_ms']:.1f} ms best{note}")
+    print(f"worker spawn {'':<14} {results['worker_spawn']['median_ms']:>7.1f} ms median")
+    if results.get('gui_launch'):
+        print(f"GUI launch {'':<16} {results['gui_launch']['median_ms']:>7.1f} ms median")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+import json
+import subprocess
+import sys
+import unittest
+from startup_benchmark import IMPORT_SCRIPT
+
+class TestStartup(unittest.TestCase):
+    def test_engine_imports_do_no_work(self):
+        for module in ('ai', 'simulator_random', 'simulator_minimax', 'simulator_iterative', 'analyze'):
+            script = IMPORT_SCRIPT.format(module=module)
+            lines = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout.splitlines()
+            self.assertEqual(len(lines), 1, f"{module} printed at import")  # No games played
+            self.assertFalse(json.loads(lines[0])['numpy'], f"{module} imports NumPy")
+
+    def test_zobrist_keys_created_once_on_first_use(self):
+        import ai
+        keys = ai.zobrist_keys
+        self.assertIs(ai.zobrist_keys, keys)
+        self.assertEqual(len(keys.black), ai.MAX_BOARD_SIZE ** 2)
+        with self.assertRaises(AttributeError):
+            ai.no_such_table
+
+if __name__ == '__main__':
+    unittest.main()
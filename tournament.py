@@ -0,0 +1,416 @@
+"""
+Engine matches distributed over several machines.
+
+A coordinator holds the schedule of a match between two engines and hands
+out one game at a time to worker agents that connect to it over TCP with
+multiprocessing.managers. An assignment names the engine spec of each colour
+(as understood by selfplay.make_engine), an opening index and a seed. The
+opening is derived from its index, so every node plays the same position
+without shipping boards. Every opening is played twice with colours swapped.
+
+Assignments are leased: a worker extends its lease after every move, and an
+assignment whose lease runs out (the worker died or lost its connection) goes
+back to the queue for another worker, up to MAX_ATTEMPTS times. The first
+result reported for a game counts. Throughput grows with the number of
+workers attached, since games are independent.
+
+With --sprt the match is a sequential probability ratio test (see sprt.py):
+--games becomes the maximum, and the match stops as soon as the test accepts
+either hypothesis about the Elo difference of engine A over engine B.
+
+Run with:
+    REVERSI_AUTHKEY=secret python tournament.py coordinator --engine-a minimax:3 --engine-b iterative:4 --games 200 --port 50055
+    REVERSI_AUTHKEY=secret python tournament.py worker --address coordinator-host:50055 --processes 8
+    python tournament.py local --engine-a minimax:2 --engine-b greedy --games 20 --workers 4
+    python tournament.py local --engine-a minimax:3 --engine-b minimax:2 --games 2000 --sprt --elo0 0 --elo1 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from multiprocessing import Process
+from multiprocessing.managers import BaseManager
+
+from game_logic import GameState
+from sprt import SPRT, pair_scores
+
+LEASE_TIME = 60.0  # Seconds an assignment stays with a worker without a heartbeat
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 0.5
+OPENING_PLIES = 6
+MAX_PLIES = 130  # Safety against endless games; a full 8x8 game has at most 60 moves and some passes
+
+
+def opening_state(index, plies=OPENING_PLIES, zobrist_keys=None):
+    """ The position after plies random legal moves chosen by a generator seeded with the opening index. """
+    rng = random.Random(index)
+    state = GameState.initial(zobrist_keys=zobrist_keys)
+    for _ in range(plies):
+        moves = state.legal_moves()
+        if not moves:
+            if state.is_terminal():
+                break
+            state = state.pass_turn(zobrist_keys)
+            continue
+        state = state.play(rng.choice(moves), zobrist_keys)
+    return state
+
+
+def schedule(engine_a, engine_b, games, seed=1, opening_plies=OPENING_PLIES):
+    """ Assignments of a match: each opening twice, with engine_a as Black first and as White second. """
+    return [{'game': game, 'black': engine_a if game % 2 == 0 else engine_b, 'white': engine_b if game % 2 == 0 else engine_a,
+             'opening': game // 2, 'opening_plies': opening_plies, 'seed': seed * 1_000_003 + game}
+            for game in range(games)]
+
+
+def summarise(results, engine_a):
+    """ Wins, draws and losses of engine_a and its score (draws count half), for results of a schedule() match. """
+    counts = Counter()
+    for result in results:
+        # schedule() gives engine_a Black in the even games; comparing specs fails when both sides use the same one
+        a_is_black = result['game'] % 2 == 0
+        margin = result['result'] if a_is_black else -result['result']
+        counts['wins' if margin > 0 else 'losses' if margin < 0 else 'draws'] += 1
+    games = sum(counts.values())
+    score = (counts['wins'] + 0.5 * counts['draws']) / games if games else None
+    return {'games': games, 'wins': counts['wins'], 'draws': counts['draws'], 'losses': counts['losses'], 'score': score}
+
+
+class Coordinator:
+    """
+    The match schedule and the leases of running games.
+
+    Lives in the manager's server process; workers and the driver call its
+    methods through proxies, each connection from its own thread.
+    """
+
+    def __init__(self, assignments, lease_time=LEASE_TIME, max_attempts=MAX_ATTEMPTS):
+        self._lock = threading.Lock()
+        self._pending = deque(assignments)
+        self._leases = {}  # game -> (worker, deadline, assignment)
+        self._attempts = Counter()
+        self._results = {}
+        self._failed = {}
+        self._workers = Counter()  # Games reported per worker
+        self.total = len(assignments)
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+
+    def _expire(self):
+        now = time.monotonic()
+        for game, (worker, deadline, assignment) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[game]
+                if self._attempts[game] < self.max_attempts:
+                    self._pending.appendleft(assignment)  # Retried before new games, so the match finishes in order
+                else:
+                    self._failed[game] = f"lease expired {self._attempts[game]} times, last with {worker}"
+
+    def request(self, worker):
+        """ The next assignment for a worker, or None when nothing is left to hand out right now. """
+        with self._lock:
+            self._expire()
+            while self._pending:
+                assignment = self._pending.popleft()
+                if assignment['game'] in self._results:
+                    continue
+                self._attempts[assignment['game']] += 1
+                self._leases[assignment['game']] = (worker, time.monotonic() + self.lease_time, assignment)
+                return assignment
+            return None
+
+    def heartbeat(self, worker, game):
+        """ Extends a lease; False if the worker no longer holds it and should drop the game. """
+        with self._lock:
+            self._expire()
+            lease = self._leases.get(game)
+            if lease is None or lease[0] != worker:
+                return False
+            self._leases[game] = (worker, time.monotonic() + self.lease_time, lease[2])
+            return True
+
+    def report(self, worker, result):
+        with self._lock:
+            game = result['game']
+            self._leases.pop(game, None)
+            self._failed.pop(game, None)
+            if game not in self._results:
+                self._results[game] = dict(result, worker=worker)
+                self._workers[worker] += 1
+
+    def finished(self):
+        with self._lock:
+            self._expire()
+            return len(self._results) + len(self._failed) >= self.total
+
+    def progress(self):
+        with self._lock:
+            self._expire()
+            return {'total': self.total, 'done': len(self._results), 'running': len(self._leases),
+                    'pending': len(self._pending), 'failed': len(self._failed), 'workers': dict(self._workers)}
+
+    def results(self):
+        with self._lock:
+            return [self._results[game] for game in sorted(self._results)]
+
+    def failures(self):
+        with self._lock:
+            return dict(self._failed)
+
+
+_coordinator = None
+
+
+def _install_coordinator(assignments, lease_time, max_attempts):
+    global _coordinator
+    _coordinator = Coordinator(assignments, lease_time, max_attempts)
+
+
+def _get_coordinator():
+    return _coordinator
+
+
+class TournamentManager(BaseManager):
+    pass
+
+
+TournamentManager.register('coordinator', callable=_get_coordinator)
+
+
+def start_coordinator(assignments, address=('', 50055), authkey=None, lease_time=LEASE_TIME, max_attempts=MAX_ATTEMPTS):
+    """
+    Starts the coordinator's server process.
+
+    Returns:
+        tuple: (manager, coordinator proxy); manager.address holds the bound address (port 0 picks a free port).
+    """
+    manager = TournamentManager(address=address, authkey=authkey)
+    manager.start(_install_coordinator, (assignments, lease_time, max_attempts))
+    return manager, manager.coordinator()
+
+
+def connect(address, authkey):
+    manager = TournamentManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.coordinator()
+
+
+def play_assignment(assignment, engines, heartbeat=None):
+    """
+    Plays one assigned game.
+
+    Args:
+        assignment (dict): Engines, opening and seed of the game.
+        engines (dict): Cache of built engines by spec, filled as needed.
+        heartbeat (callable, optional): Called after every move; returning False abandons the game.
+
+    Returns:
+        dict: The assignment with the result (black discs minus white discs), move count and time,
+        or None if the game was abandoned.
+    """
+    import ai
+    from selfplay import make_engine
+    for spec in (assignment['black'], assignment['white']):
+        if spec not in engines:
+            engines[spec] = make_engine(spec)
+    players = {1: engines[assignment['black']], 2: engines[assignment['white']]}
+    # Games must not share cached scores, and random engines replay from the seed
+    # (set after the first use of the Zobrist keys, which draws from the same generator)
+    zobrist_keys = ai.zobrist_keys
+    ai.transposition_table.clear()
+    ai.evaluate_board.cache_clear()
+    random.seed(assignment['seed'])
+
+    start = time.perf_counter()
+    state = opening_state(assignment['opening'], assignment['opening_plies'], zobrist_keys)
+    plies = 0
+    while not state.is_terminal() and plies < MAX_PLIES:
+        if not state.legal_moves_mask():
+            state = state.pass_turn(zobrist_keys)
+            continue
+        move, _ = players[state.player](state.to_board(), state.player, zobrist_keys, state.hash, state.passes)
+        state = state.play(move, zobrist_keys)
+        plies += 1
+        if heartbeat is not None and not heartbeat():
+            return None
+    black, white = state.disc_counts()
+    return dict(assignment, result=black - white, moves=plies, seconds=round(time.perf_counter() - start, 3))
+
+
+def run_worker(address, authkey, worker_id=None, poll_interval=POLL_INTERVAL):
+    """
+    Worker agent: plays assignments from the coordinator until the match is finished.
+
+    Returns:
+        int: Number of games this worker reported.
+    """
+    worker_id = worker_id or f"{os.uname().nodename}:{os.getpid()}"
+    coordinator = connect(address, authkey)
+    engines = {}
+    played = 0
+    while True:
+        try:
+            assignment = coordinator.request(worker_id)
+            if assignment is None:
+                if coordinator.finished():
+                    return played
+                time.sleep(poll_interval)  # Every game is leased; one may still come back
+                continue
+            result = play_assignment(assignment, engines, lambda: coordinator.heartbeat(worker_id, assignment['game']))
+            if result is not None:
+                coordinator.report(worker_id, result)
+                played += 1
+        except (EOFError, ConnectionError):
+            return played  # The coordinator has shut down
+
+
+def _worker_process(address, authkey, worker_id):
+    run_worker(address, authkey, worker_id)
+
+
+def start_workers(address, authkey, count, prefix='local'):
+    """ Starts count worker agents as local processes. """
+    workers = []
+    for index in range(count):
+        process = Process(target=_worker_process, args=(address, authkey, f"{prefix}-{index}"), daemon=True)
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def wait_for_results(coordinator, progress_interval=None, out=sys.stderr, stop=None):
+    """
+    Waits until every game is reported or has failed; returns (results, failures).
+
+    stop, if given, is called with the results so far after every poll and ends the wait
+    early by returning True; games still running are then left unfinished.
+    """
+    last_report = time.monotonic()
+    while not coordinator.finished():
+        time.sleep(POLL_INTERVAL)
+        if stop is not None and stop(coordinator.results()):
+            break
+        if progress_interval is not None and time.monotonic() - last_report >= progress_interval:
+            progress = coordinator.progress()
+            out.write(f"{progress['done']}/{progress['total']} games, {progress['running']} running, "
+                      f"{len(progress['workers'])} workers reporting\n")
+            last_report = time.monotonic()
+    return coordinator.results(), coordinator.failures()
+
+
+def run_local(assignments, workers, lease_time=LEASE_TIME, max_attempts=MAX_ATTEMPTS, progress_interval=None, stop=None):
+    """ Plays a match with a coordinator and worker processes on this machine; returns (results, failures). """
+    authkey = os.urandom(16)
+    manager, coordinator = start_coordinator(assignments, ('127.0.0.1', 0), authkey, lease_time, max_attempts)
+    processes = start_workers(manager.address, authkey, workers)
+    try:
+        return wait_for_results(coordinator, progress_interval, stop=stop)
+    finally:
+        manager.shutdown()  # Workers still playing lose the connection at their next heartbeat and exit
+        for process in processes:
+            process.join(timeout=2 * POLL_INTERVAL + 1)
+            if process.is_alive():
+                process.terminate()
+
+
+def parse_address(text, default_host=''):
+    host, _, port = text.rpartition(':')
+    return host or default_host, int(port)
+
+
+def authkey_from_env():
+    key = os.environ.get('REVERSI_AUTHKEY')
+    if not key:
+        raise SystemExit("Set REVERSI_AUTHKEY to the shared secret of the coordinator and its workers")
+    return key.encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed engine matches.")
+    parser.add_argument('mode', choices=['coordinator', 'worker', 'local'])
+    parser.add_argument('--engine-a', default='minimax:3', help="Engine spec, as for selfplay.py")
+    parser.add_argument('--engine-b', default='greedy')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--opening-plies', type=int, default=OPENING_PLIES)
+    parser.add_argument('--port', type=int, default=50055, help="Coordinator port")
+    parser.add_argument('--address', default=None, help="Coordinator host:port for workers")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes on this node")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes in local mode")
+    parser.add_argument('--lease', type=float, default=LEASE_TIME, help="Seconds before a silent worker's game is reassigned")
+    parser.add_argument('--out', default=None, help="Write the game results as JSONL")
+    parser.add_argument('--sprt', action='store_true', help="Stop once an SPRT on the Elo difference of A over B is decided")
+    parser.add_argument('--elo0', type=float, default=0.0, help="SPRT null hypothesis: A is at most elo0 stronger")
+    parser.add_argument('--elo1', type=float, default=10.0, help="SPRT alternative: A is at least elo1 stronger")
+    parser.add_argument('--alpha', type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument('--beta', type=float, default=0.05, help="SPRT false negative rate")
+    args = parser.parse_args()
+
+    if args.mode == 'worker':
+        if args.address is None:
+            parser.error("worker mode needs --address")
+        authkey = authkey_from_env()
+        address = parse_address(args.address, 'localhost')
+        if args.processes == 1:
+            played = run_worker(address, authkey)
+        else:
+            processes = start_workers(address, authkey, args.processes, prefix=f"{os.uname().nodename}:{os.getpid()}")
+            for process in processes:
+                process.join()
+            played = None
+        print(f"Worker finished{'' if played is None else f' after {played} games'}")
+        return
+
+    assignments = schedule(args.engine_a, args.engine_b, args.games, args.seed, args.opening_plies)
+    test, stop = None, None
+    decided = {}  # The decision that stopped the match and the scores it was made on
+    if args.sprt:
+        test = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+
+        def stop(results):
+            scores = pair_scores(results, args.engine_a)
+            decision = test.decision(scores)
+            if decision is not None:
+                decided.update(decision=decision, scores=scores)
+            return decision is not None
+    start = time.perf_counter()
+    if args.mode == 'local':
+        results, failures = run_local(assignments, args.workers, args.lease, progress_interval=10, stop=stop)
+    else:
+        manager, coordinator = start_coordinator(assignments, ('', args.port), authkey_from_env(), args.lease)
+        print(f"Coordinator listening on port {manager.address[1]} for {len(assignments)} games")
+        try:
+            results, failures = wait_for_results(coordinator, progress_interval=10, stop=stop)
+        finally:
+            manager.shutdown()
+    elapsed = time.perf_counter() - start
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+    summary = summarise(results, args.engine_a)
+    print(f"{args.engine_a} vs {args.engine_b}: +{summary['wins']} ={summary['draws']} -{summary['losses']}, "
+          f"score {summary['score'] if summary['score'] is None else round(summary['score'], 3)} "
+          f"({len(results)} games in {elapsed:.1f}s, {len(results) / max(elapsed, 1e-9):.2f} games/s)")
+    for game, reason in sorted(failures.items()):
+        print(f"Game {game} failed: {reason}")
+    if test is not None:
+        # Games finished after the stop are in the results, but the test was decided without them
+        if decided:
+            decision, scores = decided['decision'], decided['scores']
+        else:
+            scores = pair_scores(results, args.engine_a)
+            decision = test.decision(scores)
+        verdict = {'H1': f"H1 accepted, {args.engine_a} is stronger by at least {args.elo1:g} Elo",
+                   'H0': f"H0 accepted, {args.engine_a} is not stronger by more than {args.elo0:g} Elo",
+                   None: "undecided after the maximum number of games"}[decision]
+        print(f"SPRT: {verdict}; {test.report(scores)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import os
+import time
+import unittest
+from tournament import (Coordinator, schedule, summarise, play_assignment, start_coordinator, start_workers,
+                        connect, wait_for_results, run_local)
+
+class TestTournament(unittest.TestCase):
+    def test_schedule_swaps_colours(self):
+        games = schedule('minimax:2', 'greedy', 5)
+        self.assertEqual([game['opening'] for game in games], [0, 0, 1, 1, 2])
+        self.assertEqual((games[0]['black'], games[1]['black']), ('minimax:2', 'greedy'))
+        results = [dict(games[0], result=10), dict(games[1], result=10), dict(games[2], result=0)]
+        self.assertEqual(summarise(results, 'minimax:2'), {'games': 3, 'wins': 1, 'draws': 1, 'losses': 1, 'score': 0.5})
+        games = schedule('greedy', 'greedy', 2)
+        results = [dict(games[0], result=10), dict(games[1], result=10)]
+        self.assertEqual(summarise(results, 'greedy'), {'games': 2, 'wins': 1, 'draws': 0, 'losses': 1, 'score': 0.5})
+
+    def test_expired_lease_is_reassigned(self):
+        coordinator = Coordinator(schedule('greedy', 'random', 1), lease_time=0.05, max_attempts=2)
+        game = coordinator.request('w1')
+        self.assertIsNone(coordinator.request('w2'))
+        time.sleep(0.1)
+        self.assertFalse(coordinator.heartbeat('w1', game['game']))
+        self.assertEqual(coordinator.request('w2'), game)
+        time.sleep(0.1)
+        self.assertTrue(coordinator.finished())  # Both attempts expired
+        self.assertIn(0, coordinator.failures())
+        coordinator.report('w2', dict(game, result=4))  # A late result still counts
+        self.assertEqual([result['worker'] for result in coordinator.results()], ['w2'])
+        self.assertEqual(coordinator.failures(), {})
+
+    def test_local_workers_match_sequential_play(self):
+        assignments = schedule('greedy', 'random', 6)
+        results, failures = run_local(assignments, workers=2)
+        self.assertEqual(failures, {})
+        engines = {}
+        expected = [play_assignment(assignment, engines)['result'] for assignment in assignments]
+        self.assertEqual([result['result'] for result in results], expected)
+
+    def test_game_of_vanished_worker_is_replayed(self):
+        authkey = os.urandom(16)
+        manager, coordinator = start_coordinator(schedule('greedy', 'random', 3), ('127.0.0.1', 0), authkey, lease_time=0.5)
+        try:
+            ghost = connect(manager.address, authkey)
+            taken = ghost.request('ghost')  # Never reported, as if the node died mid-game
+            workers = start_workers(manager.address, authkey, 1)
+            results, failures = wait_for_results(coordinator)
+            for process in workers:
+                process.join(timeout=5)
+            self.assertEqual(failures, {})
+            self.assertEqual(sorted(result['game'] for result in results), [0, 1, 2])
+            self.assertEqual(next(result for result in results if result['game'] == taken['game'])['worker'], 'local-0')
+        finally:
+            manager.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+"""
+Fits evaluate_board weights to recorded self-play positions.
+
+Positions produced by selfplay.py are turned into feature arrays with
+features.extract_features and the weights of every game phase (or every
+number of empty squares) are fitted in one vectorised solve per bucket:
+
+  * lstsq     ridge least squares against the final disc difference
+  * logistic  Newton's method on the game outcome (win 1, draw 0.5, loss 0),
+              rescaled to disc-difference units like the lstsq weights
+
+The result is written as JSON that ai.py loads at startup (see ai.WEIGHTS_FILE).
+
+Run with:
+    python tuner.py selfplay_data --method lstsq --granularity phase --out weights.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from ai import default_weights
+from features import FEATURE_NAMES, extract_features
+from selfplay import iter_arrays
+
+PHASES = ('early', 'mid', 'end')
+
+
+def phase_of(empty_counts):
+    """ Vectorised ai.determine_game_phase: 0 early, 1 mid, 2 end. """
+    return np.where(empty_counts > 40, 0, np.where(empty_counts > 20, 1, 2))
+
+
+def bucket_of(empty_counts, granularity):
+    return phase_of(empty_counts) if granularity == 'phase' else empty_counts
+
+
+def bucket_name(bucket, granularity):
+    return PHASES[bucket] if granularity == 'phase' else int(bucket)
+
+
+def chunk_targets(chunk, target):
+    """ Targets from the side to move's point of view, with a mask of usable rows. """
+    sign = np.where(chunk['side'] == 1, 1.0, -1.0)
+    if target == 'score':
+        values = chunk['score'].astype(np.float64)
+        return values, ~np.isnan(values)
+    return sign * chunk['result'], np.ones(len(chunk), dtype=bool)
+
+
+def iter_features(paths, limit=None):
+    """ Yields (features, empty counts, chunk) per chunk of the dataset, or of its first `limit` positions. """
+    seen = 0
+    for chunk in iter_arrays(paths):
+        if limit is not None:
+            if seen >= limit:
+                break
+            chunk = chunk[:limit - seen]
+        seen += len(chunk)
+        X, empties = extract_features(chunk['black'], chunk['white'], chunk['side'])
+        yield X, empties, chunk
+
+
+def fit_lstsq(paths, granularity='phase', target='result', ridge=1e-3, limit=None):
+    """
+    Ridge least squares per bucket, streaming the dataset one chunk at a time.
+
+    Only the k x k normal equations of each bucket are kept in memory, so the
+    dataset size is bounded by disk, not RAM.
+    """
+    k = len(FEATURE_NAMES)
+    gram, moments, counts = {}, {}, {}
+    for X, empties, chunk in iter_features(paths, limit):
+        y, usable = chunk_targets(chunk, target)
+        X, y, buckets = X[usable], y[usable], bucket_of(empties[usable], granularity)
+        for bucket in np.unique(buckets):
+            rows = buckets == bucket
+            Xb = X[rows]
+            gram[bucket] = gram.get(bucket, np.zeros((k, k))) + Xb.T @ Xb
+            moments[bucket] = moments.get(bucket, np.zeros(k)) + Xb.T @ y[rows]
+            counts[bucket] = counts.get(bucket, 0) + int(rows.sum())
+    weights = {}
+    for bucket in gram:
+        scale = max(counts[bucket], 1)
+        weights[bucket] = np.linalg.solve(gram[bucket] / scale + ridge * np.eye(k), moments[bucket] / scale)
+    return weights, counts
+
+
+def outcome_targets(chunk):
+    """ Game outcome from the side to move's point of view (win 1, draw 0.5, loss 0) and the disc margin. """
+    margin = np.where(chunk['side'] == 1, 1.0, -1.0) * chunk['result']
+    return np.where(margin > 0, 1.0, np.where(margin < 0, 0.0, 0.5)), margin
+
+
+def fit_logistic(paths, granularity='phase', ridge=1e-3, iterations=25, limit=None):
+    """
+    Logistic regression of the game outcome per bucket using Newton's method.
+
+    Every Newton step streams the dataset once and keeps only each bucket's
+    gradient and k x k Hessian. The fitted log-odds weights are then rescaled to
+    disc-difference units, the scale of the lstsq weights and of the search's
+    margins, by a least-squares fit of the final disc margin on the log-odds.
+
+    Returns:
+        tuple: (weights, counts, scales), scales being the factor applied to each bucket's log-odds weights.
+    """
+    k = len(FEATURE_NAMES)
+    # First pass: feature standard deviations, so the Newton steps are well conditioned
+    sums, squares, counts = {}, {}, {}
+    for X, empties, _ in iter_features(paths, limit):
+        buckets = bucket_of(empties, granularity)
+        for bucket in np.unique(buckets):
+            Xb = X[buckets == bucket]
+            sums[bucket] = sums.get(bucket, np.zeros(k)) + Xb.sum(axis=0)
+            squares[bucket] = squares.get(bucket, np.zeros(k)) + (Xb * Xb).sum(axis=0)
+            counts[bucket] = counts.get(bucket, 0) + len(Xb)
+    if not counts:
+        raise ValueError(f"No positions found in {paths}")
+    feature_scale = {}
+    for bucket, n in counts.items():
+        deviation = np.sqrt(np.maximum(squares[bucket] / n - (sums[bucket] / n) ** 2, 0))
+        deviation[deviation < 1e-12] = 1.0
+        feature_scale[bucket] = deviation
+
+    w = {bucket: np.zeros(k) for bucket in counts}
+    active = set(counts)
+    for _ in range(iterations):
+        if not active:
+            break
+        gradients = {bucket: np.zeros(k) for bucket in active}
+        hessians = {bucket: np.zeros((k, k)) for bucket in active}
+        for X, empties, chunk in iter_features(paths, limit):
+            y, _ = outcome_targets(chunk)
+            buckets = bucket_of(empties, granularity)
+            for bucket in np.unique(buckets):
+                if bucket not in active:
+                    continue
+                rows = buckets == bucket
+                Xs = X[rows] / feature_scale[bucket]
+                p = 1.0 / (1.0 + np.exp(-Xs @ w[bucket]))
+                gradients[bucket] += Xs.T @ (p - y[rows])
+                hessians[bucket] += (Xs * (p * (1 - p))[:, None]).T @ Xs
+        for bucket in list(active):
+            n = counts[bucket]
+            gradient = gradients[bucket] / n + ridge * w[bucket]
+            hessian = hessians[bucket] / n + ridge * np.eye(k)
+            step = np.linalg.solve(hessian, gradient)
+            w[bucket] -= step
+            if np.abs(step).max() < 1e-8:
+                active.discard(bucket)
+    weights = {bucket: w[bucket] / feature_scale[bucket] for bucket in counts}
+
+    # Last pass: margin ~ scale * log-odds per bucket
+    cross, norms = {}, {}
+    for X, empties, chunk in iter_features(paths, limit):
+        _, margin = outcome_targets(chunk)
+        buckets = bucket_of(empties, granularity)
+        for bucket in np.unique(buckets):
+            rows = buckets == bucket
+            logit = X[rows] @ weights[bucket]
+            cross[bucket] = cross.get(bucket, 0.0) + float(logit @ margin[rows])
+            norms[bucket] = norms.get(bucket, 0.0) + float(logit @ logit)
+    scales = {bucket: cross[bucket] / norms[bucket] if norms[bucket] > 0 else 1.0 for bucket in counts}
+    return {bucket: weights[bucket] * scales[bucket] for bucket in counts}, counts, scales
+
+
+def weights_document(weights, counts, granularity, method, min_samples=0, scales=None):
+    """ Builds the JSON document read by ai.load_weights; scales records the rescaling of logistic weights. """
+    table = {}
+    for bucket in sorted(weights):
+        if counts[bucket] < min_samples:
+            continue
+        name = bucket_name(bucket, granularity)
+        phase = name if granularity == 'phase' else PHASES[int(phase_of(np.array([bucket]))[0])]
+        entry = {feature: float(value) for feature, value in zip(FEATURE_NAMES, weights[bucket])}
+        # potential_mobility only adds a constant per phase and is not fitted
+        entry['potential_mobility'] = default_weights(phase)['potential_mobility']
+        table[str(name)] = entry
+    document = {'granularity': granularity, 'method': method,
+                'samples': {str(bucket_name(b, granularity)): counts[b] for b in sorted(counts)},
+                'weights': table}
+    if scales is not None:
+        document['logit_scale'] = {str(bucket_name(b, granularity)): float(scales[b]) for b in sorted(scales)}
+    return document
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit evaluation weights to self-play positions.")
+    parser.add_argument('data', nargs='+', help="Data files, directories or glob patterns")
+    parser.add_argument('--method', choices=['lstsq', 'logistic'], default='lstsq')
+    parser.add_argument('--granularity', choices=['phase', 'empties'], default='phase')
+    parser.add_argument('--target', choices=['result', 'score'], default='result', help="lstsq target")
+    parser.add_argument('--ridge', type=float, default=1e-3)
+    parser.add_argument('--limit', type=int, default=None, help="Use at most this many positions")
+    parser.add_argument('--min-samples', type=int, default=100, help="Skip buckets with fewer positions")
+    parser.add_argument('--out', default='weights.json')
+    args = parser.parse_args()
+
+    start = time.time()
+    scales = None
+    if args.method == 'logistic':
+        weights, counts, scales = fit_logistic(args.data, args.granularity, args.ridge, limit=args.limit)
+    else:
+        weights, counts = fit_lstsq(args.data, args.granularity, args.target, args.ridge, limit=args.limit)
+    document = weights_document(weights, counts, args.granularity, args.method, args.min_samples, scales)
+    with open(args.out, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"Fitted {len(document['weights'])} weight sets from {sum(counts.values())} positions "
+          f"in {time.time() - start:.1f}s, written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+import ai
+import tuner
+from features import FEATURE_NAMES, extract_features
+from game_logic import initialize_board, valid_moves, make_move, board_to_bitboards
+from selfplay import PositionWriter
+
+TRUE_WEIGHTS = np.array([1.0, 2.0, 0.5, 3.0, 1.5, 0.3])
+
+
+def write_synthetic_positions(path, count=600, seed=3):
+    """ Random game positions whose recorded disc margin is a known linear function of their features. """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board, player = initialize_board(), 1
+        for _ in range(rng.randint(1, 58)):
+            moves = valid_moves(board, player)
+            if not moves:
+                player = 3 - player
+                moves = valid_moves(board, player)
+                if not moves:
+                    break
+            make_move(board, *rng.choice(moves), player)
+            player = 3 - player
+        positions.append(board_to_bitboards(board) + (player,))
+    packed = np.array(positions, dtype=np.uint64)
+    X, empties = extract_features(packed[:, 0], packed[:, 1], packed[:, 2])
+    margins = np.clip(np.round(X @ TRUE_WEIGHTS), -64, 64)
+    with PositionWriter(path, chunk_records=128) as writer:
+        for (black, white, side), margin in zip(positions, margins):
+            writer.write(black, white, side, int(margin if side == 1 else -margin), None)
+    return X, margins, tuner.bucket_of(empties, 'phase')
+
+
+class TestTuner(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'data.rvsp')
+        self.X, self.margins, self.phases = write_synthetic_positions(self.path)
+
+    def load(self, document):
+        path = os.path.join(self.directory, 'weights.json')
+        with open(path, 'w') as f:
+            json.dump(document, f)
+        return ai.load_weights(path)
+
+    def test_lstsq_recovers_weights_and_round_trips(self):
+        _, empties_counts = tuner.fit_lstsq(self.path, granularity='empties')
+        self.assertEqual(sum(empties_counts.values()), len(self.margins))
+        merged, counts = tuner.fit_lstsq(self.path, granularity='phase', ridge=1e-6)
+        for bucket, bucket_weights in merged.items():
+            # Features that are constant within a phase make the weights ambiguous, but not the scores
+            X = self.X[self.phases == bucket]
+            np.testing.assert_allclose(X @ bucket_weights, X @ TRUE_WEIGHTS, atol=1.0)
+        granularity, table = self.load(tuner.weights_document(merged, counts, 'phase', 'lstsq'))
+        self.assertEqual(granularity, 'phase')
+        for phase, bucket in zip(tuner.PHASES, sorted(merged)):
+            self.assertEqual([table[phase][name] for name in FEATURE_NAMES], merged[bucket].tolist())
+
+    def test_logistic_weights_are_in_disc_difference_units(self):
+        weights, counts, scales = tuner.fit_logistic(self.path, granularity='phase')
+        self.assertEqual(sum(counts.values()), len(self.margins))
+        lstsq, _ = tuner.fit_lstsq(self.path, granularity='phase')
+        limited, limited_counts, _ = tuner.fit_logistic(self.path, granularity='phase', limit=100)
+        self.assertEqual(sum(limited_counts.values()), 100)
+        for bucket in weights:
+            X = self.X[self.phases == bucket]
+            predictions, reference = X @ weights[bucket], X @ lstsq[bucket]
+            self.assertGreater(np.corrcoef(predictions, reference)[0, 1], 0.9)
+            self.assertLess(abs(np.log(np.abs(predictions).mean() / np.abs(reference).mean())), np.log(2))
+        document = tuner.weights_document(weights, counts, 'phase', 'logistic', scales=scales)
+        self.assertEqual(set(document['logit_scale']), set(tuner.PHASES) & set(document['weights']))
+        granularity, table = self.load(document)
+        self.assertEqual(set(table), set(document['weights']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Zobrist hashing with flat key tables.
+
+A position's hash is the XOR of one key per disc (by square and colour), the
+side key while White is to move and a key for the number of consecutive
+passes that led to the position (none after a move). Positions that differ
+only in the side to move or in a pending pass therefore hash differently.
+
+Keys live in tuples indexed by square. ZobristKeys holds them for a grid of
+the largest board size, drawn in row-major order, Black before White, so a
+seed gives the same disc keys as before the tables were flattened and keys
+for a size also hash every smaller board. board(size) derives the tables of
+one board size, indexed like its bitboards (row * size + col), including a
+flip key per square: the XOR of its Black and White keys, so turning a disc
+over is one XOR and a move's hash update walks its flip mask once.
+"""
+import random
+
+BOARD_SIZE = 8
+EMPTY = 0
+MAX_PASSES = 2  # Two passes in a row end the game
+
+
+class BoardKeys:
+    """ Key tables of one board size, indexed by bitboard square. """
+    __slots__ = ('size', 'pieces', 'flip')
+
+    def __init__(self, keys, size):
+        squares = [(row, col) for row in range(size) for col in range(size)]
+        black = tuple(keys.black[row * keys.size + col] for row, col in squares)
+        white = tuple(keys.white[row * keys.size + col] for row, col in squares)
+        self.size = size
+        self.pieces = (None, black, white)  # Indexed by player
+        self.flip = tuple(b ^ w for b, w in zip(black, white))
+
+    def flip_hash(self, flips):
+        """ XOR of the flip keys of every square in a flip bitmask. """
+        # Per-byte lookup tables were measured slower: a move turns over few discs, spread over several bytes
+        h = 0
+        flip = self.flip
+        while flips:
+            low = flips & -flips
+            flips ^= low
+            h ^= flip[low.bit_length() - 1]
+        return h
+
+
+class ZobristKeys:
+    """ Immutable key tables for boards up to size x size. """
+    __slots__ = ('size', 'black', 'white', 'side', 'passes', '_boards')
+
+    def __init__(self, size, black, white, side, passes):
+        for name, value in (('size', size), ('black', tuple(black)), ('white', tuple(white)), ('side', side),
+                            ('passes', tuple(passes)), ('_boards', {})):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ZobristKeys is immutable")
+
+    def __reduce__(self):
+        return ZobristKeys, (self.size, self.black, self.white, self.side, self.passes)
+
+    def board(self, size):
+        """ The BoardKeys of a board size, built on first use. """
+        table = self._boards.get(size)
+        if table is None:
+            if size > self.size:
+                raise ValueError(f"Zobrist keys cover boards up to {self.size}x{self.size}, not {size}x{size}")
+            table = self._boards.setdefault(size, BoardKeys(self, size))
+        return table
+
+    def pass_key(self, passes):
+        return self.passes[min(passes, MAX_PASSES)]
+
+
+def init_zobrist(seed=None, size=BOARD_SIZE, side_key=None):
+    """
+    Draws the keys for boards up to size x size.
+
+    Args:
+        seed (int, optional): Seed giving the same keys in every process; the global generator otherwise.
+        size (int, optional): Side length of the largest board to hash.
+        side_key (int, optional): Side-to-move key to use instead of a random one, for hashes that
+            must stay compatible with stored ones.
+
+    Returns:
+        ZobristKeys: The keys.
+    """
+    rng = random.Random(seed) if seed is not None else random
+    black, white = [], []
+    for _ in range(size * size):
+        black.append(rng.getrandbits(64))
+        white.append(rng.getrandbits(64))
+    side = rng.getrandbits(64)
+    passes = [0] + [rng.getrandbits(64) for _ in range(MAX_PASSES)]
+    return ZobristKeys(size, black, white, side_key if side_key is not None else side, passes)
+
+
+def compute_hash(board, zobrist_keys, player=1, passes=0):
+    """
+    Hashes a list-of-lists board.
+
+    Args:
+        board (list of lists): The game board.
+        zobrist_keys (ZobristKeys): The keys.
+        player (int, optional): The player to move.
+        passes (int, optional): Consecutive passes leading to the position.
+
+    Returns:
+        int: The hash.
+
+    Raises:
+        ValueError: If board is not a list of lists.
+    """
+    if not isinstance(board, list) or not all(isinstance(row, list) for row in board):
+        raise ValueError(f"Invalid board structure: {board}")
+    pieces = zobrist_keys.board(len(board)).pieces
+    h = zobrist_keys.side if player == 2 else 0
+    square = 0
+    for cells in board:
+        for piece in cells:
+            if piece != EMPTY:
+                h ^= pieces[piece][square]
+            square += 1
+    return h ^ zobrist_keys.pass_key(passes)
+
+
+def bitboard_hash(black, white, zobrist_keys, size=8, player=1, passes=0):
+    """ Hashes a position given as bitboards; equal to compute_hash of the same board. """
+    table = zobrist_keys.board(size)
+    h = zobrist_keys.side if player == 2 else 0
+    for keys, bits in ((table.pieces[1], black), (table.pieces[2], white)):
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            h ^= keys[bit.bit_length() - 1]
+    return h ^ zobrist_keys.pass_key(passes)
+
+
+def move_hash(current_hash, zobrist_keys, size, square, player, flips, passes=0):
+    """ Hash after player places a disc on square and turns over the discs of the flips mask. """
+    table = zobrist_keys.board(size)
+    return (current_hash ^ table.pieces[player][square] ^ table.flip_hash(flips)
+            ^ zobrist_keys.side ^ zobrist_keys.pass_key(passes))
+
+
+def pass_hash(current_hash, zobrist_keys, passes=0):
+    """ Hash after the side to move passes, given the passes before this one. """
+    return current_hash ^ zobrist_keys.side ^ zobrist_keys.pass_key(passes) ^ zobrist_keys.pass_key(passes + 1)
@@ -0,0 +1,66 @@
+import pickle
+import random
+import unittest
+from game_logic import initialize_board, make_move, valid_moves, board_to_bitboards, flips_mask, GameState
+from zobrist import init_zobrist, compute_hash, bitboard_hash, move_hash, pass_hash
+
+class TestZobrist(unittest.TestCase):
+    def test_keys_match_the_former_dict_layout(self):
+        rng = random.Random(9)
+        legacy = {(row, col): {piece: rng.getrandbits(64) for piece in (1, 2)} for row in range(10) for col in range(10)}
+        keys = init_zobrist(seed=9, size=10)
+        board = initialize_board(8)
+        expected = 0
+        for row in range(8):
+            for col in range(8):
+                if board[row][col]:
+                    expected ^= legacy[(row, col)][board[row][col]]
+        self.assertEqual(compute_hash(board, keys), expected)
+
+    def test_side_and_passes_change_the_hash(self):
+        keys = init_zobrist(seed=2)
+        board = initialize_board()
+        hashes = {compute_hash(board, keys, player, passes) for player in (1, 2) for passes in (0, 1, 2)}
+        self.assertEqual(len(hashes), 6)
+        self.assertEqual(pass_hash(compute_hash(board, keys, 1, 0), keys, 0), compute_hash(board, keys, 2, 1))
+        black, white = board_to_bitboards(board)
+        self.assertEqual(bitboard_hash(black, white, keys, 8, 2, 1), compute_hash(board, keys, 2, 1))
+
+    def test_incremental_updates_match_recomputation(self):
+        rng = random.Random(4)
+        keys = init_zobrist(seed=5, size=16)
+        passed = 0
+        for size in (6, 8, 12):
+            for _ in range(3):
+                board, player, passes = initialize_board(size), 1, 0
+                current_hash = compute_hash(board, keys)
+                while valid_moves(board, 1) or valid_moves(board, 2):
+                    moves = valid_moves(board, player)
+                    if not moves:
+                        current_hash = pass_hash(current_hash, keys, passes)
+                        player, passes = 3 - player, passes + 1
+                        passed += 1
+                        self.assertEqual(current_hash, compute_hash(board, keys, player, passes))
+                        continue
+                    row, col = rng.choice(moves)
+                    black, white = board_to_bitboards(board)
+                    own, opp = (black, white) if player == 1 else (white, black)
+                    square = row * size + col
+                    expected = move_hash(current_hash, keys, size, square, player, flips_mask(own, opp, square, size), passes)
+                    board, current_hash = make_move(board, row, col, player, keys, current_hash, passes)
+                    player, passes = 3 - player, 0
+                    self.assertEqual(current_hash, expected)
+                    self.assertEqual(current_hash, compute_hash(board, keys, player))
+        self.assertGreater(passed, 0)
+
+    def test_immutable_and_picklable(self):
+        keys = init_zobrist(seed=1)
+        with self.assertRaises(AttributeError):
+            keys.side = 0
+        copy = pickle.loads(pickle.dumps(keys))
+        state = GameState.initial(zobrist_keys=keys)
+        self.assertEqual(GameState.initial(zobrist_keys=copy).hash, state.hash)
+        self.assertRaises(ValueError, keys.board, 10)
+
+if __name__ == '__main__':
+    unittest.main()